@@ -1,3 +1,4 @@
+import logging
 import os
 from flask import Flask, jsonify, send_from_directory
 from flask_cors import CORS
@@ -8,9 +9,16 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # --- Local Application Imports ---
-from config import DB_CONFIG, MODEL_PATHS
-from models.ml_models import load_models, MODELS
-from utils.db import get_db_connection
+from config import DB_CONFIG, MODEL_PATHS, REQUIRE_MODELS, RUN_MIGRATIONS
+from database.migrate import run_migrations
+from database.partitions import run_partition_maintenance
+from models.ml_models import load_models, model_status, get_loaded_models
+from utils.db import get_db_connection, pool_stats
+from utils.log import configure_logging, logging_stats
+from utils.metrics import register_metrics, metrics_response
+from utils.passwords import hashing_stats
+from utils.response_cache import response_cache_stats
+from utils.schema import schema_status
 from errors.handlers import register_error_handlers
  
 # --- Route Blueprints ---
@@ -22,14 +30,47 @@ from routes.trial_routes import trial_bp
 from routes.admin_routes import admin_bp
 from routes.applications_routes import applications_bp
 
+logger = logging.getLogger(__name__)
+
+
+def startup():
+    """Once-per-process startup work: logging, models, migrations and partitions"""
+    # --- Logging ---
+    # Before anything logs: structured lines through a background writer thread
+    configure_logging()
+
+    # --- Load ML Models ---
+    # Loaded at import so `gunicorn --preload` loads them once in the master and the
+    # forked workers share them; a missing model stops startup when REQUIRE_MODELS is set.
+    load_models(strict=REQUIRE_MODELS)
+
+    # --- Apply Database Migrations ---
+    # Once per deploy rather than per request: request handlers never issue DDL.
+    # An advisory lock makes concurrent startups safe. A failed migration stops
+    # startup rather than serving against an old schema. Upcoming monthly patient
+    # partitions are created here too; scripts/manage_partitions.py does it from cron.
+    if RUN_MIGRATIONS:
+        if not run_migrations():
+            raise RuntimeError("Database migrations failed; not starting against an outdated schema")
+        run_partition_maintenance()
+
+
+# Process pools (upload scoring, password hashing) re-import the main script in
+# their processes as __mp_main__; under `python app.py` that is this file, and
+# those processes must not repeat the startup work
+if __name__ != '__mp_main__':
+    startup()
+
 # --- App Initialization ---
 app = Flask(__name__, static_folder='build', static_url_path='/')
 
 # --- Extension Initialization ---
 # Configure CORS for production. If FRONTEND_ORIGIN is set, use it; otherwise allow all (no credentials).
+# The pagination headers are exposed so a cross-origin frontend can follow them.
 frontend_origin = os.getenv("FRONTEND_ORIGIN", "*")
 supports_credentials = frontend_origin != "*"
-CORS(app, resources={r"/api/*": {"origins": frontend_origin}}, supports_credentials=supports_credentials)
+CORS(app, resources={r"/api/*": {"origins": frontend_origin}}, supports_credentials=supports_credentials,
+     expose_headers=['X-Next-Cursor', 'Link'])
 
 # --- Register Blueprints ---
 app.register_blueprint(auth_bp)
@@ -43,10 +84,29 @@ app.register_blueprint(applications_bp)
 # --- Register Global Error Handlers ---
 register_error_handlers(app)
 
+# --- Request Timing (Server-Timing headers and latency histograms) ---
+register_metrics(app)
+
 # --- Health check ---
 @app.route('/api/health', methods=['GET'])
 def health():
-    return jsonify({"status": "ok"}), 200
+    models = model_status()
+    schema = schema_status()
+    ready = models["ready"] and schema["current"]
+    return jsonify({
+        "status": "ok" if ready else "degraded",
+        "models": models,
+        "db_pool": pool_stats(),
+        "schema": schema,
+        "response_cache": response_cache_stats(),
+        "password_hashing": hashing_stats(),
+        "logging": logging_stats()
+    }), 200 if ready else 503
+
+# --- Prometheus metrics (aggregated across gunicorn workers) ---
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return metrics_response()
 
 # --- Simple root for sanity check when not serving frontend from Flask ---
 @app.route('/', methods=['GET'])
@@ -69,20 +129,16 @@ if os.getenv('SERVE_FRONTEND', 'false').lower() == 'true':
 
 # --- Main Execution Block ---
 if __name__ == '__main__':
-    print("🚀 Starting Virtual Patient Recruitment API...")
-
-    # Load ML models on startup
-    loaded_count = load_models()
-    print(f"✅ Loaded {loaded_count} models: {list(MODELS.keys())}")
+    # Get port from environment variable for deployment platforms like Render/Railway
+    port = int(os.environ.get("PORT", 5000))
+    logger.info("Starting Virtual Patient Recruitment API", extra={'port': port, 'models': get_loaded_models()})
 
     # Test database connection on startup
     conn = get_db_connection()
     if conn:
-        print("✅ Database connection successful")
+        logger.info("Database connection successful")
         conn.close()
     else:
-        print("❌ Database connection failed")
+        logger.error("Database connection failed")
 
-    # Get port from environment variable for deployment platforms like Render/Railway
-    port = int(os.environ.get("PORT", 5000))
     app.run(debug=False, host="0.0.0.0", port=port)
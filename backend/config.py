@@ -10,10 +10,113 @@ DB_CONFIG = {
     'port': int(os.getenv('DB_PORT', '5432'))
 }
 
+# Model files resolve relative to this directory so loading works from any cwd
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 MODEL_PATHS = {
-    'hypertension': 'ml_models/hypertension_model.pkl',
-    'arthritis': 'ml_models/arthritis_model.pkl',
-    'migraine': 'ml_models/migraine_model.pkl',
-    'phase1': 'ml_models/phase1_model.pkl'
+    'hypertension': os.path.join(BASE_DIR, 'ml_models/hypertension_model.pkl'),
+    'arthritis': os.path.join(BASE_DIR, 'ml_models/arthritis_model.pkl'),
+    'migraine': os.path.join(BASE_DIR, 'ml_models/migraine_model.pkl'),
+    'phase1': os.path.join(BASE_DIR, 'ml_models/phase1_model.pkl')
 }
 
+# Load models from their native artifacts (scripts/convert_models.py) when present,
+# falling back to the pickle when an artifact is missing or fails verification
+MODEL_ARTIFACTS = os.getenv('MODEL_ARTIFACTS', 'true').lower() == 'true'
+
+# Seconds between checks for changed model files; each process reloads changed
+# models on its own, so a replaced model reaches every worker (0 disables)
+MODEL_RELOAD_CHECK_SECONDS = float(os.getenv('MODEL_RELOAD_CHECK_SECONDS', '5'))
+
+# Token for state-changing admin endpoints, sent as X-Admin-Token (unset disables them)
+ADMIN_API_TOKEN = os.getenv('ADMIN_API_TOKEN', '')
+
+# Refuse to start when a configured model cannot be loaded
+REQUIRE_MODELS = os.getenv('REQUIRE_MODELS', 'true').lower() == 'true'
+
+# Apply pending database migrations when the app starts
+RUN_MIGRATIONS = os.getenv('RUN_MIGRATIONS', 'true').lower() == 'true'
+
+# Monthly patient partitions created ahead of the current month
+PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', '3'))
+# Partitions older than this many months are detached into the archive schema (0 = never)
+PARTITION_ARCHIVE_MONTHS = int(os.getenv('PARTITION_ARCHIVE_MONTHS', '0'))
+
+# Rows scored per model.predict call on bulk uploads
+SCORING_CHUNK_SIZE = int(os.getenv('SCORING_CHUNK_SIZE', '5000'))
+
+# gunicorn worker processes (read by gunicorn.conf.py as well); each one starts
+# its own scoring processes, which are budgeted across them
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '2'))
+
+# Score upload batches in worker processes (0 scores in the request thread):
+# processes per app process, xgboost/OpenMP threads in each, and the fewest rows
+# sent to one process. Processes are capped (with a warning) so that
+# WEB_CONCURRENCY x processes x threads stays within the CPU cores.
+SCORING_PROCESSES = int(os.getenv('SCORING_PROCESSES', '0'))
+SCORING_PROCESS_THREADS = int(os.getenv('SCORING_PROCESS_THREADS', '1'))
+SCORING_PROCESS_MIN_ROWS = int(os.getenv('SCORING_PROCESS_MIN_ROWS', '1000'))
+
+# Score single patient applications with the compiled numpy fast path
+FAST_SCORING = os.getenv('FAST_SCORING', 'true').lower() == 'true'
+
+# Cached eligibility results keyed by trial, model version and converted
+# features: maximum entries per process (0 disables) and seconds to keep one
+PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', '50000'))
+PREDICTION_CACHE_TTL = float(os.getenv('PREDICTION_CACHE_TTL', '3600'))
+
+# Seconds GET responses are served from the in-process response cache:
+# /api/analytics (also invalidated on patient writes) and the static trial metadata
+ANALYTICS_CACHE_TTL = float(os.getenv('ANALYTICS_CACHE_TTL', '30'))
+TRIAL_METADATA_CACHE_TTL = float(os.getenv('TRIAL_METADATA_CACHE_TTL', '3600'))
+# Most responses the in-process response cache holds; least recently used go first
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '256'))
+
+# Page size of /api/patients/<trial_type>: default and upper bound
+PATIENTS_PAGE_SIZE = int(os.getenv('PATIENTS_PAGE_SIZE', '100'))
+PATIENTS_MAX_PAGE_SIZE = int(os.getenv('PATIENTS_MAX_PAGE_SIZE', '1000'))
+
+# Admin user list: totals up to this estimate are counted exactly
+USERS_EXACT_COUNT_LIMIT = int(os.getenv('USERS_EXACT_COUNT_LIMIT', '10000'))
+
+# Rows fetched per round trip by streaming CSV exports
+EXPORT_FETCH_SIZE = int(os.getenv('EXPORT_FETCH_SIZE', '2000'))
+
+# Rows sent per multi-row INSERT when persisting bulk uploads
+BULK_INSERT_PAGE_SIZE = int(os.getenv('BULK_INSERT_PAGE_SIZE', '1000'))
+
+# Rows read from an uploaded CSV/Excel file per streaming chunk
+UPLOAD_CHUNK_ROWS = int(os.getenv('UPLOAD_CHUNK_ROWS', '10000'))
+
+# Background upload jobs: worker threads per process, queue poll interval,
+# seconds without a heartbeat before a running job is considered abandoned, and
+# claims of one job before it is marked failed instead of retried again
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '1'))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', '2'))
+JOB_STALE_SECONDS = int(os.getenv('JOB_STALE_SECONDS', '300'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+
+# Password hashing: Werkzeug method for new hashes (stored hashes using other
+# parameters are upgraded on the next login), worker processes per app
+# process, queued operations before requests get 429, and seconds to wait
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '16'))
+PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', '10'))
+
+# Application logging: minimum level, 'json' (structured) or 'text' lines, and
+# records buffered for the background writer before new ones are dropped
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+# Send per-stage request timings (filter, predict, insert, ...) as Server-Timing headers
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'true').lower() == 'true'
+
+# Database connection pool per process: connections opened at startup, hard
+# limit, seconds to wait for a free connection, and idle seconds before a
+# checkout health check
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '1'))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+DB_POOL_CHECK_IDLE = float(os.getenv('DB_POOL_CHECK_IDLE', '30'))
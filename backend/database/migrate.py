@@ -0,0 +1,138 @@
+import hashlib
+import logging
+import os
+import re
+import sys
+import psycopg2
+
+# Ensure we can import config when running from backend/ or repo root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from config import DB_CONFIG  # fallback when DATABASE_URL is not provided
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+# Serializes migration runs across processes and hosts (arbitrary constant)
+MIGRATION_LOCK_ID = 715_300_001
+
+
+def connect():
+    """Open a direct (unpooled) connection: DATABASE_URL first, then DB_CONFIG"""
+    db_url = os.getenv('DATABASE_URL')
+    if db_url:
+        return psycopg2.connect(db_url)
+    return psycopg2.connect(**DB_CONFIG)
+
+
+def discover_migrations():
+    """
+    Return the migration files in version order.
+
+    Returns:
+        list: (version, name, sql, checksum) tuples
+
+    Raises:
+        ValueError: If two files share a version number
+    """
+    migrations = []
+    seen = set()
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in seen:
+            raise ValueError(f"Duplicate migration version {version}")
+        seen.add(version)
+        with open(os.path.join(MIGRATIONS_DIR, filename), 'r', encoding='utf-8') as f:
+            sql = f.read()
+        migrations.append((version, match.group(2), sql, hashlib.sha256(sql.encode()).hexdigest()))
+    return migrations
+
+
+LATEST_VERSION = max((m[0] for m in discover_migrations()), default=0)
+
+
+def apply_migrations(conn):
+    """
+    Apply every migration newer than the database's recorded version.
+
+    Each migration runs in its own transaction together with its
+    schema_migrations row, under an advisory lock so concurrent app
+    processes starting at once apply it exactly once.
+
+    Args:
+        conn: Direct psycopg2 connection
+
+    Returns:
+        list: Versions applied by this call
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            applied_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.commit()
+
+    applied = []
+    cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+    try:
+        cursor.execute("SELECT version, checksum FROM schema_migrations")
+        done = dict(cursor.fetchall())
+        conn.commit()
+
+        for version, name, sql, checksum in discover_migrations():
+            if version in done:
+                if done[version].strip() != checksum:
+                    logger.warning("Migration changed after it was applied",
+                                   extra={'migration': f"{version:04d}_{name}"})
+                continue
+            logger.info("Applying migration", extra={'migration': f"{version:04d}_{name}"})
+            try:
+                cursor.execute(sql)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                    (version, name, checksum)
+                )
+                conn.commit()
+            except psycopg2.Error:
+                conn.rollback()
+                raise
+            applied.append(version)
+    finally:
+        conn.rollback()
+        cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+        conn.commit()
+        cursor.close()
+
+    if applied:
+        logger.info("Applied migrations", extra={'applied': applied, 'schema_version': LATEST_VERSION})
+    else:
+        logger.info("Database schema up to date", extra={'schema_version': LATEST_VERSION})
+    return applied
+
+
+def run_migrations():
+    """Connect, apply pending migrations and close; returns False if that failed"""
+    conn = None
+    try:
+        conn = connect()
+        apply_migrations(conn)
+        return True
+    except (psycopg2.Error, ValueError):
+        logger.exception("Database migration failed")
+        return False
+    finally:
+        if conn and not conn.closed:
+            conn.close()
@@ -1,5 +1,5 @@
--- Drop existing tables to ensure a clean slate, if they exist
-DROP TABLE IF EXISTS hypertension_patients, arthritis_patients, migraine_patients, phase1_patients, users CASCADE;
+-- Base schema: users, per-trial patient tables and the applications audit table.
+-- Written to be safe on databases created by the old schema.sql.
 
 -- Users table for authentication
 CREATE TABLE IF NOT EXISTS users (
@@ -98,6 +98,9 @@ CREATE TABLE IF NOT EXISTS applications (
 CREATE INDEX IF NOT EXISTS idx_applications_username ON applications(username);
 CREATE INDEX IF NOT EXISTS idx_applications_created ON applications(created_at);
 
+-- Databases created before last_login existed
+ALTER TABLE users ADD COLUMN IF NOT EXISTS last_login TIMESTAMP WITH TIME ZONE;
+
 -- Insert default admin user with a Werkzeug-compatible password hash for 'admin'
 INSERT INTO users (username, password_hash, user_type)
 VALUES (
@@ -111,4 +114,3 @@ CREATE INDEX IF NOT EXISTS idx_hypertension_created ON hypertension_patients(cre
 CREATE INDEX IF NOT EXISTS idx_arthritis_created ON arthritis_patients(created_at);
 CREATE INDEX IF NOT EXISTS idx_migraine_created ON migraine_patients(created_at);
 CREATE INDEX IF NOT EXISTS idx_phase1_created ON phase1_patients(created_at);
-
@@ -0,0 +1,30 @@
+-- Background bulk-screening jobs; the table doubles as the work queue
+CREATE TABLE IF NOT EXISTS upload_jobs (
+    id SERIAL PRIMARY KEY,
+    trial_type VARCHAR(50) NOT NULL,
+    filename VARCHAR(255) NOT NULL,
+    file_data BYTEA,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    total_rows INT,
+    processed_rows INT NOT NULL DEFAULT 0,
+    eligible INT NOT NULL DEFAULT 0,
+    ineligible INT NOT NULL DEFAULT 0,
+    errors INT NOT NULL DEFAULT 0,
+    error TEXT,
+    attempts INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP WITH TIME ZONE,
+    heartbeat_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+CREATE INDEX IF NOT EXISTS idx_upload_jobs_queue ON upload_jobs(status, created_at);
+
+-- Per-row outcome of each job, paged by row number
+CREATE TABLE IF NOT EXISTS upload_job_results (
+    job_id INT NOT NULL REFERENCES upload_jobs(id) ON DELETE CASCADE,
+    row_number INT NOT NULL,
+    patient_id INT,
+    eligibility VARCHAR(20) NOT NULL,
+    error TEXT,
+    PRIMARY KEY (job_id, row_number)
+);
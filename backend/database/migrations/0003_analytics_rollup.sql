@@ -0,0 +1,84 @@
+-- Daily patient counts per trial, eligibility and source behind /api/analytics.
+-- Kept current by statement-level triggers on the patient tables; days are UTC.
+CREATE TABLE IF NOT EXISTS analytics_daily (
+    trial_type VARCHAR(50) NOT NULL,
+    day DATE NOT NULL,
+    eligibility VARCHAR(20) NOT NULL,
+    source VARCHAR(20) NOT NULL,
+    patients BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (trial_type, day, eligibility, source)
+);
+
+-- Adds the rows a statement inserted and subtracts the rows it deleted (an
+-- UPDATE does both). TG_ARGV[0] is the trial type.
+CREATE OR REPLACE FUNCTION analytics_rollup_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        INSERT INTO analytics_daily AS a (trial_type, day, eligibility, source, patients)
+        SELECT TG_ARGV[0], (created_at AT TIME ZONE 'UTC')::date, eligibility, COALESCE(source, ''), -COUNT(*)
+        FROM old_rows
+        GROUP BY 2, 3, 4
+        ORDER BY 2, 3, 4
+        ON CONFLICT (trial_type, day, eligibility, source)
+        DO UPDATE SET patients = a.patients + EXCLUDED.patients;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO analytics_daily AS a (trial_type, day, eligibility, source, patients)
+        SELECT TG_ARGV[0], (created_at AT TIME ZONE 'UTC')::date, eligibility, COALESCE(source, ''), COUNT(*)
+        FROM new_rows
+        GROUP BY 2, 3, 4
+        ORDER BY 2, 3, 4
+        ON CONFLICT (trial_type, day, eligibility, source)
+        DO UPDATE SET patients = a.patients + EXCLUDED.patients;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    trial TEXT;
+BEGIN
+    FOREACH trial IN ARRAY ARRAY['hypertension', 'arthritis', 'migraine', 'phase1'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %1$s_rollup_insert ON %1$s_patients', trial);
+        EXECUTE format('DROP TRIGGER IF EXISTS %1$s_rollup_update ON %1$s_patients', trial);
+        EXECUTE format('DROP TRIGGER IF EXISTS %1$s_rollup_delete ON %1$s_patients', trial);
+        EXECUTE format(
+            'CREATE TRIGGER %1$s_rollup_insert AFTER INSERT ON %1$s_patients
+             REFERENCING NEW TABLE AS new_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION analytics_rollup_apply(%1$L)', trial);
+        EXECUTE format(
+            'CREATE TRIGGER %1$s_rollup_update AFTER UPDATE ON %1$s_patients
+             REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION analytics_rollup_apply(%1$L)', trial);
+        EXECUTE format(
+            'CREATE TRIGGER %1$s_rollup_delete AFTER DELETE ON %1$s_patients
+             REFERENCING OLD TABLE AS old_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION analytics_rollup_apply(%1$L)', trial);
+    END LOOP;
+END;
+$$;
+
+-- Rebuilds analytics_daily from the patient tables (backfill or drift repair).
+-- The lock waits for in-flight inserts and holds new ones until the rebuild commits.
+CREATE OR REPLACE FUNCTION refresh_analytics_rollup() RETURNS BIGINT AS $$
+DECLARE
+    total BIGINT;
+BEGIN
+    LOCK TABLE analytics_daily IN EXCLUSIVE MODE;
+    DELETE FROM analytics_daily;
+    INSERT INTO analytics_daily (trial_type, day, eligibility, source, patients)
+    SELECT trial_type, (created_at AT TIME ZONE 'UTC')::date, eligibility, COALESCE(source, ''), COUNT(*)
+    FROM (
+        SELECT 'hypertension' AS trial_type, created_at, eligibility, source FROM hypertension_patients
+        UNION ALL SELECT 'arthritis', created_at, eligibility, source FROM arthritis_patients
+        UNION ALL SELECT 'migraine', created_at, eligibility, source FROM migraine_patients
+        UNION ALL SELECT 'phase1', created_at, eligibility, source FROM phase1_patients
+    ) patients
+    GROUP BY 1, 2, 3, 4;
+    SELECT COALESCE(SUM(patients), 0) INTO total FROM analytics_daily;
+    RETURN total;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT refresh_analytics_rollup();
@@ -0,0 +1,16 @@
+-- (created_at, id) is the keyset pagination order of /api/patients/<trial_type>;
+-- the eligibility/source variants serve its filtered pages. The created_at
+-- indexes are rebuilt with id as a tie-breaker.
+DROP INDEX IF EXISTS idx_hypertension_created, idx_arthritis_created, idx_migraine_created, idx_phase1_created;
+CREATE INDEX IF NOT EXISTS idx_hypertension_created ON hypertension_patients(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_arthritis_created ON arthritis_patients(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_migraine_created ON migraine_patients(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_phase1_created ON phase1_patients(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_hypertension_eligibility_created ON hypertension_patients(eligibility, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_arthritis_eligibility_created ON arthritis_patients(eligibility, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_migraine_eligibility_created ON migraine_patients(eligibility, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_phase1_eligibility_created ON phase1_patients(eligibility, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_hypertension_source_created ON hypertension_patients(source, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_arthritis_source_created ON arthritis_patients(source, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_migraine_source_created ON migraine_patients(source, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_phase1_source_created ON phase1_patients(source, created_at, id);
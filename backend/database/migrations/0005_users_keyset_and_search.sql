@@ -0,0 +1,17 @@
+-- Keyset pagination of the admin user list, newest first, with and without a role filter
+CREATE INDEX IF NOT EXISTS idx_users_created ON users(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_users_type_created ON users(user_type, created_at, id);
+
+-- Trigram index for substring (ILIKE '%term%') username search. pg_trgm ships
+-- with standard Postgres and managed providers; where it is unavailable the
+-- search still works, just without the index.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS idx_users_username_trgm ON users USING gin (username gin_trgm_ops);
+    ELSE
+        RAISE NOTICE 'pg_trgm is not available; username search will not be indexed';
+    END IF;
+END;
+$$;
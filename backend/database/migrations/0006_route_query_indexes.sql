@@ -0,0 +1,15 @@
+-- Indexes matched to the query shapes of specific routes; scripts/check_query_plans.py
+-- asserts the hot queries use them.
+
+-- my_applications: WHERE username = %s ORDER BY created_at DESC
+DROP INDEX IF EXISTS idx_applications_username;
+CREATE INDEX IF NOT EXISTS idx_applications_username_created ON applications(username, created_at DESC);
+
+-- Upload job claim: only queued/running jobs are ever scanned, oldest first;
+-- finished jobs (the vast majority over time) stay out of the index
+DROP INDEX IF EXISTS idx_upload_jobs_queue;
+CREATE INDEX IF NOT EXISTS idx_upload_jobs_pending ON upload_jobs(created_at)
+    WHERE status IN ('queued', 'running');
+
+-- Job results filtered by outcome, paged by row number
+CREATE INDEX IF NOT EXISTS idx_upload_job_results_eligibility ON upload_job_results(job_id, eligibility, row_number);
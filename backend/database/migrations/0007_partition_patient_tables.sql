@@ -0,0 +1,127 @@
+-- Monthly range partitioning of the patient tables on created_at (UTC months),
+-- so recent-window queries prune to a few partitions. Each table keeps a
+-- default partition as a safety net for rows outside the created months.
+-- Partitions are named <trial>_patients_yYYYYmMM.
+
+-- Creates the monthly partitions of every patient table from from_month
+-- (default: the current month) through months_ahead months after the current
+-- one. Rows of a new month that already landed in the default partition are
+-- moved into it first. Returns the number of partitions created.
+CREATE OR REPLACE FUNCTION ensure_patient_partitions(from_month DATE DEFAULT NULL, months_ahead INT DEFAULT 3)
+RETURNS INT AS $$
+DECLARE
+    trial TEXT;
+    current_month DATE := date_trunc('month', NOW() AT TIME ZONE 'UTC')::date;
+    month DATE;
+    lower_bound TIMESTAMPTZ;
+    upper_bound TIMESTAMPTZ;
+    partition TEXT;
+    created INT := 0;
+BEGIN
+    FOREACH trial IN ARRAY ARRAY['hypertension', 'arthritis', 'migraine', 'phase1'] LOOP
+        month := LEAST(COALESCE(date_trunc('month', from_month)::date, current_month), current_month);
+        WHILE month <= current_month + make_interval(months => months_ahead) LOOP
+            partition := format('%s_patients_y%s', trial, to_char(month, 'YYYY"m"MM'));
+            lower_bound := month::timestamp AT TIME ZONE 'UTC';
+            upper_bound := (month + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC';
+            IF to_regclass(partition) IS NULL THEN
+                EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS)', partition, trial || '_patients');
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %I WHERE created_at >= %L AND created_at < %L RETURNING *)
+                     INSERT INTO %I SELECT * FROM moved',
+                    trial || '_patients_default', lower_bound, upper_bound, partition);
+                EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    trial || '_patients', partition, lower_bound, upper_bound);
+                created := created + 1;
+            END IF;
+            month := (month + INTERVAL '1 month')::date;
+        END LOOP;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detaches the monthly partitions of months that ended more than
+-- older_than_months months ago and moves them to the archive schema. The rows
+-- stay queryable there and remain counted in analytics_daily, but leave the
+-- live tables. Returns the number of partitions archived.
+CREATE OR REPLACE FUNCTION archive_patient_partitions(older_than_months INT)
+RETURNS INT AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', NOW() AT TIME ZONE 'UTC') - make_interval(months => older_than_months))::date;
+    part RECORD;
+    archived INT := 0;
+BEGIN
+    CREATE SCHEMA IF NOT EXISTS archive;
+    FOR part IN
+        SELECT child.relname AS partition, parent.relname AS parent
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        WHERE parent.relname IN ('hypertension_patients', 'arthritis_patients', 'migraine_patients', 'phase1_patients')
+          AND child.relname ~ '_y[0-9]{4}m[0-9]{2}$'
+          AND to_date(right(child.relname, 8), '"y"YYYY"m"MM') < cutoff
+        ORDER BY child.relname
+    LOOP
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', part.parent, part.partition);
+        EXECUTE format('ALTER TABLE %I SET SCHEMA archive', part.partition);
+        archived := archived + 1;
+    END LOOP;
+    RETURN archived;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rebuild each table as a partitioned one. Rows are copied before the
+-- analytics triggers are recreated, so analytics_daily is not counted twice;
+-- the id sequences carry over.
+DO $$
+DECLARE
+    trial TEXT;
+    tbl TEXT;
+    first_month DATE;
+BEGIN
+    FOREACH trial IN ARRAY ARRAY['hypertension', 'arthritis', 'migraine', 'phase1'] LOOP
+        tbl := trial || '_patients';
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', tbl, tbl || '_unpartitioned');
+        EXECUTE format('UPDATE %I SET created_at = NOW() WHERE created_at IS NULL', tbl || '_unpartitioned');
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)',
+            tbl, tbl || '_unpartitioned');
+        EXECUTE format('ALTER TABLE %I ALTER COLUMN created_at SET NOT NULL', tbl);
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', tbl || '_default', tbl);
+        EXECUTE format('ALTER SEQUENCE %I OWNED BY %I.id', tbl || '_id_seq', tbl);
+    END LOOP;
+
+    SELECT MIN(created_at AT TIME ZONE 'UTC')::date INTO first_month FROM (
+        SELECT MIN(created_at) AS created_at FROM hypertension_patients_unpartitioned
+        UNION ALL SELECT MIN(created_at) FROM arthritis_patients_unpartitioned
+        UNION ALL SELECT MIN(created_at) FROM migraine_patients_unpartitioned
+        UNION ALL SELECT MIN(created_at) FROM phase1_patients_unpartitioned
+    ) firsts;
+    PERFORM ensure_patient_partitions(first_month, 3);
+
+    FOREACH trial IN ARRAY ARRAY['hypertension', 'arthritis', 'migraine', 'phase1'] LOOP
+        tbl := trial || '_patients';
+        EXECUTE format('INSERT INTO %I SELECT * FROM %I', tbl, tbl || '_unpartitioned');
+        EXECUTE format('DROP TABLE %I', tbl || '_unpartitioned');
+
+        -- The partition key has to be part of the primary key
+        EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (id, created_at)', tbl);
+        EXECUTE format('CREATE INDEX idx_%s_created ON %I (created_at, id)', trial, tbl);
+        EXECUTE format('CREATE INDEX idx_%s_eligibility_created ON %I (eligibility, created_at, id)', trial, tbl);
+        EXECUTE format('CREATE INDEX idx_%s_source_created ON %I (source, created_at, id)', trial, tbl);
+
+        EXECUTE format(
+            'CREATE TRIGGER %1$s_rollup_insert AFTER INSERT ON %1$s_patients
+             REFERENCING NEW TABLE AS new_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION analytics_rollup_apply(%1$L)', trial);
+        EXECUTE format(
+            'CREATE TRIGGER %1$s_rollup_update AFTER UPDATE ON %1$s_patients
+             REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION analytics_rollup_apply(%1$L)', trial);
+        EXECUTE format(
+            'CREATE TRIGGER %1$s_rollup_delete AFTER DELETE ON %1$s_patients
+             REFERENCING OLD TABLE AS old_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION analytics_rollup_apply(%1$L)', trial);
+    END LOOP;
+END;
+$$;
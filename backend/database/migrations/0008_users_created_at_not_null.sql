@@ -0,0 +1,6 @@
+-- The admin user list pages by (created_at, id) and builds its cursor from
+-- created_at, so the column must never be NULL. Rows created before it had a
+-- default get the epoch, which sorts them last (oldest) in the newest-first list.
+UPDATE users SET created_at = TIMESTAMPTZ 'epoch' WHERE created_at IS NULL;
+ALTER TABLE users ALTER COLUMN created_at SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE users ALTER COLUMN created_at SET NOT NULL;
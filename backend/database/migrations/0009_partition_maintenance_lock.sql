@@ -0,0 +1,75 @@
+-- Makes patient partition maintenance safe to run concurrently (app startups
+-- and the cron job): both functions take a transaction-scoped advisory lock
+-- (database.partitions.PARTITION_LOCK_ID), and ensure_patient_partitions keeps
+-- a partition that already exists instead of failing on it, attaching it if
+-- it was left detached.
+
+CREATE OR REPLACE FUNCTION ensure_patient_partitions(from_month DATE DEFAULT NULL, months_ahead INT DEFAULT 3)
+RETURNS INT AS $$
+DECLARE
+    trial TEXT;
+    current_month DATE := date_trunc('month', NOW() AT TIME ZONE 'UTC')::date;
+    month DATE;
+    lower_bound TIMESTAMPTZ;
+    upper_bound TIMESTAMPTZ;
+    partition TEXT;
+    created INT := 0;
+BEGIN
+    -- Serializes concurrent maintenance (app startups, cron); released at commit
+    PERFORM pg_advisory_xact_lock(715300002);
+    FOREACH trial IN ARRAY ARRAY['hypertension', 'arthritis', 'migraine', 'phase1'] LOOP
+        month := LEAST(COALESCE(date_trunc('month', from_month)::date, current_month), current_month);
+        WHILE month <= current_month + make_interval(months => months_ahead) LOOP
+            partition := format('%s_patients_y%s', trial, to_char(month, 'YYYY"m"MM'));
+            lower_bound := month::timestamp AT TIME ZONE 'UTC';
+            upper_bound := (month + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC';
+            -- A partition that already exists is kept; one left detached is attached
+            IF to_regclass(partition) IS NULL THEN
+                EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS)', partition, trial || '_patients');
+            END IF;
+            IF NOT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(partition)) THEN
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %I WHERE created_at >= %L AND created_at < %L RETURNING *)
+                     INSERT INTO %I SELECT * FROM moved',
+                    trial || '_patients_default', lower_bound, upper_bound, partition);
+                EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    trial || '_patients', partition, lower_bound, upper_bound);
+                created := created + 1;
+            END IF;
+            month := (month + INTERVAL '1 month')::date;
+        END LOOP;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detaches the monthly partitions of months that ended more than
+-- older_than_months months ago and moves them to the archive schema. The rows
+-- stay queryable there and remain counted in analytics_daily, but leave the
+-- live tables. Returns the number of partitions archived.
+CREATE OR REPLACE FUNCTION archive_patient_partitions(older_than_months INT)
+RETURNS INT AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', NOW() AT TIME ZONE 'UTC') - make_interval(months => older_than_months))::date;
+    part RECORD;
+    archived INT := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(715300002);
+    CREATE SCHEMA IF NOT EXISTS archive;
+    FOR part IN
+        SELECT child.relname AS partition, parent.relname AS parent
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        WHERE parent.relname IN ('hypertension_patients', 'arthritis_patients', 'migraine_patients', 'phase1_patients')
+          AND child.relname ~ '_y[0-9]{4}m[0-9]{2}$'
+          AND to_date(right(child.relname, 8), '"y"YYYY"m"MM') < cutoff
+        ORDER BY child.relname
+    LOOP
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', part.parent, part.partition);
+        EXECUTE format('ALTER TABLE %I SET SCHEMA archive', part.partition);
+        archived := archived + 1;
+    END LOOP;
+    RETURN archived;
+END;
+$$ LANGUAGE plpgsql;
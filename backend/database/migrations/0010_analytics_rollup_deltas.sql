@@ -0,0 +1,88 @@
+-- Patient writes append their rollup changes to analytics_daily_delta instead
+-- of upserting analytics_daily. The upsert locked the (trial, day) row until
+-- the writing transaction committed, so two uploads for the same trial ran one
+-- after the other for the length of the whole upload. Appends never conflict.
+-- fold_analytics_deltas() moves pending deltas into analytics_daily after
+-- writes commit; readers add analytics_daily and the unfolded deltas.
+CREATE TABLE IF NOT EXISTS analytics_daily_delta (
+    trial_type VARCHAR(50) NOT NULL,
+    day DATE NOT NULL,
+    eligibility VARCHAR(20) NOT NULL,
+    source VARCHAR(20) NOT NULL,
+    patients BIGINT NOT NULL
+);
+
+-- Same statement-level triggers as before; TG_ARGV[0] is the trial type
+CREATE OR REPLACE FUNCTION analytics_rollup_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        INSERT INTO analytics_daily_delta (trial_type, day, eligibility, source, patients)
+        SELECT TG_ARGV[0], (created_at AT TIME ZONE 'UTC')::date, eligibility, COALESCE(source, ''), -COUNT(*)
+        FROM old_rows
+        GROUP BY 2, 3, 4;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO analytics_daily_delta (trial_type, day, eligibility, source, patients)
+        SELECT TG_ARGV[0], (created_at AT TIME ZONE 'UTC')::date, eligibility, COALESCE(source, ''), COUNT(*)
+        FROM new_rows
+        GROUP BY 2, 3, 4;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Folds committed deltas into analytics_daily and returns the rollup rows it
+-- changed, or NULL when another fold or refresh holds the rollup lock (the
+-- deltas stay for the next fold; readers count them meanwhile). Only folds and
+-- refreshes write analytics_daily, so this never waits on patient writes.
+-- 715_300_003 is the rollup lock (migrations 715_300_001, partitions 715_300_002).
+CREATE OR REPLACE FUNCTION fold_analytics_deltas() RETURNS BIGINT AS $$
+DECLARE
+    folded BIGINT;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(715300003) THEN
+        RETURN NULL;
+    END IF;
+    WITH moved AS (
+        DELETE FROM analytics_daily_delta
+        RETURNING trial_type, day, eligibility, source, patients
+    )
+    INSERT INTO analytics_daily AS a (trial_type, day, eligibility, source, patients)
+    SELECT trial_type, day, eligibility, source, SUM(patients)
+    FROM moved
+    GROUP BY 1, 2, 3, 4
+    ORDER BY 1, 2, 3, 4
+    ON CONFLICT (trial_type, day, eligibility, source)
+    DO UPDATE SET patients = a.patients + EXCLUDED.patients;
+    GET DIAGNOSTICS folded = ROW_COUNT;
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rebuilds analytics_daily from the patient tables (backfill or drift repair).
+-- No table lock: patient writes only append deltas, and other folds wait on
+-- the rollup lock. The deltas are dropped in the same statement (one snapshot)
+-- that counts the patients, so a delta committed meanwhile is neither counted
+-- nor dropped, and is folded later. Readers see the old rollup until commit.
+CREATE OR REPLACE FUNCTION refresh_analytics_rollup() RETURNS BIGINT AS $$
+DECLARE
+    total BIGINT;
+BEGIN
+    PERFORM pg_advisory_xact_lock(715300003);
+    DELETE FROM analytics_daily;
+    WITH dropped AS (
+        DELETE FROM analytics_daily_delta
+    )
+    INSERT INTO analytics_daily (trial_type, day, eligibility, source, patients)
+    SELECT trial_type, (created_at AT TIME ZONE 'UTC')::date, eligibility, COALESCE(source, ''), COUNT(*)
+    FROM (
+        SELECT 'hypertension' AS trial_type, created_at, eligibility, source FROM hypertension_patients
+        UNION ALL SELECT 'arthritis', created_at, eligibility, source FROM arthritis_patients
+        UNION ALL SELECT 'migraine', created_at, eligibility, source FROM migraine_patients
+        UNION ALL SELECT 'phase1', created_at, eligibility, source FROM phase1_patients
+    ) patients
+    GROUP BY 1, 2, 3, 4;
+    SELECT COALESCE(SUM(patients), 0) INTO total FROM analytics_daily;
+    RETURN total;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,67 @@
+import logging
+import os
+import sys
+import psycopg2
+
+# Ensure we can import config when running from backend/ or repo root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from config import PARTITION_MONTHS_AHEAD, PARTITION_ARCHIVE_MONTHS
+from database.migrate import connect
+
+logger = logging.getLogger(__name__)
+
+# Advisory lock held while maintaining partitions (migrations use 715_300_001).
+# ensure_patient_partitions/archive_patient_partitions take it as well.
+PARTITION_LOCK_ID = 715_300_002
+
+
+def maintain_partitions(conn, months_ahead=PARTITION_MONTHS_AHEAD, archive_after=PARTITION_ARCHIVE_MONTHS):
+    """
+    Create the upcoming monthly patient partitions and archive old ones. Runs
+    under a transaction-scoped advisory lock, so app startups and the cron
+    job can run it concurrently; the second one finds the work done.
+
+    Args:
+        conn: Direct psycopg2 connection; the changes are committed here
+        months_ahead (int): Months after the current one to create partitions for
+        archive_after (int): Detach partitions older than this many months into
+            the archive schema; 0 keeps every partition attached
+
+    Returns:
+        tuple: (partitions created, partitions archived)
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (PARTITION_LOCK_ID,))
+        cursor.execute("SELECT ensure_patient_partitions(NULL, %s)", (months_ahead,))
+        created = cursor.fetchone()[0]
+        archived = 0
+        if archive_after > 0:
+            cursor.execute("SELECT archive_patient_partitions(%s)", (archive_after,))
+            archived = cursor.fetchone()[0]
+        conn.commit()
+    except psycopg2.Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    logger.info("Patient partitions maintained", extra={'partitions_created': created, 'partitions_archived': archived})
+    return created, archived
+
+
+def run_partition_maintenance():
+    """Connect, maintain the patient partitions and close; returns False if that failed"""
+    conn = None
+    try:
+        conn = connect()
+        maintain_partitions(conn)
+        return True
+    except psycopg2.Error:
+        logger.exception("Patient partition maintenance failed")
+        return False
+    finally:
+        if conn and not conn.closed:
+            conn.close()
@@ -8,37 +8,43 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from config import DB_CONFIG  # fallback when DATABASE_URL is not provided
+from database.migrate import connect, apply_migrations
+from utils.log import configure_logging
 
+# Dropped by --reset before the migrations rebuild the schema
+RESET_TABLES = [
+    'hypertension_patients', 'arthritis_patients', 'migraine_patients', 'phase1_patients',
+    'users', 'applications', 'upload_jobs', 'upload_job_results', 'analytics_daily', 'analytics_daily_delta', 'schema_migrations'
+]
 
-def apply_schema():
+
+def apply_schema(reset=False):
+    """
+    Bring the database schema up to date by applying pending migrations from
+    database/migrations. With reset=True, drop all application tables first
+    for a clean slate (destroys data).
+    """
     
     conn = None
     cursor = None
 
     try:
-        schema_path = os.path.join(os.path.dirname(__file__), 'schema.sql')
-        if not os.path.exists(schema_path):
-            print(f" Schema file not found at {schema_path}")
-            return False
-
-        print(f"📖 Reading schema from {schema_path}...")
-        with open(schema_path, 'r', encoding='utf-8') as f:
-            schema_sql = f.read()
-
         db_url = os.getenv('DATABASE_URL')
         if db_url:
             print(" Connecting using DATABASE_URL (Render/managed Postgres)...")
-            conn = psycopg2.connect(db_url)
         else:
             print(" DATABASE_URL not set. Connecting using DB_CONFIG (local fallback)...")
-            # DB_CONFIG must include 'dbname'
-            conn = psycopg2.connect(**DB_CONFIG)
+        conn = connect()
 
         cursor = conn.cursor()
-        print(" Applying schema to the connected database...")
-        cursor.execute(schema_sql)
-        conn.commit()
+        if reset:
+            print("🧹 Dropping existing tables for a clean slate...")
+            cursor.execute(f"DROP TABLE IF EXISTS {', '.join(RESET_TABLES)} CASCADE")
+            cursor.execute("DROP SCHEMA IF EXISTS archive CASCADE")
+            conn.commit()
+
+        print(" Applying migrations to the connected database...")
+        apply_migrations(conn)
         print("✅ Schema applied successfully!")
 
         # Optional: list created tables
@@ -46,7 +52,6 @@ def apply_schema():
         tables = [r[0] for r in cursor.fetchall()]
         print(f" Tables present: {tables}")
         return True
-
     except OperationalError as e:
         print("❌ Connection Error: Could not connect to PostgreSQL.")
         print(f"   Details: {e}")
@@ -70,7 +75,9 @@ def apply_schema():
 
 
 if __name__ == '__main__':
-    success = apply_schema()
+    # Migration progress and warnings are log records
+    configure_logging()
+    success = apply_schema(reset='--reset' in sys.argv[1:])
     if success:
         print("\n Schema setup complete.")
     else:
@@ -1,4 +1,5 @@
 from flask import jsonify
+from utils.passwords import HashingOverloaded
 
 def register_error_handlers(app):
     """Register global error handlers"""
@@ -7,6 +8,11 @@ def register_error_handlers(app):
     def not_found(error):
         return jsonify({"error": "Endpoint not found"}), 404
 
+    @app.errorhandler(HashingOverloaded)
+    def hashing_overloaded(error):
+        # Shed login/register bursts instead of queueing them behind the hash pool
+        return jsonify({"error": "Too many authentication requests, please retry shortly"}), 429, {"Retry-After": "1"}
+
     @app.errorhandler(500)
     def internal_error(error):
         return jsonify({"error": "Internal server error"}), 500
@@ -0,0 +1,56 @@
+import gc
+import os
+import shutil
+
+# Workers write their Prometheus metrics here so /metrics can aggregate them.
+# Must be set before the app (and prometheus_client) is imported.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join('/tmp', f"prometheus_multiproc_{os.getenv('PORT', '5000')}"))
+
+# Mirrors the Render start command; flags passed on the command line still win
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))  # also budgets SCORING_PROCESSES (config.py)
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+
+# Import the app (and unpickle the models) once in the master. Workers are
+# forked afterwards and share the model memory copy-on-write.
+preload_app = True
+
+
+def on_starting(server):
+    # Start every deploy with empty metrics instead of the last run's files
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def when_ready(server):
+    # Workers must not inherit pooled sockets from the master; close its pool
+    # if anything used one while the app was loading
+    from utils.db import close_pool
+    close_pool()
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of the collector's generations so
+    # gc passes in the workers do not touch (and copy) the shared model pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Resume background upload jobs left queued or abandoned by a previous worker
+    from utils.upload_jobs import ensure_workers
+    ensure_workers()
+    # Start this worker's password hashing processes before the first login
+    from utils.passwords import start_hashing_pool
+    start_hashing_pool()
+    # Start this worker's scoring processes (SCORING_PROCESSES) before traffic arrives
+    from models.ml_models import REGISTRY
+    if REGISTRY.pool is not None:
+        REGISTRY.pool.start()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
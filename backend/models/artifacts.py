@@ -0,0 +1,227 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+from datetime import datetime, timezone
+import numpy as np
+import sklearn
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+try:
+    import xgboost
+    from xgboost import XGBClassifier
+except ImportError:  # xgboost is only needed for the phase1 model
+    xgboost = None
+    XGBClassifier = None
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the manifest layout changes; older loaders refuse newer artifacts
+FORMAT_VERSION = 1
+
+# Alignment of the array buffers inside an sklearn payload
+BUFFER_ALIGNMENT = 64
+
+
+class ArtifactError(Exception):
+    """A model artifact is missing, corrupt, or does not match the code loading it"""
+
+
+def manifest_path(model_path):
+    """Manifest location for a configured model path, e.g. phase1_model.pkl -> phase1_model.manifest.json"""
+    return os.path.splitext(model_path)[0] + '.manifest.json'
+
+
+def write_artifact(model_name, model, model_path, spec, source_checksum=None):
+    """
+    Save a fitted model in the native artifact format next to its pickle.
+
+    XGBoost classifiers are saved with Booster.save_model as UBJSON, which any
+    later xgboost can read. sklearn pipelines have no native format; they are
+    pickled with protocol 5 and their numpy arrays written out-of-band as
+    aligned sections of the same file. The manifest records the feature order,
+    converters, encoder categories, the payload's sections and its SHA-256.
+
+    The format is for integrity and versioning (a checked feature contract and
+    checksum, no xgboost pickle), not speed or memory: loading takes about as
+    long as the pickle, and estimators copy their arrays on unpickling.
+
+    Args:
+        model_name (str): Trial the model scores
+        model: Fitted sklearn Pipeline or XGBClassifier
+        model_path (str): Configured model path; the artifact is written beside it
+        spec (list): FEATURE_SPECS entry for the trial
+        source_checksum (str): SHA-256 of the pickle the model was read from
+
+    Returns:
+        str: Path of the written manifest
+    """
+    base = os.path.splitext(model_path)[0]
+    sections = None
+    if XGBClassifier is not None and isinstance(model, XGBClassifier):
+        # xgboost picks the format from the extension, so keep .ubj on the temp file
+        kind, payload, tmp = 'xgboost', base + '.ubj', base + '.tmp.ubj'
+        model.save_model(tmp)
+    else:
+        kind, payload, tmp = 'sklearn', base + '.sklearn', base + '.tmp.sklearn'
+        sections = _write_buffers(model, tmp)
+    os.replace(tmp, payload)
+
+    manifest = {
+        'format': FORMAT_VERSION,
+        'model': model_name,
+        'kind': kind,
+        'model_type': type(model).__name__,
+        'payload': os.path.basename(payload),
+        'sha256': _sha256_file(payload),
+        'size': os.path.getsize(payload),
+        'sections': sections,
+        'source_sha256': source_checksum,
+        'features': _describe_features(spec),
+        'model_columns': [str(c) for c in getattr(model, 'feature_names_in_', [])],
+        'classes': np.asarray(getattr(model, 'classes_', [])).tolist(),
+        'encoders': _describe_encoders(model),
+        'libraries': _library_versions(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+    }
+    path = manifest_path(model_path)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    # The manifest goes last: a reader never sees it before the payload it describes
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def load_artifact(model_name, model_path, spec):
+    """
+    Load a model from its native artifact, verifying it first.
+
+    The payload is checked against the manifest's SHA-256. The source pickle
+    is only hashed when it was modified after the manifest was written, i.e.
+    when it may have been replaced without reconverting.
+
+    Args:
+        model_name (str): Trial the model scores
+        model_path (str): Configured model path the artifact was written beside
+        spec (list): FEATURE_SPECS entry the model must have been saved with
+
+    Returns:
+        tuple: (model, payload SHA-256)
+
+    Raises:
+        ArtifactError: If the manifest or payload is missing or corrupt, was
+            written for different features than the code now expects, or was
+            converted from a different pickle than the one now at model_path
+    """
+    path = manifest_path(model_path)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ArtifactError(f"Unreadable manifest {path}: {e}")
+
+    if manifest.get('format') != FORMAT_VERSION:
+        raise ArtifactError(f"Unsupported artifact format {manifest.get('format')} in {path}")
+    if manifest.get('model') != model_name:
+        raise ArtifactError(f"Artifact {path} is for model {manifest.get('model')}, not {model_name}")
+    if spec and manifest.get('features') != _describe_features(spec):
+        raise ArtifactError(f"Artifact {path} was saved for different features than FEATURE_SPECS['{model_name}']")
+    if manifest.get('source_sha256') and _modified_after(model_path, path) and \
+            _sha256_file(model_path) != manifest['source_sha256']:
+        raise ArtifactError(f"Artifact {path} is older than {model_path}; run scripts/convert_models.py")
+
+    payload = os.path.join(os.path.dirname(path), manifest['payload'])
+    try:
+        data = _read_file(payload)
+    except OSError as e:
+        raise ArtifactError(f"Unreadable artifact payload {payload}: {e}")
+    checksum = hashlib.sha256(data).hexdigest()
+    if checksum != manifest.get('sha256'):
+        raise ArtifactError(f"Checksum mismatch for {payload}: expected {manifest.get('sha256')}, got {checksum}")
+
+    if manifest['kind'] == 'xgboost':
+        if XGBClassifier is None:
+            raise ArtifactError("xgboost is not installed")
+        model = XGBClassifier()
+        model.load_model(bytearray(data))
+    elif manifest['kind'] == 'sklearn':
+        saved = manifest.get('libraries', {}).get('sklearn')
+        if saved != sklearn.__version__:
+            # The estimator objects are still pickled; the model may load fine
+            logger.warning("Model artifact saved with another scikit-learn version",
+                           extra={'model': model_name, 'saved': saved, 'installed': sklearn.__version__})
+        view = memoryview(data)
+        (start, length), *buffers = manifest['sections']
+        model = pickle.loads(view[start:start + length], buffers=[view[o:o + n] for o, n in buffers])
+    else:
+        raise ArtifactError(f"Unknown artifact kind {manifest['kind']} in {path}")
+
+    columns = [str(c) for c in getattr(model, 'feature_names_in_', [])]
+    if columns != manifest.get('model_columns'):
+        raise ArtifactError(f"Model columns in {payload} do not match its manifest")
+    return model, checksum
+
+
+def _write_buffers(model, path):
+    """
+    Pickle model to path with its array buffers out-of-band, each starting on a
+    BUFFER_ALIGNMENT boundary.
+
+    Returns:
+        list: [offset, length] of the pickle stream followed by every buffer
+    """
+    buffers = []
+    stream = pickle.dumps(model, protocol=5, buffer_callback=buffers.append)
+    sections = []
+    with open(path, 'wb') as f:
+        for data in [memoryview(stream)] + [buffer.raw() for buffer in buffers]:
+            f.write(b'\0' * (-f.tell() % BUFFER_ALIGNMENT))
+            sections.append([f.tell(), data.nbytes])
+            f.write(data)
+    return sections
+
+
+def _describe_features(spec):
+    """Model column, filtered feature and converter name of every input, in model order"""
+    return [{'column': column, 'feature': feature, 'dtype': getattr(convert, '__name__', str(convert))}
+            for column, feature, convert in spec or []]
+
+
+def _describe_encoders(model):
+    """Categories of every fitted OneHotEncoder in a pipeline, by input column"""
+    encoders = {}
+    if not isinstance(model, Pipeline) or not hasattr(model.steps[0][1], 'transformers_'):
+        return encoders
+    for _, step, columns in model.steps[0][1].transformers_:
+        if isinstance(step, Pipeline):
+            step = step.steps[-1][1]
+        if isinstance(step, OneHotEncoder):
+            for column, categories in zip(columns, step.categories_):
+                encoders[str(column)] = np.asarray(categories).tolist()
+    return encoders
+
+
+def _library_versions():
+    versions = {'numpy': np.__version__, 'sklearn': sklearn.__version__}
+    if xgboost is not None:
+        versions['xgboost'] = xgboost.__version__
+    return versions
+
+
+def _modified_after(path, other):
+    """Whether path exists and was modified after other"""
+    try:
+        return os.stat(path).st_mtime_ns > os.stat(other).st_mtime_ns
+    except OSError:
+        return False
+
+
+def _read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _sha256_file(path):
+    return hashlib.sha256(_read_file(path)).hexdigest()
@@ -0,0 +1,209 @@
+import threading
+import numpy as np
+import scipy.sparse as sp
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+try:
+    from xgboost import XGBClassifier
+except ImportError:  # xgboost is only needed for the phase1 model
+    XGBClassifier = None
+
+
+class UnsupportedModel(Exception):
+    """The model contains a step the fast path cannot reproduce exactly"""
+
+
+class FastScorer:
+    """
+    Low-latency scorer for a single record.
+
+    The fitted preprocessing (StandardScaler/OneHotEncoder inside a
+    ColumnTransformer) is compiled to plain numpy operations writing into a
+    per-thread preallocated row, and the final estimator is called on that
+    array directly. XGBoost models go through the booster's inplace_predict.
+    This skips DataFrame construction and sklearn's input validation, which
+    dominate the cost of scoring one patient.
+    """
+
+    def __init__(self, model, columns):
+        """
+        Args:
+            model: Fitted sklearn Pipeline or XGBClassifier
+            columns (list): Model input column names, in the order values are passed to predict()
+
+        Raises:
+            UnsupportedModel: If the model cannot be compiled
+        """
+        self.columns = list(columns)
+        self._local = threading.local()
+
+        if XGBClassifier is not None and isinstance(model, XGBClassifier):
+            self._compile_xgboost(model)
+        elif isinstance(model, Pipeline) and len(model.steps) == 2 and isinstance(model.steps[0][1], ColumnTransformer):
+            self._compile_pipeline(model)
+        else:
+            raise UnsupportedModel(f"Unsupported model type: {type(model).__name__}")
+
+    def predict(self, values):
+        """Return the predicted class for one record given its values in column order"""
+        row = self._row()
+        for op in self._ops:
+            op(values, row)
+        return self._predict(row)
+
+    def _row(self):
+        row = getattr(self._local, 'row', None)
+        if row is None:
+            row = self._local.row = np.zeros((1, self.width), dtype=np.float64)
+        return row
+
+    def _index(self, names):
+        positions = {name: i for i, name in enumerate(self.columns)}
+        try:
+            return [positions[name] for name in names]
+        except KeyError as e:
+            raise UnsupportedModel(f"Model column {e} is not provided")
+
+    # --- XGBoost ---
+
+    def _compile_xgboost(self, model):
+        objective = model.get_xgb_params().get('objective')
+        if objective != 'binary:logistic':
+            raise UnsupportedModel(f"Unsupported XGBoost objective: {objective}")
+        names = list(getattr(model, 'feature_names_in_', self.columns))
+        self.width = len(names)
+        positions = self._index(names)
+        booster = model.get_booster()
+        classes = np.asarray(model.classes_)
+
+        def fill(values, row):
+            for out, i in enumerate(positions):
+                row[0, out] = values[i]
+        self._ops = [fill]
+
+        def predict(row):
+            proba = booster.inplace_predict(row, validate_features=False)
+            return classes[int(np.ravel(proba)[0] > 0.5)]
+        self._predict = predict
+
+    # --- sklearn Pipeline(ColumnTransformer, estimator) ---
+
+    def _compile_pipeline(self, model):
+        transformer = model.steps[0][1]
+        estimator = model.steps[1][1]
+        input_names = list(transformer.feature_names_in_)
+
+        self._ops = []
+        offset = 0
+        for name, step, cols in transformer.transformers_:
+            if step == 'drop' or len(cols) == 0:
+                continue
+            names = [input_names[c] if isinstance(c, (int, np.integer)) else c for c in cols]
+            positions = self._index(names)
+
+            if isinstance(step, Pipeline):
+                if len(step.steps) != 1:
+                    raise UnsupportedModel(f"Unsupported transformer pipeline in '{name}'")
+                step = step.steps[0][1]
+
+            if step == 'passthrough':
+                self._ops.append(self._scale_op(positions, offset, None, None))
+                offset += len(positions)
+            elif isinstance(step, StandardScaler):
+                mean = step.mean_ if step.with_mean else None
+                scale = step.scale_ if step.with_std else None
+                self._ops.append(self._scale_op(positions, offset, mean, scale))
+                offset += len(positions)
+            elif isinstance(step, OneHotEncoder):
+                op, width = self._onehot_op(step, positions, offset)
+                self._ops.append(op)
+                offset += width
+            else:
+                raise UnsupportedModel(f"Unsupported transformer '{name}': {type(step).__name__}")
+
+        self.width = offset
+        sparse = transformer.sparse_output_
+
+        if isinstance(estimator, RandomForestClassifier):
+            self._predict = self._forest_predict(estimator, sparse)
+        else:
+            def predict(row):
+                return estimator.predict(sp.csr_matrix(row) if sparse else row)[0]
+            self._predict = predict
+
+    @staticmethod
+    def _scale_op(positions, offset, mean, scale):
+        end = offset + len(positions)
+
+        def scale_values(values, row):
+            # float() matches check_array's conversion of object columns, e.g. '1' -> 1.0
+            out = row[0, offset:end]
+            out[:] = [float(values[i]) for i in positions]
+            if mean is not None:
+                out -= mean
+            if scale is not None:
+                out /= scale
+        return scale_values
+
+    @staticmethod
+    def _onehot_op(encoder, positions, offset):
+        if getattr(encoder, '_infrequent_enabled', False):
+            raise UnsupportedModel("OneHotEncoder with infrequent categories")
+        ignore_unknown = encoder.handle_unknown != 'error'
+        drop_idx = encoder.drop_idx_ if encoder.drop_idx_ is not None else [None] * len(positions)
+
+        # Per input feature: (value -> output slot, first slot, slot count)
+        features = []
+        start = offset
+        for categories, dropped in zip(encoder.categories_, drop_idx):
+            slots = {}
+            slot = start
+            for j, category in enumerate(categories):
+                if dropped is not None and j == dropped:
+                    continue
+                slots[category] = slot
+                slot += 1
+            if dropped is not None:
+                slots[categories[dropped]] = None
+            features.append((slots, start, slot - start))
+            start = slot
+
+        def encode(values, row):
+            for i, (slots, first, count) in zip(positions, features):
+                row[0, first:first + count] = 0.0
+                value = values[i]
+                if value not in slots:
+                    if ignore_unknown:
+                        continue
+                    raise ValueError(f"Found unknown category {value!r} during transform")
+                slot = slots[value]
+                if slot is not None:
+                    row[0, slot] = 1.0
+        return encode, start - offset
+
+    @staticmethod
+    def _forest_predict(forest, sparse):
+        # Averages the trees sequentially instead of through joblib, which
+        # costs far more than the trees themselves for a single row. Each tree
+        # is evaluated on its low-level tree_ and normalized the same way
+        # DecisionTreeClassifier.predict_proba does.
+        if forest.n_outputs_ != 1:
+            raise UnsupportedModel("Multi-output random forest")
+        trees = [tree.tree_ for tree in forest.estimators_]
+        n_classes = forest.n_classes_
+        classes = forest.classes_
+
+        def predict(row):
+            X = row.astype(np.float32)
+            if sparse:
+                X = sp.csr_matrix(X)
+            total = np.zeros(n_classes)
+            for tree in trees:
+                proba = tree.predict(X)[0, :n_classes]
+                normalizer = proba.sum()
+                total += proba / (normalizer if normalizer != 0.0 else 1.0)
+            return classes[int(np.argmax(total))]
+        return predict
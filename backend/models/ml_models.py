@@ -1,141 +1,593 @@
+import hashlib
+import logging
 import pickle
 import os
-import traceback
+import threading
+import time
+from datetime import datetime, timezone
+import numpy as np
 import pandas as pd
-from config import MODEL_PATHS
-from utils.feature_filter import filter_features_for_model
+from config import (
+    MODEL_PATHS, MODEL_ARTIFACTS, MODEL_RELOAD_CHECK_SECONDS, SCORING_CHUNK_SIZE, FAST_SCORING, PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL,
+    SCORING_PROCESSES, SCORING_PROCESS_THREADS, SCORING_PROCESS_MIN_ROWS, WEB_CONCURRENCY
+)
+from models.artifacts import load_artifact, manifest_path
+from models.fast_scorer import FastScorer, UnsupportedModel
+from models.prediction_cache import PredictionCache
+from models.scoring_pool import ScoringPool
+from utils.feature_filter import filter_features_for_model, filter_feature_frame, get_feature_pipeline
+from utils.metrics import stage, record_inference
 
-MODELS = {}
+logger = logging.getLogger(__name__)
 
-def load_models():
-    """Load all ML models on startup"""
-    global MODELS
-    for model_name, path in MODEL_PATHS.items():
-        if os.path.exists(path):
+COHORT_MAPPING = {
+    'placebo': 0, 'dose_1': 1, 'dose_2': 2, 'dose_3': 3,
+    'treatment': 1, 'control': 0, 'dose1': 1, 'dose2': 2, 'dose3': 3
+}
+
+
+def _encode_sex(value):
+    """Encode sex as 1 for female, 0 otherwise"""
+    return 1 if str(value).upper() in ['F', 'FEMALE', '1'] else 0
+
+
+def _encode_cohort(value):
+    """Encode a numeric or named cohort"""
+    try:
+        return int(float(value))
+    except (ValueError, TypeError):
+        return COHORT_MAPPING.get(str(value).lower(), 0)
+
+
+def _encode_adverse_event(value):
+    """Encode yes/no style adverse event flags"""
+    if str(value).lower() in ['yes', 'true', '1', 'y']:
+        return 1
+    try:
+        return int(float(value))
+    except (ValueError, TypeError):
+        return 0
+
+
+# Model column name, filtered feature name and converter for every model input
+FEATURE_SPECS = {
+    'hypertension': [
+        ('Age', 'age', int),
+        ('Gender', 'gender', str),
+        ('BMI', 'bmi', float),
+        ('Glucose', 'glucose', float),
+        ('Lifestyle_Risk', 'lifestyle_risk', int),
+        ('Stress_Level', 'stress_level', int),
+        ('Systolic_BP', 'systolic_bp', int),
+        ('Diastolic_BP', 'diastolic_bp', int),
+        ('Cholesterol_Total', 'cholesterol_total', float),
+        ('Comorbidities', 'comorbidities', int),
+        ('Consent', 'consent', str),
+    ],
+    'arthritis': [
+        ('Age', 'age', int),
+        ('Years_Since_Diagnosis', 'years_since_diagnosis', float),
+        ('Tender_Joint_Count', 'tender_joint_count', int),
+        ('Swollen_Joint_Count', 'swollen_joint_count', int),
+        ('CRP_Level', 'crp_level', float),
+        ('Patient_Pain_Score', 'patient_pain_score', int),
+        ('eGFR', 'egfr', float),
+        ('On_Biologic_DMARDs', 'on_biologic_dmards', int),
+        ('Has_Hepatitis', 'has_hepatitis', int),
+    ],
+    'migraine': [
+        ('Age', 'age', int),
+        ('Migraine_Frequency', 'migraine_frequency', int),
+        ('Previous_Medication_Failures', 'previous_medication_failures', int),
+        ('Liver_Enzyme_Level', 'liver_enzyme_level', float),
+        ('Has_Aura', 'has_aura', int),
+        ('Chronic_Kidney_Disease', 'chronic_kidney_disease', int),
+        ('On_Anticoagulants', 'on_anticoagulants', int),
+        ('Sleep_Disorder', 'sleep_disorder', int),
+        ('Depression', 'depression', int),
+        ('Caffeine_Intake', 'caffeine_intake', int),
+    ],
+    'phase1': [
+        ('age', 'age', float),
+        ('sex', 'sex', _encode_sex),
+        ('weight_kg', 'weight_kg', float),
+        ('height_cm', 'height_cm', float),
+        ('bmi', 'bmi', float),
+        ('cohort', 'cohort', _encode_cohort),
+        ('alt', 'alt', float),
+        ('creatinine', 'creatinine', float),
+        ('sbp', 'sbp', float),
+        ('dbp', 'dbp', float),
+        ('hr', 'hr', float),
+        ('temp_c', 'temp_c', float),
+        ('adverse_event', 'adverse_event', _encode_adverse_event),
+    ],
+}
+
+
+class LoadedModel:
+    """
+    One loaded model with its compiled fast scorer and metadata. Instances are
+    never modified; a reload builds a new one and swaps it in.
+    """
+
+    def __init__(self, name, model, path, checksum, version):
+        self.name = name
+        self.model = model
+        self.path = path
+        self.checksum = checksum
+        self.version = version
+        self.loaded_at = datetime.now(timezone.utc)
+        self.fast_scorer = _compile_fast_scorer(name, model)
+
+    def info(self):
+        return {
+            "model_name": self.name,
+            "model_type": type(self.model).__name__,
+            "version": self.version,
+            "checksum": self.checksum,
+            "path": self.path,
+            "loaded_at": self.loaded_at.isoformat(),
+            "fast_scoring": self.fast_scorer is not None
+        }
+
+
+class ModelRegistry:
+    """
+    Thread-safe registry of the trial models.
+
+    Loaded models live in a dict that is replaced as a whole on every (re)load
+    and never mutated, so a request thread that fetched an entry always sees a
+    model and fast scorer from the same file, even while another thread
+    reloads. Each entry carries a version that increases on every reload and
+    the SHA-256 checksum of the file it came from.
+
+    With artifacts=True a model is read from its verified native artifact when
+    one exists next to the configured pickle, and from the pickle otherwise.
+
+    Every check_interval seconds, get() looks for model files that changed on
+    disk since they were loaded and reloads those models. Each gunicorn worker
+    and scoring process holds its own registry, so this is how a replaced model
+    reaches all of them without signalling each one.
+
+    Predictions made through the registry are cached in its PredictionCache
+    (disabled unless one is passed); a reload invalidates the model's results.
+    With a ScoringPool, large batches are scored in worker processes.
+    """
+
+    def __init__(self, model_paths, cache=None, pool=None, artifacts=MODEL_ARTIFACTS,
+                 check_interval=MODEL_RELOAD_CHECK_SECONDS):
+        self.model_paths = dict(model_paths)
+        self.artifacts = artifacts
+        self.check_interval = check_interval
+        self.cache = cache or PredictionCache(0, 0)
+        self.pool = pool
+        self._entries = {}
+        self._errors = {}
+        self._versions = {}
+        self._stamps = {}
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._check_lock = threading.Lock()
+
+    def get(self, model_name):
+        """Return the current LoadedModel for a trial, or None if it is not loaded"""
+        self._check_files()
+        return self._entries.get(model_name)
+
+    def loaded(self):
+        """Names of the loaded models"""
+        return sorted(self._entries)
+
+    def load_all(self, strict=False):
+        """
+        Load every configured model.
+
+        Args:
+            strict (bool): Raise RuntimeError if any model fails to load
+
+        Returns:
+            int: Number of loaded models
+        """
+        for model_name in self.model_paths:
+            self.reload(model_name)
+        logger.info("Models loaded", extra={'loaded': len(self._entries), 'configured': len(self.model_paths)})
+
+        if strict and self._errors:
+            raise RuntimeError(f"Failed to load models: {self._errors}")
+        return len(self._entries)
+
+    def reload_changed(self):
+        """
+        Reload the models whose files changed on disk since they were last
+        loaded. Only one thread checks at a time; the others carry on with
+        the current models.
+
+        Returns:
+            list: Names of the reloaded models
+        """
+        if not self._check_lock.acquire(blocking=False):
+            return []
+        try:
+            self._next_check = time.monotonic() + self.check_interval
+            changed = [name for name, path in self.model_paths.items()
+                       if name in self._stamps and _file_stamp(path) != self._stamps[name]]
+            for model_name in changed:
+                logger.info("Model files changed on disk, reloading", extra={'model': model_name})
+                self.reload(model_name)
+            return changed
+        finally:
+            self._check_lock.release()
+
+    def reload(self, model_name):
+        """
+        Load (or reload) one model from disk and swap it in atomically. On
+        failure the previously loaded version, if any, stays in service.
+
+        Returns:
+            bool: True if the model was loaded
+        """
+        path = self.model_paths.get(model_name)
+        if path is None:
+            logger.error("No path configured for model", extra={'model': model_name})
+            return False
+        # Taken before reading, so a change while loading is caught by the next check;
+        # also recorded on failure, so a broken file is not retried on every check
+        self._stamps[model_name] = _file_stamp(path)
+        if not os.path.exists(path) and not (self.artifacts and os.path.exists(manifest_path(path))):
+            self._set_error(model_name, f"model file not found at {path}")
+            logger.warning("Model file not found", extra={'model': model_name, 'path': path})
+            return False
+
+        try:
+            model, checksum, path = self._read_model(model_name, path)
+        except Exception as e:
+            self._set_error(model_name, str(e))
+            logger.exception("Error loading model", extra={'model': model_name})
+            return False
+
+        with self._lock:
+            version = self._versions.get(model_name, 0) + 1
+            self._versions[model_name] = version
+            entry = LoadedModel(model_name, model, path, checksum, version)
+            self._entries = {**self._entries, model_name: entry}
+            self._errors = {k: v for k, v in self._errors.items() if k != model_name}
+        self.cache.invalidate(model_name)
+        logger.info("Model loaded", extra={'model': model_name, 'version': version, 'sha256': checksum[:12]})
+        return True
+
+    def status(self):
+        """Readiness of the configured models for health checks"""
+        self._check_files()
+        entries = self._entries
+        return {
+            "ready": all(name in entries for name in self.model_paths),
+            "loaded": sorted(entries),
+            "errors": dict(self._errors),
+            "versions": {name: entry.version for name, entry in entries.items()},
+            "prediction_cache": self.cache.stats(),
+            "scoring_pool": self.pool.stats() if self.pool else None
+        }
+
+    def info(self):
+        """Metadata of every loaded model"""
+        self._check_files()
+        return {name: entry.info() for name, entry in sorted(self._entries.items())}
+
+    def _check_files(self):
+        if self.check_interval > 0 and self._stamps and time.monotonic() >= self._next_check:
+            self.reload_changed()
+
+    def _read_model(self, model_name, path):
+        """
+        Read a model from its native artifact or its pickle.
+
+        Returns:
+            tuple: (model, SHA-256 checksum, path of the file actually loaded)
+        """
+        if self.artifacts and os.path.exists(manifest_path(path)):
             try:
-                with open(path, 'rb') as f:
-                    MODELS[model_name] = pickle.load(f)
-                print(f"✓ Loaded {model_name} model successfully")
+                model, checksum = load_artifact(model_name, path, FEATURE_SPECS.get(model_name))
+                return model, checksum, manifest_path(path)
             except Exception as e:
-                print(f"❌ Error loading {model_name}: {e}")
-        else:
-            print(f"⚠ Warning: {model_name} model file not found at {path}")
-    print(f"📊 Total models loaded: {len(MODELS)}")
-    return len(MODELS)
+                if not os.path.exists(path):
+                    raise
+                logger.warning("Model artifact unusable, loading pickle", extra={'model': model_name, 'error': str(e)})
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        return pickle.loads(data), hashlib.sha256(data).hexdigest(), path
+
+    def _set_error(self, model_name, message):
+        with self._lock:
+            self._errors = {**self._errors, model_name: message}
+
+
+REGISTRY = ModelRegistry(
+    MODEL_PATHS,
+    PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL),
+    ScoringPool(MODEL_PATHS, SCORING_PROCESSES, SCORING_PROCESS_THREADS, SCORING_PROCESS_MIN_ROWS, WEB_CONCURRENCY)
+    if SCORING_PROCESSES > 0 else None
+)
+
+
+def _file_stamp(path):
+    """Modification time and size of a model's pickle and artifact manifest"""
+    stamp = []
+    for candidate in (path, manifest_path(path)):
+        try:
+            info = os.stat(candidate)
+            stamp.append((info.st_mtime_ns, info.st_size))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
 
+def load_models(strict=False):
+    """
+    Load all ML models on startup.
+    With strict=True, raise RuntimeError if any configured model fails to load.
+    """
+    return REGISTRY.load_all(strict=strict)
 
-def predict_eligibility(model_name, features):
+
+def reload_model(model_name):
+    """Reload one model from disk without interrupting requests using the old one"""
+    return REGISTRY.reload(model_name)
+
+
+def get_loaded_models():
+    """Names of the loaded models"""
+    return REGISTRY.loaded()
+
+
+def _compile_fast_scorer(model_name, model):
+    """Build the single-record FastScorer for a model, or None if it cannot be compiled"""
+    spec = FEATURE_SPECS.get(model_name)
+    if not spec:
+        return None
+    try:
+        return FastScorer(model, [column for column, _, _ in spec])
+    except UnsupportedModel as e:
+        logger.warning("Fast scoring unavailable", extra={'model': model_name, 'reason': str(e)})
+        return None
+
+
+def model_status():
+    """Readiness of the configured models for health checks"""
+    return REGISTRY.status()
+
+
+def model_info():
+    """Version, checksum and load time of every loaded model"""
+    return REGISTRY.info()
+
+
+def predict_eligibility(model_name, features, registry=REGISTRY):
     """Predict eligibility using the specified model with proper column names and data types"""
-    if model_name not in MODELS:
-        print(f"❌ Model {model_name} not found in loaded models")
+    entry = registry.get(model_name)
+    if entry is None:
+        logger.error("Model not loaded", extra={'model': model_name})
         return 'Ineligible'
 
     try:
         # Filter features to only include what the model expects
-        filtered_features = filter_features_for_model(features, model_name)
-
-        print(f"🔍 Original features count: {len(features)}")
-        print(f"🔍 Filtered features count: {len(filtered_features)}")
-        print(f"🔍 Filtered features: {list(filtered_features.keys())}")
+        with stage('filter'):
+            filtered_features = filter_features_for_model(features, model_name)
 
         # Create DataFrame with model-specific column names and data types
-        if model_name == 'hypertension':
-            feature_df = pd.DataFrame([{
-                'Age': int(filtered_features['age']),
-                'Gender': str(filtered_features['gender']),
-                'BMI': float(filtered_features['bmi']),
-                'Glucose': float(filtered_features['glucose']),
-                'Lifestyle_Risk': int(filtered_features['lifestyle_risk']),
-                'Stress_Level': int(filtered_features['stress_level']),
-                'Systolic_BP': int(filtered_features['systolic_bp']),
-                'Diastolic_BP': int(filtered_features['diastolic_bp']),
-                'Cholesterol_Total': float(filtered_features['cholesterol_total']),
-                'Comorbidities': int(filtered_features['comorbidities']),
-                'Consent': str(filtered_features['consent'])
-            }])
-
-        elif model_name == 'arthritis':
-            feature_df = pd.DataFrame([{
-                'Age': int(filtered_features['age']),
-                'Years_Since_Diagnosis': float(filtered_features['years_since_diagnosis']),
-                'Tender_Joint_Count': int(filtered_features['tender_joint_count']),
-                'Swollen_Joint_Count': int(filtered_features['swollen_joint_count']),
-                'CRP_Level': float(filtered_features['crp_level']),
-                'Patient_Pain_Score': int(filtered_features['patient_pain_score']),
-                'eGFR': float(filtered_features['egfr']),
-                'On_Biologic_DMARDs': int(filtered_features['on_biologic_dmards']),
-                'Has_Hepatitis': int(filtered_features['has_hepatitis'])
-            }])
-
-        elif model_name == 'migraine':
-            feature_df = pd.DataFrame([{
-                'Age': int(filtered_features['age']),
-                'Migraine_Frequency': int(filtered_features['migraine_frequency']),
-                'Previous_Medication_Failures': int(filtered_features['previous_medication_failures']),
-                'Liver_Enzyme_Level': float(filtered_features['liver_enzyme_level']),
-                'Has_Aura': int(filtered_features['has_aura']),
-                'Chronic_Kidney_Disease': int(filtered_features['chronic_kidney_disease']),
-                'On_Anticoagulants': int(filtered_features['on_anticoagulants']),
-                'Sleep_Disorder': int(filtered_features['sleep_disorder']),
-                'Depression': int(filtered_features['depression']),
-                'Caffeine_Intake': int(filtered_features['caffeine_intake'])
-            }])
-
-        elif model_name == 'phase1':
-            # Encode categorical variables
-            sex_value = str(filtered_features['sex']).upper()
-            sex_numeric = 1 if sex_value in ['F', 'FEMALE', '1'] else 0
-
-            cohort_value = str(filtered_features['cohort']).lower()
-            cohort_mapping = {
-                'placebo': 0, 'dose_1': 1, 'dose_2': 2, 'dose_3': 3,
-                'treatment': 1, 'control': 0, 'dose1': 1, 'dose2': 2, 'dose3': 3
-            }
-            try:
-                cohort_numeric = int(float(filtered_features['cohort']))
-            except (ValueError, TypeError):
-                cohort_numeric = cohort_mapping.get(cohort_value, 0)
-
-            adverse_value = str(filtered_features['adverse_event']).lower()
-            if adverse_value in ['yes', 'true', '1', 'y']:
-                adverse_numeric = 1
-            else:
-                try:
-                    adverse_numeric = int(float(filtered_features['adverse_event']))
-                except (ValueError, TypeError):
-                    adverse_numeric = 0
-
-            feature_df = pd.DataFrame([{
-                'age': float(filtered_features['age']),
-                'sex': sex_numeric,
-                'weight_kg': float(filtered_features['weight_kg']),
-                'height_cm': float(filtered_features['height_cm']),
-                'bmi': float(filtered_features['bmi']),
-                'cohort': cohort_numeric,
-                'alt': float(filtered_features['alt']),
-                'creatinine': float(filtered_features['creatinine']),
-                'sbp': float(filtered_features['sbp']),
-                'dbp': float(filtered_features['dbp']),
-                'hr': float(filtered_features['hr']),
-                'temp_c': float(filtered_features['temp_c']),
-                'adverse_event': adverse_numeric
-            }])
-
+        spec = FEATURE_SPECS.get(model_name)
+        cache_key = None
+        if spec:
+            values = [convert(filtered_features[feature]) for _, feature, convert in spec]
+            cache_key = (model_name, entry.version, tuple(values))
+            cached = registry.cache.get(cache_key)
+            if cached is not None:
+                logger.debug("Cached prediction for %s: %s", model_name, cached)
+                return cached
+            feature_df = pd.DataFrame([{column: value for (column, _, _), value in zip(spec, values)}])
         else:
             feature_df = pd.DataFrame([filtered_features])
 
-        print(f"🔍 DataFrame columns: {feature_df.columns.tolist()}")
-        print(f"🔍 DataFrame dtypes: {feature_df.dtypes.to_dict()}")
-        print(f"🔍 DataFrame values: {feature_df.values.tolist()}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Model input", extra={
+                'model': model_name,
+                'input_features': len(features),
+                'dtypes': {column: str(dtype) for column, dtype in feature_df.dtypes.items()},
+                'values': feature_df.values.tolist(),
+            })
 
-        model = MODELS[model_name]
-        prediction = model.predict(feature_df)[0]
+        with stage('predict'):
+            prediction = entry.model.predict(feature_df)[0]
+        record_inference(model_name, 'single')
         result = 'Eligible' if prediction == 1 else 'Ineligible'
+        if cache_key is not None:
+            registry.cache.put(cache_key, result)
 
-        print(f"✓ Prediction for {model_name}: {result}")
+        logger.debug("Prediction for %s: %s", model_name, result)
         return result
 
+    except Exception:
+        logger.exception("Prediction error", extra={'model': model_name})
+        return 'Ineligible'
+
+
+def predict_eligibility_fast(model_name, features, registry=REGISTRY):
+    """
+    Low-latency variant of predict_eligibility for one record. Uses the model's
+    compiled FastScorer and falls back to predict_eligibility when none exists
+    or FAST_SCORING is disabled.
+    """
+    entry = registry.get(model_name)
+    scorer = entry.fast_scorer if entry is not None and FAST_SCORING else None
+    if scorer is None:
+        return predict_eligibility(model_name, features, registry)
+
+    try:
+        with stage('filter'):
+            filtered_features = get_feature_pipeline(model_name).filter(features)
+        values = [convert(filtered_features[feature]) for _, feature, convert in FEATURE_SPECS[model_name]]
+        cache_key = (model_name, entry.version, tuple(values))
+        result = registry.cache.get(cache_key)
+        if result is None:
+            with stage('predict'):
+                result = 'Eligible' if scorer.predict(values) == 1 else 'Ineligible'
+            record_inference(model_name, 'fast')
+            registry.cache.put(cache_key, result)
+        return result
     except Exception as e:
-        print(f"❌ Prediction error for {model_name}: {e}")
-        traceback.print_exc()
+        logger.warning("Prediction error", extra={'model': model_name, 'error': str(e)})
         return 'Ineligible'
+
+
+def predict_eligibility_batch(model_name, records, chunk_size=SCORING_CHUNK_SIZE, registry=REGISTRY):
+    """
+    Predict eligibility for every row of a DataFrame.
+
+    Features are filtered and converted column-wise and the model is called once
+    per chunk. Each row gets the same result predict_eligibility would give for
+    that row's dict, including 'Ineligible' for rows that fail to convert or score.
+    All chunks are scored with the model version current when the call started.
+    """
+    entry = registry.get(model_name)
+    if entry is None:
+        logger.error("Model not loaded", extra={'model': model_name})
+        return ['Ineligible'] * len(records)
+
+    results = []
+    for start in range(0, len(records), chunk_size):
+        chunk = records.iloc[start:start + chunk_size]
+        try:
+            results.extend(_predict_chunk(entry, chunk, registry.cache, registry.pool))
+        except Exception:
+            logger.exception("Batch prediction error", extra={'model': model_name, 'rows': len(chunk)})
+            results.extend(['Ineligible'] * len(chunk))
+    return results
+
+
+def _predict_chunk(entry, chunk, cache, pool=None):
+    """
+    Score one chunk of rows, returning 'Eligible'/'Ineligible' per row. Rows
+    with a cached result skip the model; the rest are scored in one call, or
+    split across the scoring pool's processes when one is given.
+    """
+    with stage('filter'):
+        filtered = filter_feature_frame(chunk, entry.name)
+    feature_df, failed = _build_feature_batch(entry.name, filtered)
+
+    eligible = np.zeros(len(feature_df), dtype=bool)
+    scorable = ~failed
+    keys = None
+    if cache.enabled and scorable.any():
+        positions = np.flatnonzero(scorable)
+        keys = [(entry.name, entry.version, values)
+                for values in feature_df.iloc[positions].itertuples(index=False, name=None)]
+        cached = cache.get_many(keys)
+        hits = np.array([result is not None for result in cached])
+        eligible[positions[hits]] = [result == 'Eligible' for result, hit in zip(cached, hits) if hit]
+        scorable[positions[hits]] = False
+        keys = [key for key, hit in zip(keys, hits) if not hit]
+
+    rejected_rows = 0
+    if scorable.any():
+        rows = feature_df[scorable]
+        with stage('predict'):
+            scored = pool.score(entry, rows) if pool is not None and pool.accepts(len(rows)) else None
+            predicted, rejected = scored if scored is not None else _score_rows(entry.model, rows)
+        record_inference(entry.name, 'batch', len(rows))
+        eligible[scorable] = predicted
+        if keys is not None:
+            # Rows the model rejected are not cached
+            labels = np.where(predicted, 'Eligible', 'Ineligible').tolist()
+            cache.put_many((key, label) for key, label, bad in zip(keys, labels, rejected) if not bad)
+        rejected_rows = int(rejected.sum())
+
+    # One summary per chunk instead of a line per bad row
+    if rejected_rows or failed.any():
+        logger.warning("Rows scored Ineligible after conversion or model errors", extra={
+            'model': entry.name, 'rows': len(feature_df),
+            'unconvertible': int(failed.sum()), 'rejected': rejected_rows,
+        })
+    return np.where(eligible, 'Eligible', 'Ineligible').tolist()
+
+
+def _score_rows(model, rows):
+    """Run the model over converted rows; returns (eligible mask, rejected mask)"""
+    try:
+        return model.predict(rows) == 1, np.zeros(len(rows), dtype=bool)
+    except Exception:
+        return _predict_isolated(model, rows)
+
+
+def _build_feature_batch(model_name, filtered):
+    """Convert filtered feature columns to model columns, flagging rows that fail conversion"""
+    failed = np.zeros(len(filtered), dtype=bool)
+    columns = {}
+    for column, feature, convert in FEATURE_SPECS[model_name]:
+        values, bad = _convert_column(filtered[feature].to_numpy(), convert)
+        columns[column] = values
+        failed |= bad
+    return pd.DataFrame(columns), failed
+
+
+def _convert_column(values, convert):
+    """Apply a scalar converter to a column, vectorized for plain numeric casts"""
+    failed = np.zeros(len(values), dtype=bool)
+
+    if convert in (int, float) and values.dtype.kind in 'biuf':
+        # int()/float() of finite numbers match numpy's truncating casts
+        if values.dtype.kind != 'f' or np.isfinite(values).all():
+            return values.astype(np.int64 if convert is int else np.float64), failed
+
+    if convert is str:
+        converted = np.empty(len(values), dtype=object)
+    else:
+        converted = np.zeros(len(values), dtype=np.float64 if convert is float else np.int64)
+
+    for i, value in enumerate(values):
+        try:
+            converted[i] = convert(value)
+        except Exception:
+            failed[i] = True
+    return converted, failed
+
+
+def _predict_isolated(model, rows):
+    """
+    Fallback for a chunk the model rejected as a whole: find the rows that fail
+    on their own so only they become 'Ineligible'. Returns the eligibility mask
+    and the mask of rows the model rejected.
+    """
+    eligible = np.zeros(len(rows), dtype=bool)
+    rejected = np.zeros(len(rows), dtype=bool)
+    pending = np.ones(len(rows), dtype=bool)
+
+    # Rejections come from values the model cannot coerce, which live in the
+    # string columns; probe each distinct string combination once.
+    text_columns = list(rows.select_dtypes(include='object').columns)
+    numeric = rows.drop(columns=text_columns).to_numpy(dtype=np.float64)
+    finite = np.isfinite(numeric).all(axis=1)
+    if text_columns:
+        for positions in rows[finite].groupby(text_columns, sort=False).indices.values():
+            sample = np.flatnonzero(finite)[positions]
+            try:
+                model.predict(rows.iloc[sample[:1]])
+            except Exception:
+                pending[sample] = False
+                rejected[sample] = True
+
+    retry = pending & finite
+    if retry.any():
+        try:
+            eligible[retry] = model.predict(rows[retry]) == 1
+            pending[retry] = False
+        except Exception:
+            pass
+
+    for i in np.flatnonzero(pending):
+        try:
+            eligible[i] = model.predict(rows.iloc[[i]])[0] == 1
+        except Exception:
+            eligible[i] = False
+            rejected[i] = True
+    return eligible, rejected
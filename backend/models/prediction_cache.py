@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of eligibility results with a per-entry time to live.
+
+    Keys are (trial_type, model version, feature tuple), where the tuple holds
+    the converted model inputs in model column order, so identical patients
+    skip the model no matter how their upload spelled the columns. Including
+    the version means a reloaded model never sees results of the old one;
+    invalidate() additionally frees those entries right away.
+    """
+
+    def __init__(self, maxsize, ttl):
+        """
+        Args:
+            maxsize (int): Maximum number of cached results; 0 disables caching
+            ttl (float): Seconds a result stays valid
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0
+
+    def get(self, key):
+        """Return the cached result for key, or None"""
+        return self.get_many([key])[0]
+
+    def get_many(self, keys):
+        """Return the cached result (or None) for each key, under one lock acquisition"""
+        if not self.enabled:
+            return [None] * len(keys)
+        now = time.monotonic()
+        results = []
+        with self._lock:
+            for key in keys:
+                try:
+                    result, expires = self._entries[key]
+                except (KeyError, TypeError):
+                    # TypeError: unhashable feature value, never cached
+                    self._stats['misses'] += 1
+                    results.append(None)
+                    continue
+                if expires <= now:
+                    del self._entries[key]
+                    self._stats['expirations'] += 1
+                    self._stats['misses'] += 1
+                    results.append(None)
+                    continue
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                results.append(result)
+        return results
+
+    def put(self, key, result):
+        self.put_many([(key, result)])
+
+    def put_many(self, items):
+        """Store (key, result) pairs, evicting the least recently used entries beyond maxsize"""
+        if not self.enabled:
+            return
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, result in items:
+                try:
+                    self._entries[key] = (result, expires)
+                except TypeError:
+                    continue
+                self._entries.move_to_end(key)
+            overflow = len(self._entries) - self.maxsize
+            for _ in range(max(overflow, 0)):
+                self._entries.popitem(last=False)
+            self._stats['evictions'] += max(overflow, 0)
+
+    def invalidate(self, trial_type=None):
+        """Drop the cached results of one trial, or of every trial"""
+        with self._lock:
+            if trial_type is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                stale = [key for key in self._entries if key[0] == trial_type]
+                for key in stale:
+                    del self._entries[key]
+                removed = len(stale)
+            self._stats['invalidations'] += removed
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        stats['maxsize'] = self.maxsize
+        stats['ttl'] = self.ttl
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else None
+        return stats
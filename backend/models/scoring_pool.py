@@ -0,0 +1,192 @@
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from utils.processes import pool_context
+
+logger = logging.getLogger(__name__)
+
+# Set in each worker process by _init_worker
+_worker_registry = None
+_worker_threads = 1
+
+
+def _limit_threads(model, threads):
+    """Cap an estimator's own thread pool (xgboost n_jobs, sklearn n_jobs)"""
+    steps = [step for _, step in model.steps] if hasattr(model, 'steps') else [model]
+    for step in steps:
+        if hasattr(step, 'get_params') and 'n_jobs' in step.get_params(deep=False):
+            step.set_params(n_jobs=threads)
+
+
+def _init_worker(model_paths, threads):
+    # Runs once per worker process: load every model and cap the native
+    # thread pools so processes x threads stays within the configured cores
+    from threadpoolctl import threadpool_limits
+    from models.ml_models import ModelRegistry
+    global _worker_registry, _worker_threads
+    threadpool_limits(limits=threads)
+    _worker_threads = threads
+    _worker_registry = ModelRegistry(model_paths)
+    _worker_registry.load_all()
+    for name in _worker_registry.loaded():
+        _limit_threads(_worker_registry.get(name).model, threads)
+
+
+def _ready():
+    return os.getpid()
+
+
+def _pack(rows):
+    """
+    Copy a feature frame's numeric columns into one shared memory block. Only
+    the block name, column layout and the (few) text columns are pickled.
+
+    Returns:
+        tuple: (SharedMemory, packed description for _unpack)
+    """
+    numeric = [column for column in rows.columns if rows[column].dtype.kind in 'biuf']
+    arrays = [rows[column].to_numpy() for column in numeric]
+    shm = shared_memory.SharedMemory(create=True, size=max(sum(a.nbytes for a in arrays), 1))
+    layout = []
+    offset = 0
+    for column, array in zip(numeric, arrays):
+        np.ndarray(array.shape, array.dtype, buffer=shm.buf, offset=offset)[:] = array
+        layout.append((column, array.dtype.str, offset, len(array)))
+        offset += array.nbytes
+    text = {column: rows[column].tolist() for column in rows.columns if column not in numeric}
+    return shm, (shm.name, layout, text, list(rows.columns))
+
+
+def _unpack(packed):
+    """Rebuild the feature frame described by _pack in a worker"""
+    name, layout, text, columns = packed
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        data = {
+            column: np.ndarray((length,), np.dtype(dtype), buffer=shm.buf, offset=offset).copy()
+            for column, dtype, offset, length in layout
+        }
+    finally:
+        shm.close()
+    for column, values in text.items():
+        data[column] = pd.Series(values, dtype=object)
+    return pd.DataFrame({column: data[column] for column in columns})
+
+
+def _score_packed(model_name, checksum, packed):
+    """Worker task: score one packed frame with the model file matching checksum"""
+    from models.ml_models import _score_rows
+    entry = _worker_registry.get(model_name)
+    if entry is None or entry.checksum != checksum:
+        # The parent reloaded the model since this worker started
+        _worker_registry.reload(model_name)
+        entry = _worker_registry.get(model_name)
+        if entry is None or entry.checksum != checksum:
+            raise RuntimeError(f"Model {model_name} on disk does not match the version being scored")
+        _limit_threads(entry.model, _worker_threads)
+    return _score_rows(entry.model, _unpack(packed))
+
+
+class ScoringPool:
+    """
+    Scores batches of converted feature rows in worker processes, so an upload
+    uses several cores instead of one thread under the GIL. Workers come from
+    the forkserver (see utils.processes), load every model once at start, and
+    pin xgboost/OpenMP to `threads` threads. A batch is split into at most
+    `processes` slices of at least `min_rows` rows; results are concatenated
+    in input order.
+
+    Every web worker starts its own pool, so `processes` is capped to keep
+    web_workers x processes x threads within the CPU cores.
+    """
+
+    def __init__(self, model_paths, processes, threads, min_rows, web_workers=1):
+        self.model_paths = dict(model_paths)
+        self.threads = max(1, threads)
+        self.min_rows = max(1, min_rows)
+        self.web_workers = max(1, web_workers)
+        self.requested = processes
+        self.processes = max(1, min(processes, (os.cpu_count() or 1) // (self.web_workers * self.threads)))
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._stats = {'batches': 0, 'rows': 0, 'fallbacks': 0}
+
+    def accepts(self, rows):
+        """Whether a batch of this many rows is worth sending to the workers"""
+        return rows >= self.min_rows
+
+    def start(self):
+        """Start the worker processes now instead of on the first batch"""
+        executor = self._get_executor()
+        for future in [executor.submit(_ready) for _ in range(self.processes)]:
+            future.result()
+
+    def score(self, entry, rows):
+        """
+        Score rows with a loaded model in the worker processes.
+
+        Args:
+            entry (LoadedModel): Model being scored; workers check its checksum
+            rows (DataFrame): Converted model input, as for model.predict
+
+        Returns:
+            tuple: (eligible mask, rejected mask) as _score_rows returns, or
+                None if the pool failed and the caller should score in-process
+        """
+        slices = max(1, min(self.processes, len(rows) // self.min_rows))
+        bounds = np.linspace(0, len(rows), slices + 1).astype(int)
+        blocks = []
+        try:
+            executor = self._get_executor()
+            futures = []
+            for start, stop in zip(bounds[:-1], bounds[1:]):
+                shm, packed = _pack(rows.iloc[start:stop])
+                blocks.append(shm)
+                futures.append(executor.submit(_score_packed, entry.name, entry.checksum, packed))
+            results = [future.result() for future in futures]
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                with self._lock:
+                    self._executor = None
+            logger.exception("Process pool scoring failed, scoring in-process", extra={'model': entry.name})
+            with self._lock:
+                self._stats['fallbacks'] += 1
+            return None
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['rows'] += len(rows)
+        return np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results])
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update(processes=self.processes, threads=self.threads, min_rows=self.min_rows)
+        return stats
+
+    def _get_executor(self):
+        with self._lock:
+            # An executor inherited across a fork belongs to the parent
+            if self._executor is None or self._executor_pid != os.getpid():
+                cpus = os.cpu_count() or 1
+                if self.web_workers * self.requested * self.threads > cpus:
+                    logger.warning("Scoring processes exceed the CPU cores across web workers", extra={
+                        'requested': self.requested, 'processes': self.processes, 'threads': self.threads,
+                        'web_workers': self.web_workers, 'cpus': cpus,
+                    })
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes, mp_context=pool_context(),
+                    initializer=_init_worker, initargs=(self.model_paths, self.threads)
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
@@ -1,51 +1,47 @@
-from flask import Blueprint, jsonify, request, Response
+from flask import Blueprint, jsonify, request
 from utils.db import get_db_connection
+from utils.admin_auth import require_admin_token
+from utils.csv_export import csv_response
+from utils.pagination import encode_cursor, decode_cursor, estimated_count
+from config import USERS_EXACT_COUNT_LIMIT, MODEL_RELOAD_CHECK_SECONDS
+from models.ml_models import model_info, reload_model, model_status
 import psycopg2
 import psycopg2.extras
-import io
-import csv
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
 @admin_bp.route('/users', methods=['GET'])
 def list_users():
     """
-    Return list of users with created_at and last_login.
-    Supports filters, pagination, and CSV export.
+    Return list of users with created_at and last_login, newest first.
+    Supports filters, keyset pagination, and CSV export.
     Query params:
       - role: 'patient' (default), 'admin', or 'all'
-      - search: substring for username (case-insensitive)
-      - page: 1-based page number (default 1)
+      - search: substring for username (case-insensitive, trigram indexed)
+      - cursor: next_cursor of the previous page; omit it for the first page
       - page_size: items per page (default 20, max 100)
+      - total: 'estimate' (default; exact when small) or 'exact'
       - export: 'csv' to download CSV (ignores pagination)
+    Numbered pages (page=N) are no longer supported: their OFFSET scan grew with
+    the page number. A page>1 request gets a 400 telling the client to follow
+    next_cursor, which is null on the last page.
     """
     role = request.args.get('role', 'patient').lower()
     search = request.args.get('search', '').strip()
     export = request.args.get('export') == 'csv'
+    after = request.args.get('cursor')
+    exact_total = request.args.get('total') == 'exact'
 
     try:
-        page = int(request.args.get('page', 1))
         page_size = int(request.args.get('page_size', 20))
     except ValueError:
-        page, page_size = 1, 20
-    page = max(page, 1)
+        page_size = 20
     page_size = max(1, min(page_size, 100))
+    if request.args.get('page', '1') != '1':
+        return jsonify({'error': 'page is not supported; pass the previous response\'s next_cursor as cursor'}), 400
 
     conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-
-        # Ensure last_login column exists; if not, try to add it once.
-        try:
-            cursor.execute("SELECT 1 FROM information_schema.columns WHERE table_name='users' AND column_name='last_login'")
-            has_col = cursor.fetchone()
-            if not has_col:
-                cursor.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS last_login TIMESTAMPTZ NULL")
-                conn.commit()
-        except Exception:
-            conn.rollback()
-
         # Build WHERE clause
         where_clauses = []
         params = []
@@ -54,61 +50,69 @@ def list_users():
             params.append(role)
         # role == 'all' means no filter on user_type
         if search:
+            # Escape LIKE wildcards so the search is a literal substring
+            pattern = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
             where_clauses.append("username ILIKE %s")
-            params.append(f"%{search}%")
+            params.append(f"%{pattern}%")
         where_sql = ("WHERE " + " AND ".join(where_clauses)) if where_clauses else ""
 
-        # Count total
-        count_sql = f"SELECT COUNT(*) FROM users {where_sql}"
-        cursor.execute(count_sql, tuple(params))
-        total = int(cursor.fetchone()['count'])
-
-        # If CSV export, fetch all filtered rows
+        # CSV export streams every filtered row (ignores pagination)
         if export:
             data_sql = f"""
                 SELECT username, user_type, created_at, last_login
                 FROM users
                 {where_sql}
-                ORDER BY created_at DESC
+                ORDER BY created_at DESC, id DESC
             """
-            cursor.execute(data_sql, tuple(params))
-            rows = cursor.fetchall()
-
-            output = io.StringIO()
-            writer = csv.writer(output)
-            writer.writerow(['username', 'user_type', 'created_at', 'last_login'])
-            for r in rows:
-                writer.writerow([
-                    r.get('username'),
-                    r.get('user_type'),
-                    r.get('created_at'),
-                    r.get('last_login')
-                ])
-            csv_data = output.getvalue()
-            output.close()
-            return Response(
-                csv_data,
-                mimetype='text/csv',
-                headers={'Content-Disposition': 'attachment; filename=users.csv'}
-            )
-
-        # Paginated data
-        offset = (page - 1) * page_size
+            return csv_response(data_sql, tuple(params), ['username', 'user_type', 'created_at', 'last_login'], 'users.csv')
+
+        page_clauses = list(where_clauses)
+        page_params = list(params)
+        if after:
+            try:
+                created_at, user_id = decode_cursor(after)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            page_clauses.append("(created_at, id) < (%s::timestamptz, %s)")
+            page_params.extend([created_at, user_id])
+        page_where_sql = ("WHERE " + " AND ".join(page_clauses)) if page_clauses else ""
+
+        conn = get_db_connection()
+        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+
+        # Total: the planner's estimate, replaced by an exact count when that is cheap
+        count_sql = f"SELECT 1 FROM users {where_sql}"
+        total = estimated_count(cursor, count_sql, tuple(params))
+        total_estimated = True
+        if exact_total or total <= USERS_EXACT_COUNT_LIMIT:
+            cursor.execute(f"SELECT COUNT(*) FROM users {where_sql}", tuple(params))
+            total = int(cursor.fetchone()['count'])
+            total_estimated = False
+
+        # Keyset page; one extra row tells whether there is a next page
         data_sql = f"""
-            SELECT username, user_type, created_at, last_login
+            SELECT id, username, user_type, created_at, last_login
             FROM users
-            {where_sql}
-            ORDER BY created_at DESC
-            LIMIT %s OFFSET %s
+            {page_where_sql}
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s
         """
-        cursor.execute(data_sql, tuple(params + [page_size, offset]))
+        cursor.execute(data_sql, tuple(page_params + [page_size + 1]))
         users = cursor.fetchall()
 
+        next_cursor = None
+        if len(users) > page_size:
+            users = users[:page_size]
+            next_cursor = encode_cursor(users[-1]['created_at'].isoformat(), users[-1]['id'])
+        for user in users:
+            del user['id']
+
         return jsonify({
             'users': users,
             'total': total,
-            'page': page,
-            'page_size': page_size
+            'total_estimated': total_estimated,
+            'page_size': page_size,
+            'next_cursor': next_cursor
         }), 200
 
     except psycopg2.Error as e:
@@ -116,4 +120,29 @@ def list_users():
     finally:
         if conn:
             cursor.close()
-            conn.close()
\ No newline at end of file
+            conn.close()
+
+
+@admin_bp.route('/models', methods=['GET'])
+def list_models():
+    """Return version, checksum and load time of each loaded model"""
+    return jsonify({'models': model_info(), 'status': model_status()}), 200
+
+
+@admin_bp.route('/models/<model_name>/reload', methods=['POST'])
+@require_admin_token
+def reload_model_route(model_name):
+    """
+    Reload one model from disk in the worker process handling this request.
+    Requests in flight keep using the previous version; the new one serves
+    every later request. Other workers (and their scoring processes) reload
+    the model themselves once they see its files changed, within
+    MODEL_RELOAD_CHECK_SECONDS, so after replacing a model file this only
+    makes the switch immediate here; it does not need to reach every worker.
+    """
+    if not reload_model(model_name):
+        return jsonify({'error': f'Could not reload model {model_name}', 'status': model_status()}), 400
+    return jsonify({
+        'model': model_info().get(model_name),
+        'other_workers_within_seconds': MODEL_RELOAD_CHECK_SECONDS or None
+    }), 200
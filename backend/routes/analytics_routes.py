@@ -1,64 +1,35 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
+from urllib.parse import urlencode
+from config import ANALYTICS_CACHE_TTL, PATIENTS_PAGE_SIZE, PATIENTS_MAX_PAGE_SIZE
 from utils.db import get_db_connection
+from utils.csv_export import csv_response
+from utils.response_cache import cached_response
+from utils.analytics import fetch_analytics
+from utils.patient_query import patient_page_query
+from utils.pagination import encode_cursor
 from datetime import datetime
+import logging
 import psycopg2 
 import psycopg2.extras
 
 analytics_bp = Blueprint('analytics', __name__, url_prefix='/api')
+logger = logging.getLogger(__name__)
 
 @analytics_bp.route('/analytics', methods=['GET'])
+@cached_response('analytics', ANALYTICS_CACHE_TTL)
 def get_analytics():
+    """
+    Summary and 30-day trend per trial from utils.analytics, read from the
+    analytics_daily rollup (maintained by triggers on the patient tables).
+    Each summary entry carries a status ('ok' or 'error' with the reason).
+    """
     try:
         conn = get_db_connection()
         if not conn:
             return jsonify({"error": "Database connection failed"}), 500
 
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-
-        summary_data = []
-        trial_tables = {
-            'hypertension': 'hypertension_patients',
-            'arthritis': 'arthritis_patients',
-            'migraine': 'migraine_patients',
-            'phase1': 'phase1_patients'
-        }
-
-        for trial_type, table_name in trial_tables.items():
-            try:
-                query = f"""
-                    SELECT 
-                        '{trial_type}' as trial_type,
-                        COUNT(*) as total_applications,
-                        SUM(CASE WHEN eligibility = 'Eligible' THEN 1 ELSE 0 END) as eligible,
-                        SUM(CASE WHEN eligibility = 'Ineligible' THEN 1 ELSE 0 END) as ineligible
-                    FROM {table_name}
-                """
-                cursor.execute(query)
-                result = cursor.fetchone()
-                if result:
-                    summary_data.append(result)
-            except psycopg2.Error:
-                continue
-
-        recent_data = []
-        for trial_type, table_name in trial_tables.items():
-            try:
-                query = f"""
-                    SELECT 
-                        '{trial_type}' as trial_type, 
-                        COUNT(*) as count, 
-                        eligibility, 
-                        DATE(created_at) as date
-                    FROM {table_name}
-                    WHERE created_at >= NOW() - INTERVAL '30 days'
-                    GROUP BY eligibility, DATE(created_at)
-                    ORDER BY date DESC
-                """
-                cursor.execute(query)
-                results = cursor.fetchall()
-                recent_data.extend(results)
-            except psycopg2.Error:
-                continue
+        cursor = conn.cursor()
+        summary_data, recent_data = fetch_analytics(cursor)
 
         cursor.close()
         conn.close()
@@ -70,42 +41,70 @@ def get_analytics():
         })
 
     except Exception as e:
-        print(f"Error in get_analytics: {e}")
+        logger.exception("Error in get_analytics")
         return jsonify({"error": str(e)}), 500
 
 
 @analytics_bp.route('/patients/<trial_type>', methods=['GET'])
 def get_patients(trial_type):
+    """
+    Return one page of a trial's patients, newest first, as a JSON array.
+    Query params:
+      - limit: rows per page (default PATIENTS_PAGE_SIZE, max PATIENTS_MAX_PAGE_SIZE)
+      - cursor: value of the X-Next-Cursor header of the previous page
+      - eligibility, source: exact-match filters
+      - from, to: ISO date/time bounds on created_at (from inclusive, to exclusive)
+      - fields: comma-separated columns to return; id and created_at are always included
+      - export: 'csv' to stream every matching row as CSV (ignores limit)
+    The X-Next-Cursor and Link headers point at the next page; they are absent on the last one.
+    """
+    export = request.args.get('export') == 'csv'
+    try:
+        limit = int(request.args.get('limit', PATIENTS_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(1, min(limit, PATIENTS_MAX_PAGE_SIZE))
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+
+    try:
+        query, params, columns = patient_page_query(
+            trial_type,
+            fields=fields,
+            eligibility=request.args.get('eligibility'),
+            source=request.args.get('source'),
+            created_from=request.args.get('from'),
+            created_to=request.args.get('to'),
+            after=request.args.get('cursor'),
+            limit=None if export else limit
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     try:
+        if export:
+            return csv_response(query, params, columns, f'{trial_type}_patients.csv')
+
         conn = get_db_connection()
         if not conn:
             return jsonify({"error": "Database connection failed"}), 500
 
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-
-        table_map = {
-            'hypertension': 'hypertension_patients',
-            'arthritis': 'arthritis_patients',
-            'migraine': 'migraine_patients',
-            'phase1': 'phase1_patients'
-        }
-
-        if trial_type not in table_map:
-            return jsonify({"error": "Invalid trial type"}), 400
-
-        query = f"SELECT * FROM {table_map[trial_type]} ORDER BY created_at DESC LIMIT 1000"
-        cursor.execute(query)
+        cursor.execute(query, params)
         patients = cursor.fetchall()
 
-        for patient in patients:
-            if 'created_at' in patient and isinstance(patient['created_at'], datetime):
-                patient['created_at'] = patient['created_at'].isoformat()
-
         cursor.close()
         conn.close()
 
-        return jsonify(patients)
+        response = jsonify(patients[:limit])
+        if len(patients) > limit:
+            last = patients[limit - 1]
+            next_cursor = encode_cursor(last['created_at'], last['id'])
+            args = request.args.to_dict()
+            args['cursor'] = next_cursor
+            response.headers['X-Next-Cursor'] = next_cursor
+            response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+        return response
 
     except Exception as e:
-        print(f"Error in get_patients: {e}")
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        logger.exception("Error in get_patients")
+        return jsonify({"error": str(e)}), 500
@@ -16,18 +16,6 @@ def my_applications():
     try:
         conn = get_db_connection()
         cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS applications (
-                id SERIAL PRIMARY KEY,
-                username VARCHAR(80) NOT NULL,
-                trial_type VARCHAR(50) NOT NULL,
-                patient_record_id INT NOT NULL,
-                eligibility VARCHAR(20) NOT NULL,
-                created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
-            )
-            """
-        )
         cursor.execute(
             """
             SELECT trial_type, eligibility, created_at
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
-from utils.db import get_db_connection
+from utils.db import get_db_connection, db_connection
+from utils.passwords import hash_password, verify_password
 import psycopg2
 import psycopg2.extras
 
@@ -17,7 +17,7 @@ def register():
     if not username or not password:
         return jsonify({'error': 'Username and password are required'}), 400
 
-    hashed_password = generate_password_hash(password)
+    hashed_password = hash_password(password)
 
     conn = None
     try:
@@ -57,38 +57,43 @@ def login():
     if not username or not password:
         return jsonify({'error': 'Username and password are required'}), 400
 
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-
-        query = "SELECT * FROM users WHERE username = %s"
-        cursor.execute(query, (username,))
-        user = cursor.fetchone()
-
-        if user and check_password_hash(user['password_hash'], password):
+        # The connection goes back to the pool before hashing, which can take
+        # up to PASSWORD_HASH_TIMEOUT and must not hold a connection meanwhile
+        with db_connection() as conn:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
             try:
-                # Update last_login
-                cursor2 = conn.cursor()
-                cursor2.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS last_login TIMESTAMPTZ NULL")
-                cursor2.execute("UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = %s", (user['id'],))
+                query = "SELECT * FROM users WHERE username = %s"
+                cursor.execute(query, (username,))
+                user = cursor.fetchone()
                 conn.commit()
-                cursor2.close()
-            except Exception:
-                conn.rollback()
-            return jsonify({
-                'message': 'Login successful',
-                'user_id': user['id'],
-                'username': user['username'],
-                'user_type': user['user_type']
-            }), 200
-        else:
+            finally:
+                cursor.close()
+
+        matches, new_hash = verify_password(user['password_hash'], password) if user else (False, None)
+        if not matches:
             return jsonify({'error': 'Invalid credentials'}), 401
 
+        try:
+            # Update last_login, upgrading the stored hash if the hash policy changed
+            with db_connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(
+                        "UPDATE users SET last_login = CURRENT_TIMESTAMP, password_hash = COALESCE(%s, password_hash) WHERE id = %s",
+                        (new_hash, user['id'])
+                    )
+                    conn.commit()
+                finally:
+                    cursor.close()
+        except psycopg2.Error:
+            pass
+        return jsonify({
+            'message': 'Login successful',
+            'user_id': user['id'],
+            'username': user['username'],
+            'user_type': user['user_type']
+        }), 200
+
     except psycopg2.Error as e:
         return jsonify({'error': f'Database error: {e}'}), 500
-        
-    finally:
-        if conn:
-            cursor.close()
-            conn.close()
\ No newline at end of file
@@ -1,16 +1,29 @@
 from flask import Blueprint, request, jsonify
-from utils.db import get_db_connection
-from utils.query_builder import execute_query
-from models.ml_models import predict_eligibility
-import pandas as pd
-import traceback
+from utils.db import get_db_connection, db_connection
+from utils.screening import screen_chunk
+from utils.upload_reader import iter_upload_chunks
+from utils.upload_jobs import enqueue_job, get_job, get_job_results
+from utils.analytics import fold_rollup_deltas
+from utils.response_cache import invalidate
+from utils.metrics import stage, timed_iter, set_trial
+import logging
 import psycopg2
+import psycopg2.extras
 
 org_bp = Blueprint('organization', __name__, url_prefix='/api/organization')
+logger = logging.getLogger(__name__)
+
+# Rows echoed back in the upload response
+RESPONSE_SAMPLE_SIZE = 100
+
 
 @org_bp.route('/upload', methods=['POST'])
 def organization_upload():
-    """Handle bulk file upload from organization"""
+    """
+    Handle bulk file upload from organization.
+    With form field async=true the file is queued as a background job and a
+    job id is returned (202) instead of screening it inside the request.
+    """
     try:
         if 'file' not in request.files:
             return jsonify({"error": "No file uploaded"}), 400
@@ -20,77 +33,119 @@ def organization_upload():
 
         if not trial_type:
             return jsonify({"error": "Trial type not specified"}), 400
+        set_trial(trial_type)
         if not file or not file.filename:
             return jsonify({"error": "No file selected"}), 400
-
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(file)
-        elif file.filename.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(file)
-        else:
+        if not file.filename.endswith(('.csv', '.xlsx', '.xls')):
             return jsonify({"error": "Unsupported file format. Use CSV or Excel."}), 400
 
-        results = []
-        conn = get_db_connection()
+        with stage('connect', db=True):
+            conn = get_db_connection()
         if not conn:
             return jsonify({"error": "Database connection failed"}), 500
 
+        if request.form.get('async', '').lower() == 'true':
+            try:
+                job_id = enqueue_job(conn, trial_type, file.filename, file.read())
+            finally:
+                conn.close()
+            return jsonify({
+                "message": "File queued for processing",
+                "job_id": job_id,
+                "status": "queued",
+                "status_url": f"/api/organization/jobs/{job_id}",
+                "results_url": f"/api/organization/jobs/{job_id}/results"
+            }), 202
+
         cursor = conn.cursor()
 
-        for index, row in df.iterrows():
-            try:
-                patient_data = row.to_dict()
-                for key, value in patient_data.items():
-                    if pd.isna(value):
-                        patient_data[key] = 0 if key not in ['gender', 'consent'] else ''
-
-                eligibility = predict_eligibility(trial_type, patient_data)
-
-                table_config = execute_query(trial_type, patient_data, eligibility, 'Organization')
-                if not table_config:
-                    results.append({
-                        "row": index + 1,
-                        "error": f"Unsupported trial type: {trial_type}",
-                        "eligibility": "Error"
-                    })
-                    continue
-
-                cursor.execute(table_config['query'], table_config['values'])
-                # Fetch the returned ID
-                patient_id = cursor.fetchone()[0]
-
-                results.append({
-                    "row": index + 1,
-                    "patient_id": patient_id,
-                    "eligibility": eligibility,
-                    "data": patient_data
-                })
-
-            except Exception as e:
-                results.append({
-                    "row": index + 1,
-                    "error": str(e),
-                    "eligibility": "Error"
-                })
-
-        conn.commit()
-        cursor.close()
-        conn.close()
-
-        eligible_count = len([r for r in results if r.get('eligibility') == 'Eligible'])
-        ineligible_count = len([r for r in results if r.get('eligibility') == 'Ineligible'])
-        error_count = len([r for r in results if r.get('eligibility') == 'Error'])
+        # Each chunk is scored and persisted before the next one is read; only
+        # counters and the first rows of the response are kept across chunks
+        counts = {'Eligible': 0, 'Ineligible': 0, 'Error': 0}
+        results = []
+        failed_rows = []
+        try:
+            for chunk in timed_iter(iter_upload_chunks(file, file.filename), 'read'):
+                for result in screen_chunk(cursor, trial_type, chunk, 'Organization'):
+                    counts[result['eligibility']] += 1
+                    if len(results) < RESPONSE_SAMPLE_SIZE:
+                        results.append(result)
+                    if result['eligibility'] == 'Error' and len(failed_rows) < RESPONSE_SAMPLE_SIZE:
+                        failed_rows.append(result)
+            with stage('commit', db=True):
+                conn.commit()
+            with stage('rollup', db=True):
+                fold_rollup_deltas(conn)
+            invalidate('analytics')
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
 
         return jsonify({
             "message": "File processed successfully",
-            "total_processed": len(results),
-            "eligible": eligible_count,
-            "ineligible": ineligible_count,
-            "errors": error_count,
-            "results": results[:100]
+            "total_processed": sum(counts.values()),
+            "eligible": counts['Eligible'],
+            "ineligible": counts['Ineligible'],
+            "errors": counts['Error'],
+            "results": results,
+            "failed_rows": failed_rows
         })
 
     except Exception as e:
-        print(f"❌ Error in organization_upload: {e}")
-        traceback.print_exc()
+        logger.exception("Error in organization_upload")
         return jsonify({"error": str(e)}), 500
+
+
+@org_bp.route('/jobs/<int:job_id>', methods=['GET'])
+def upload_job_status(job_id):
+    """Return status, progress and counts of a background upload job"""
+    try:
+        with db_connection() as conn:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            job = get_job(cursor, job_id)
+            cursor.close()
+    except psycopg2.Error as e:
+        return jsonify({"error": f"Database error: {e}"}), 500
+
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+
+@org_bp.route('/jobs/<int:job_id>/results', methods=['GET'])
+def upload_job_results(job_id):
+    """
+    Return per-row results of a background upload job, ordered by row number.
+    Query params:
+      - after: return rows after this row number (default 0)
+      - limit: rows per page (default 100, max 1000)
+      - eligibility: only rows with this outcome ('Eligible', 'Ineligible', 'Error')
+    """
+    try:
+        after_row = max(int(request.args.get('after', 0)), 0)
+        limit = int(request.args.get('limit', 100))
+    except ValueError:
+        after_row, limit = 0, 100
+    limit = max(1, min(limit, 1000))
+    eligibility = request.args.get('eligibility')
+
+    try:
+        with db_connection() as conn:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            job = get_job(cursor, job_id)
+            rows = get_job_results(cursor, job_id, after_row, limit, eligibility) if job else []
+            cursor.close()
+    except psycopg2.Error as e:
+        return jsonify({"error": f"Database error: {e}"}), 500
+
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({
+        "job_id": job_id,
+        "status": job['status'],
+        "results": rows,
+        "next_after": rows[-1]['row'] if len(rows) == limit else None
+    })
@@ -1,11 +1,15 @@
 from flask import Blueprint, request, jsonify
 from utils.db import get_db_connection
 from utils.query_builder import execute_query
-from models.ml_models import predict_eligibility
-import traceback
+from utils.analytics import fold_rollup_deltas
+from utils.response_cache import invalidate
+from models.ml_models import predict_eligibility_fast
+from utils.metrics import stage, set_trial
+import logging
 import psycopg2
 
 patient_bp = Blueprint('patient', __name__, url_prefix='/api/patient')
+logger = logging.getLogger(__name__)
 
 
 def validate_patient_data(trial_type, data):
@@ -97,23 +101,24 @@ def validate_patient_data(trial_type, data):
 def patient_apply():
     """Handle patient application"""
     try:
-        print("📥 Received patient application request")
         data = request.json
         trial_type = data.get('trial_type')
         patient_data = data.get('patient_data')
 
         if not trial_type or not patient_data:
             return jsonify({"error": "Missing trial_type or patient_data"}), 400
+        set_trial(trial_type)
 
         # Validate before processing
-        ok, errors = validate_patient_data(trial_type, patient_data)
+        with stage('validate'):
+            ok, errors = validate_patient_data(trial_type, patient_data)
         if not ok:
             return jsonify({"error": "Validation failed", "details": errors}), 400
 
-        eligibility = predict_eligibility(trial_type, patient_data)
-        print(f"🔍 Predicted eligibility: {eligibility}")
+        eligibility = predict_eligibility_fast(trial_type, patient_data)
 
-        conn = get_db_connection()
+        with stage('connect', db=True):
+            conn = get_db_connection()
         if not conn:
             return jsonify({"error": "Database connection failed"}), 500
 
@@ -123,36 +128,31 @@ def patient_apply():
             return jsonify({"error": f"Unsupported trial type: {trial_type}"}), 400
 
         try:
-            cursor.execute(table_config['query'], table_config['values'])
-            # Fetch the returned ID
-            patient_id = cursor.fetchone()[0]
-            
-            # Audit: store application summary linked to username if available
-            try:
-                username = request.headers.get('X-Username') or request.args.get('username') or request.json.get('username')
-                if username:
-                    cursor.execute(
-                        """
-                        CREATE TABLE IF NOT EXISTS applications (
-                            id SERIAL PRIMARY KEY,
-                            username VARCHAR(80) NOT NULL,
-                            trial_type VARCHAR(50) NOT NULL,
-                            patient_record_id INT NOT NULL,
-                            eligibility VARCHAR(20) NOT NULL,
-                            created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+            with stage('insert', db=True):
+                cursor.execute(table_config['query'], table_config['values'])
+                # Fetch the returned ID
+                patient_id = cursor.fetchone()[0]
+
+                # Audit: store application summary linked to username if available
+                try:
+                    username = request.headers.get('X-Username') or request.args.get('username') or request.json.get('username')
+                    if username:
+                        cursor.execute(
+                            "INSERT INTO applications (username, trial_type, patient_record_id, eligibility) VALUES (%s, %s, %s, %s)",
+                            (username, trial_type, patient_id, eligibility)
                         )
-                        """
-                    )
-                    cursor.execute(
-                        "INSERT INTO applications (username, trial_type, patient_record_id, eligibility) VALUES (%s, %s, %s, %s)",
-                        (username, trial_type, patient_id, eligibility)
-                    )
-            except Exception as _:
-                pass
-
-            conn.commit()
+                except Exception as _:
+                    pass
+
+            with stage('commit', db=True):
+                conn.commit()
+            with stage('rollup', db=True):
+                fold_rollup_deltas(conn)
+            invalidate('analytics')
             
-            print(f"✅ Stored patient {patient_id} with eligibility: {eligibility}")
+            logger.info("Stored patient application", extra={
+                'trial': trial_type, 'patient_id': patient_id, 'eligibility': eligibility
+            })
 
             return jsonify({
                 "patient_id": patient_id,
@@ -163,8 +163,7 @@ def patient_apply():
 
         except (Exception, psycopg2.Error) as db_error:
             conn.rollback()
-            print(f"❌ Database error in patient_apply: {db_error}")
-            traceback.print_exc()
+            logger.exception("Database error in patient_apply", extra={'trial': trial_type})
             return jsonify({"error": "Database error occurred"}), 500
 
         finally:
@@ -173,6 +172,5 @@ def patient_apply():
 
 
     except Exception as e:
-        print(f"❌ Error in patient_apply: {e}")
-        traceback.print_exc()
+        logger.exception("Error in patient_apply")
         return jsonify({"error": "Internal server error"}), 500
@@ -1,8 +1,11 @@
 from flask import Blueprint, jsonify
+from config import TRIAL_METADATA_CACHE_TTL
+from utils.response_cache import cached_response
 
 trial_bp = Blueprint('trial', __name__, url_prefix='/api')
 
 @trial_bp.route('/trials', methods=['GET'])
+@cached_response('trials', TRIAL_METADATA_CACHE_TTL)
 def get_trials():
     trials = [
         {"id": "hypertension", "name": "Hypertension Trial", "description": "Clinical trial for hypertension treatment"},
@@ -14,6 +17,7 @@ def get_trials():
 
 
 @trial_bp.route('/trial-fields/<trial_type>', methods=['GET'])
+@cached_response('trial-fields', TRIAL_METADATA_CACHE_TTL)
 def get_trial_fields(trial_type):
     # Field definitions aligned with database schema and typical clinical ranges
     fields = {
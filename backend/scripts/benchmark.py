@@ -0,0 +1,257 @@
+"""
+Benchmark the screening hot paths and compare them with a saved baseline.
+
+Runs offline against the bundled ml_models/*.pkl with the prediction cache
+disabled, so every timing includes the model itself:
+
+    predict_eligibility        single-record scoring (reference DataFrame path)
+    predict_eligibility_fast   single-record scoring as the application form does it
+    filter_features_for_model  alias resolution of one record dict
+    batch_predict              ModelHandler.batch_predict over all rows at once
+    upload                     POST /api/organization/upload of a CSV through
+                               the Flask test client (needs the local, migrated
+                               database; the uploaded patients are deleted
+                               afterwards, so do not point it at production)
+
+Single-record benchmarks run once per trial over PER_ROW_SAMPLE records (their
+per-row cost does not depend on the file size); batch_predict and upload run
+for every size. The best of --repeat runs is kept.
+Results are written as JSON, and compared with the baseline file when one
+exists: anything slower than the baseline by more than --threshold fails the run.
+
+Usage:
+    python scripts/benchmark.py [--sizes 1000,10000,100000] [--trials hypertension,...]
+                                [--skip-upload] [--save-baseline]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+# Ensure we can import config when running from backend/ or repo root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+os.chdir(project_root)
+
+# Time the models, not the prediction cache
+os.environ['PREDICTION_CACHE_SIZE'] = '0'
+
+import numpy as np
+import pandas as pd
+from check_scoring_parity import RANGES, SAMPLE_VALUES
+from database.migrate import connect
+from models import ml_models
+from models.ml_models import FEATURE_SPECS, predict_eligibility, predict_eligibility_fast
+from utils.feature_filter import filter_features_for_model
+from utils.model_handler import ModelHandler
+from utils.query_builder import PATIENT_TABLES
+
+BENCHMARK_DIR = os.path.join(project_root, 'benchmarks')
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, 'latest.json')
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+# Records timed by the single-record benchmarks
+PER_ROW_SAMPLE = 1000
+
+
+def synthetic_frame(trial_type, rows, seed=7):
+    """Rows of valid values for a trial, with the canonical column names"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for _, feature, convert in FEATURE_SPECS[trial_type]:
+        if feature in SAMPLE_VALUES:
+            # The first two sample values are ones the database columns accept
+            values = SAMPLE_VALUES[feature][:2]
+            data[feature] = [values[i] for i in rng.integers(0, len(values), rows)]
+            continue
+        low, high = RANGES.get(feature, (0, 100))
+        if convert is int:
+            data[feature] = rng.integers(int(low), int(high) + 1, rows)
+        else:
+            data[feature] = np.round(rng.uniform(low, high, rows), 2)
+    return pd.DataFrame(data)
+
+
+def best_of(repeat, fn):
+    """Run fn repeat times and return the fastest wall time in seconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def bench_predict(trial_type, frame):
+    records = frame.to_dict('records')
+    return len(records), lambda: [predict_eligibility(trial_type, record) for record in records]
+
+
+def bench_predict_fast(trial_type, frame):
+    records = frame.to_dict('records')
+    return len(records), lambda: [predict_eligibility_fast(trial_type, record) for record in records]
+
+
+def bench_filter(trial_type, frame):
+    records = frame.to_dict('records')
+    return len(records), lambda: [filter_features_for_model(record, trial_type) for record in records]
+
+
+def bench_batch(trial_type, frame):
+    handler = ModelHandler()
+    records = frame.to_dict('records')
+    return len(records), lambda: handler.batch_predict(trial_type, records)
+
+
+class UploadBench:
+    """Uploads through the Flask test client and removes the patients it created"""
+
+    def __init__(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            from app import app
+        self.client = app.test_client()
+
+    def __call__(self, trial_type, frame):
+        data = frame.to_csv(index=False).encode()
+        return len(frame), lambda: self._upload(trial_type, data)
+
+    def _upload(self, trial_type, data):
+        table = PATIENT_TABLES[trial_type]
+        conn = connect()
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+        last_id = cursor.fetchone()[0]
+        conn.commit()
+        try:
+            response = self.client.post(
+                '/api/organization/upload',
+                data={'trial_type': trial_type, 'file': (io.BytesIO(data), 'benchmark.csv')},
+                content_type='multipart/form-data'
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f"upload returned {response.status_code}: {response.get_json()}")
+        finally:
+            cursor.execute(f"DELETE FROM {table} WHERE id > %s AND source = 'Organization'", (last_id,))
+            conn.commit()
+            conn.close()
+
+
+def measure(results, key, bench, trial_type, frame, repeat):
+    rows, fn = bench(trial_type, frame)
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds = best_of(repeat, fn)
+    results[key] = {
+        'rows': rows,
+        'seconds': round(seconds, 6),
+        'us_per_row': round(seconds / rows * 1e6, 3),
+        'rows_per_second': round(rows / seconds, 1),
+    }
+    print(f"⏱ {key}: {seconds:.3f}s ({results[key]['us_per_row']:.1f} µs/row)")
+
+
+def run(sizes, trials, repeat, upload):
+    row_benchmarks = {
+        'predict_eligibility': bench_predict,
+        'predict_eligibility_fast': bench_predict_fast,
+        'filter_features_for_model': bench_filter,
+    }
+    size_benchmarks = {'batch_predict': bench_batch}
+    if upload:
+        size_benchmarks['upload'] = UploadBench()
+
+    results = {}
+    for trial_type in trials:
+        sample = synthetic_frame(trial_type, PER_ROW_SAMPLE)
+        for name, bench in row_benchmarks.items():
+            measure(results, f"{name}/{trial_type}", bench, trial_type, sample, repeat)
+        for size in sizes:
+            frame = synthetic_frame(trial_type, size)
+            for name, bench in size_benchmarks.items():
+                measure(results, f"{name}/{trial_type}/{size}", bench, trial_type, frame, repeat)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print per-benchmark change against the baseline; returns the regressed keys"""
+    regressions = []
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        ratio = result['us_per_row'] / previous['us_per_row']
+        if ratio > 1 + threshold:
+            regressions.append(key)
+            mark = '❌'
+        elif ratio < 1 - threshold:
+            mark = '🚀'
+        else:
+            mark = '✅'
+        print(f"{mark} {key}: {previous['us_per_row']:.1f} -> {result['us_per_row']:.1f} µs/row ({ratio - 1:+.0%})")
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark scoring, feature filtering and uploads")
+    parser.add_argument('--sizes', default='1000,10000,100000', help="Comma-separated row counts")
+    parser.add_argument('--trials', default=','.join(FEATURE_SPECS), help="Comma-separated trial types")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per benchmark; the fastest is kept")
+    parser.add_argument('--skip-upload', action='store_true', help="Skip the end-to-end upload (no database needed)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Also write the results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Allowed slowdown per benchmark, e.g. 0.2 = 20%%")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        ml_models.load_models(strict=True)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    trials = args.trials.split(',')
+    results = run(sizes, trials, args.repeat, upload=not args.skip_upload)
+
+    report = {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'machine': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    write_json(args.output, report)
+    print(f"✅ Results written to {args.output}")
+
+    failed = False
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"📊 Compared with baseline from {baseline['meta'].get('revision') or baseline['meta']['created_at']}:")
+        regressions = compare(results, baseline['results'], args.threshold)
+        failed = bool(regressions)
+        print(f"{'❌' if failed else '✅'} {len(regressions)} regression(s) beyond {args.threshold:.0%}")
+
+    if args.save_baseline:
+        write_json(args.baseline, report)
+        print(f"✅ Baseline saved to {args.baseline}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,62 @@
+"""
+Check that password hashing recovers when a hashing worker process dies.
+
+Kills an idle worker with SIGKILL and then one in the middle of an operation,
+and checks that each failure surfaces as HashingOverloaded (a 429, not a 500)
+and that the next hash succeeds on a fresh pool.
+
+Usage:
+    python scripts/check_hashing_recovery.py
+"""
+import os
+import signal
+import sys
+import time
+
+# Ensure we can import config when running from backend/ or repo root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+os.chdir(project_root)
+
+from utils.passwords import HashingPool, HashingOverloaded, POLICY, _hash, _verify
+
+
+def _die():
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def check_hash(pool, label):
+    password_hash = pool.run(_hash, 'correct horse', POLICY)
+    matches, _ = pool.run(_verify, password_hash, 'correct horse', POLICY)
+    if not matches:
+        raise AssertionError(f"{label}: hash did not verify")
+    print(f"✅ {label}: hashing works")
+
+
+def main():
+    pool = HashingPool(workers=1, max_pending=4, timeout=30)
+    check_hash(pool, "fresh pool")
+
+    # An idle worker dies: the pool notices on the next submit and is replaced
+    os.kill(pool.run(os.getpid), signal.SIGKILL)
+    time.sleep(1)
+    check_hash(pool, "after killing an idle worker")
+
+    # A worker dies mid-operation: that caller is shed, the next one gets a new pool
+    try:
+        pool.run(_die)
+    except HashingOverloaded as e:
+        print(f"✅ operation whose worker died raised HashingOverloaded: {e}")
+    else:
+        raise AssertionError("operation whose worker died did not raise HashingOverloaded")
+    check_hash(pool, "after a worker died mid-operation")
+
+    stats = pool.stats()
+    if stats['pending'] != 0 or stats['restarts'] != 2:
+        raise AssertionError(f"unexpected pool stats {stats}")
+    print(f"✅ stats: {stats['restarts']} restarts, no slots leaked")
+
+
+if __name__ == '__main__':
+    main()
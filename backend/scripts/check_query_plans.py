@@ -0,0 +1,180 @@
+"""
+Assert that the hot request-path queries are served by indexes.
+
+Seeds synthetic users, patients, applications and upload jobs, ANALYZEs, and
+runs EXPLAIN on each query below; any Seq Scan in a plan is a failure. All
+seeding happens inside one transaction that is rolled back at the end, so the
+database is left as it was. Run it against a local, migrated database.
+
+The analytics endpoint is not listed: it reads the analytics_daily rollup,
+which stays small (trials x days x outcomes) however many patients exist.
+
+Usage:
+    python scripts/check_query_plans.py [rows_per_table]
+"""
+import json
+import os
+import sys
+
+# Ensure we can import config when running from backend/ or repo root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from database.migrate import connect
+from utils.patient_query import patient_page_query
+from utils.pagination import encode_cursor
+from utils.query_builder import PATIENT_TABLES, PATIENT_COLUMNS
+from utils.upload_jobs import CLAIM_JOB_SQL, FAIL_ABANDONED_SQL
+
+# Seed value per patient column; anything not listed is a small integer
+SEED_VALUES = {
+    'gender': "CASE WHEN random() < 0.5 THEN 'Male' ELSE 'Female' END",
+    'consent': "'Yes'",
+    'eligibility': "CASE WHEN random() < 0.1 THEN 'Eligible' ELSE 'Ineligible' END",
+    'source': "CASE WHEN random() < 0.3 THEN 'Patient' ELSE 'Organization' END",
+}
+
+
+def seed(cursor, rows):
+    """Insert synthetic rows spread over the last year"""
+    created = "NOW() - random() * INTERVAL '365 days'"
+    cursor.execute("SELECT ensure_patient_partitions((NOW() - INTERVAL '365 days')::date, 3)")
+    cursor.execute(
+        f"""
+        INSERT INTO users (username, password_hash, user_type, created_at)
+        SELECT 'plan_check_' || g, 'x', CASE WHEN g %% 100 = 0 THEN 'admin' ELSE 'patient' END, {created}
+        FROM generate_series(1, %s) g
+        """,
+        (rows,)
+    )
+    for trial_type, table in PATIENT_TABLES.items():
+        columns = PATIENT_COLUMNS[trial_type]
+        values = ', '.join(SEED_VALUES.get(c, '(random() * 10)::int') for c in columns)
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}, created_at) "
+            f"SELECT {values}, {created} FROM generate_series(1, %s)",
+            (rows,)
+        )
+    cursor.execute(
+        f"""
+        INSERT INTO applications (username, trial_type, patient_record_id, eligibility, created_at)
+        SELECT 'plan_check_' || (g %% %s + 1), 'hypertension', g, 'Ineligible', {created}
+        FROM generate_series(1, %s) g
+        """,
+        (max(rows // 10, 1), rows)
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO upload_jobs (trial_type, filename, status, created_at)
+        SELECT 'hypertension', 'seed.csv', CASE WHEN g %% 500 = 0 THEN 'queued' ELSE 'completed' END, {created}
+        FROM generate_series(1, %s) g
+        RETURNING id
+        """,
+        (rows,)
+    )
+    job_id = cursor.fetchone()[0]
+    cursor.execute(
+        """
+        INSERT INTO upload_job_results (job_id, row_number, eligibility)
+        SELECT j.id, r, CASE WHEN random() < 0.1 THEN 'Eligible' ELSE 'Ineligible' END
+        FROM upload_jobs j, generate_series(1, 20) r
+        WHERE j.filename = 'seed.csv'
+        """
+    )
+    cursor.execute("ANALYZE")
+    return job_id
+
+
+def hot_queries(cursor, job_id):
+    """(name, sql, params) for each query that must not scan a whole table"""
+    cursor.execute("SELECT NOW() - INTERVAL '100 days'")
+    middle = cursor.fetchone()[0].isoformat()
+    page_cursor = encode_cursor(middle, 2 ** 31 - 1)
+
+    queries = [
+        ('login', "SELECT * FROM users WHERE username = %s", ('plan_check_42',)),
+        ('admin users page', """
+            SELECT id, username, user_type, created_at, last_login FROM users
+            WHERE user_type = %s ORDER BY created_at DESC, id DESC LIMIT 21
+        """, ('patient',)),
+        ('admin users next page', """
+            SELECT id, username, user_type, created_at, last_login FROM users
+            WHERE user_type = %s AND (created_at, id) < (%s::timestamptz, %s)
+            ORDER BY created_at DESC, id DESC LIMIT 21
+        """, ('patient', middle, 2 ** 31 - 1)),
+        ('my applications', """
+            SELECT trial_type, eligibility, created_at FROM applications
+            WHERE username = %s ORDER BY created_at DESC
+        """, ('plan_check_7',)),
+        # The worker's own statements (EXPLAIN does not run the UPDATEs)
+        ('upload job claim', CLAIM_JOB_SQL, (300, 3)),
+        ('abandoned upload jobs', FAIL_ABANDONED_SQL, (300, 3)),
+        ('upload job results', """
+            SELECT row_number AS row, patient_id, eligibility, error FROM upload_job_results
+            WHERE job_id = %s AND row_number > %s ORDER BY row_number LIMIT %s
+        """, (job_id, 0, 100)),
+        ('upload job results by outcome', """
+            SELECT row_number AS row, patient_id, eligibility, error FROM upload_job_results
+            WHERE job_id = %s AND row_number > %s AND eligibility = %s ORDER BY row_number LIMIT %s
+        """, (job_id, 0, 'Eligible', 100)),
+    ]
+
+    cursor.execute("SELECT to_regclass('idx_users_username_trgm') IS NOT NULL")
+    if cursor.fetchone()[0]:
+        queries.append(('admin users search', """
+            SELECT id, username, user_type, created_at, last_login FROM users
+            WHERE username ILIKE %s ORDER BY created_at DESC, id DESC LIMIT 21
+        """, ('%check_123%',)))
+    else:
+        print("⚠ pg_trgm index missing; skipping the username search check")
+
+    for trial_type in PATIENT_TABLES:
+        for label, filters in (
+            ('page', {}),
+            ('next page', {'after': page_cursor}),
+            ('eligible', {'eligibility': 'Eligible'}),
+            ('by source', {'source': 'Patient'}),
+            ('date range', {'created_from': middle[:10], 'created_to': middle}),
+        ):
+            query, params, _ = patient_page_query(trial_type, limit=100, **filters)
+            queries.append((f'{trial_type} patients {label}', query, params))
+    return queries
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def check(cursor, name, query, params):
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {query}", params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes = list(plan_nodes(plan[0]['Plan']))
+    seq_scans = [n['Relation Name'] for n in nodes if n['Node Type'] == 'Seq Scan']
+    indexes = sorted({n['Index Name'] for n in nodes if 'Index Name' in n})
+    if seq_scans:
+        print(f"❌ {name}: sequential scan on {', '.join(seq_scans)}")
+        return False
+    print(f"✅ {name}: {', '.join(indexes) or 'no table access'}")
+    return True
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    conn = connect()
+    cursor = conn.cursor()
+    try:
+        print(f"🌱 Seeding {rows} rows per table (rolled back afterwards)...")
+        job_id = seed(cursor, rows)
+        results = [check(cursor, *query) for query in hot_queries(cursor, job_id)]
+    finally:
+        conn.rollback()
+        conn.close()
+
+    failed = results.count(False)
+    print(f"{'✅' if not failed else '❌'} {len(results) - failed}/{len(results)} queries use indexes only")
+    sys.exit(1 if failed else 0)
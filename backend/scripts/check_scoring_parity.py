@@ -0,0 +1,98 @@
+"""
+Check that every scoring path agrees with the reference DataFrame path.
+
+For each trial, random records (including values the models reject) are
+scored with predict_eligibility, predict_eligibility_fast and
+predict_eligibility_batch, and any disagreement is reported.
+
+Usage:
+    python scripts/check_scoring_parity.py [records_per_trial]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+
+# Ensure we can import config when running from backend/ or repo root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+os.chdir(project_root)
+
+# Every path must actually run the model, not answer from the prediction cache
+os.environ['PREDICTION_CACHE_SIZE'] = '0'
+
+import pandas as pd
+from models import ml_models
+from models.ml_models import FEATURE_SPECS, predict_eligibility, predict_eligibility_fast, predict_eligibility_batch
+
+# Sample values for features whose converter is not a plain int/float cast
+SAMPLE_VALUES = {
+    'gender': ['Male', 'Female', 'Other', ''],
+    'consent': ['1', '0', 'Yes'],
+    'sex': [0, 1, 'F', 'Male'],
+    'cohort': [1, 2, 3, 'placebo', 'dose_2', 'unknown'],
+    'adverse_event': [0, 1, 'yes', 'no'],
+}
+
+
+# Value ranges for numeric features, matching the application form limits
+RANGES = {
+    'age': (18, 90), 'bmi': (10, 60), 'glucose': (50, 500), 'lifestyle_risk': (0, 2),
+    'stress_level': (0, 10), 'systolic_bp': (80, 240), 'diastolic_bp': (40, 140),
+    'cholesterol_total': (100, 400), 'comorbidities': (0, 10),
+    'years_since_diagnosis': (0, 40), 'tender_joint_count': (0, 40), 'swollen_joint_count': (0, 40),
+    'crp_level': (0, 100), 'patient_pain_score': (0, 10), 'egfr': (10, 150),
+    'on_biologic_dmards': (0, 1), 'has_hepatitis': (0, 1),
+    'migraine_frequency': (0, 30), 'previous_medication_failures': (0, 10),
+    'liver_enzyme_level': (0, 200), 'has_aura': (0, 1), 'chronic_kidney_disease': (0, 1),
+    'on_anticoagulants': (0, 1), 'sleep_disorder': (0, 1), 'depression': (0, 1),
+    'caffeine_intake': (0, 10),
+    'weight_kg': (40, 150), 'height_cm': (140, 210), 'alt': (5, 120), 'creatinine': (0.3, 3),
+    'sbp': (80, 200), 'dbp': (40, 120), 'hr': (40, 150), 'temp_c': (35, 40),
+}
+
+
+def random_record(trial_type, rng):
+    record = {}
+    for _, feature, convert in FEATURE_SPECS[trial_type]:
+        low, high = RANGES.get(feature, (0, 100))
+        if feature in SAMPLE_VALUES:
+            record[feature] = rng.choice(SAMPLE_VALUES[feature])
+        elif convert is int:
+            record[feature] = rng.randint(low, high)
+        else:
+            record[feature] = round(rng.uniform(low, high), 2)
+        if rng.random() < 0.02:
+            record[feature] = None
+    return record
+
+
+def check_trial(trial_type, count, rng):
+    records = [random_record(trial_type, rng) for _ in range(count)]
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        reference = [predict_eligibility(trial_type, record) for record in records]
+        fast = [predict_eligibility_fast(trial_type, record) for record in records]
+        batch = predict_eligibility_batch(trial_type, pd.DataFrame(records))
+
+    mismatches = 0
+    for label, results in (('fast', fast), ('batch', batch)):
+        for i, (expected, actual) in enumerate(zip(reference, results)):
+            if expected != actual:
+                mismatches += 1
+                print(f"❌ {trial_type} {label} row {i}: expected {expected}, got {actual}: {records[i]}")
+
+    eligible = reference.count('Eligible')
+    print(f"{'✅' if not mismatches else '❌'} {trial_type}: {count} records, {eligible} eligible, {mismatches} mismatches")
+    return mismatches
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        ml_models.load_models(strict=True)
+
+    rng = random.Random(42)
+    failures = sum(check_trial(trial_type, count, rng) for trial_type in FEATURE_SPECS)
+    sys.exit(1 if failures else 0)
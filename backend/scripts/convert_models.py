@@ -0,0 +1,80 @@
+"""
+Convert the pickled trial models to the native artifact format.
+
+For every configured model the pickle is loaded and written next to it as a
+payload (XGBoost UBJSON, or an sklearn pickle with out-of-band array buffers)
+plus a JSON manifest with the feature order, converters, encoder categories
+and the payload's SHA-256. The artifact is then loaded back and must score random records exactly like the
+pickle; otherwise its manifest is removed and the app keeps using the pickle.
+
+Usage:
+    python scripts/convert_models.py [--trials hypertension,...] [--check-records 500]
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import os
+import pickle
+import random
+import sys
+
+# Ensure we can import config when running from backend/ or repo root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+os.chdir(project_root)
+
+# Compare the models themselves, not cached results
+os.environ['PREDICTION_CACHE_SIZE'] = '0'
+
+import pandas as pd
+from check_scoring_parity import random_record
+from config import MODEL_PATHS
+from models.artifacts import manifest_path, write_artifact
+from models.ml_models import FEATURE_SPECS, ModelRegistry, predict_eligibility_batch
+
+
+def convert(trial_type, check_records, rng):
+    path = MODEL_PATHS[trial_type]
+    with open(path, 'rb') as f:
+        data = f.read()
+    model = pickle.loads(data)
+    written = write_artifact(trial_type, model, path, FEATURE_SPECS.get(trial_type), hashlib.sha256(data).hexdigest())
+
+    pickled = ModelRegistry({trial_type: path}, artifacts=False)
+    native = ModelRegistry({trial_type: path}, artifacts=True)
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        pickled.load_all(strict=True)
+        native.load_all(strict=True)
+    if native.get(trial_type).path != manifest_path(path):
+        os.remove(written)
+        print(f"❌ {trial_type}: the artifact could not be loaded back; keeping the pickle")
+        return False
+
+    records = pd.DataFrame([random_record(trial_type, rng) for _ in range(check_records)])
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        expected = predict_eligibility_batch(trial_type, records, registry=pickled)
+        actual = predict_eligibility_batch(trial_type, records, registry=native)
+    mismatches = sum(e != a for e, a in zip(expected, actual))
+    if mismatches:
+        os.remove(written)
+        print(f"❌ {trial_type}: the artifact disagrees with the pickle on {mismatches} of {check_records} records; "
+              f"keeping the pickle")
+        return False
+
+    print(f"✅ {trial_type}: {os.path.relpath(written)} ({check_records} records match the pickle)")
+    return True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert pickled models to native artifacts")
+    parser.add_argument('--trials', default=','.join(MODEL_PATHS), help="Comma-separated trial types")
+    parser.add_argument('--check-records', type=int, default=500, help="Random records scored to verify each artifact")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    failures = [trial_type for trial_type in args.trials.split(',') if not convert(trial_type, args.check_records, rng)]
+    if failures:
+        print(f"❌ Failed to convert: {', '.join(failures)}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,53 @@
+"""
+Create upcoming monthly patient partitions and optionally archive old ones.
+
+The app does the same at startup, but a long-running deployment should also run
+this periodically (e.g. daily from cron) so next month's partitions exist before
+rows arrive; rows outside every monthly partition fall into the slower default
+partition. Archived partitions are detached into the archive schema: they no
+longer show up in patient listings, exports or refresh_analytics_rollup().
+
+Usage:
+    python scripts/manage_partitions.py [--months-ahead N] [--archive-older-than N]
+"""
+import argparse
+import logging
+import os
+import sys
+
+# Ensure we can import config when running from backend/ or repo root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import psycopg2
+from config import PARTITION_MONTHS_AHEAD, PARTITION_ARCHIVE_MONTHS
+from database.migrate import connect
+from database.partitions import maintain_partitions
+from utils.log import configure_logging
+
+logger = logging.getLogger('manage_partitions')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Maintain the monthly patient table partitions")
+    parser.add_argument('--months-ahead', type=int, default=PARTITION_MONTHS_AHEAD,
+                        help="Months after the current one to create partitions for")
+    parser.add_argument('--archive-older-than', type=int, default=PARTITION_ARCHIVE_MONTHS, metavar='MONTHS',
+                        help="Detach partitions older than this many months into the archive schema (0 = never)")
+    args = parser.parse_args()
+
+    # Same structured lines as the app, so cron output can be shipped alongside it
+    configure_logging()
+    try:
+        conn = connect()
+    except psycopg2.Error:
+        logger.exception("Partition maintenance failed: cannot connect")
+        sys.exit(1)
+    try:
+        maintain_partitions(conn, args.months_ahead, args.archive_older_than)
+    except psycopg2.Error:
+        logger.exception("Partition maintenance failed")
+        sys.exit(1)
+    finally:
+        conn.close()
@@ -0,0 +1,41 @@
+"""
+Rebuild the analytics_daily rollup from the patient tables.
+
+The rollup is maintained by triggers as patients are inserted (they append
+deltas that are folded in after each write commits), so this is only needed to
+backfill an existing database or repair drift (e.g. after rows were changed
+with triggers disabled). Safe to run against a live database, for example from
+a periodic job: it does not block patient writes.
+
+Usage:
+    python scripts/refresh_analytics.py
+"""
+import os
+import sys
+
+# Ensure we can import config when running from backend/ or repo root
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import psycopg2
+from utils.db import db_connection
+
+
+def refresh():
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT refresh_analytics_rollup()")
+        total = cursor.fetchone()[0]
+        conn.commit()
+        cursor.close()
+    return total
+
+
+if __name__ == '__main__':
+    try:
+        total = refresh()
+    except psycopg2.Error as e:
+        print(f"❌ Analytics rollup refresh failed: {e}")
+        sys.exit(1)
+    print(f"✅ Analytics rollup rebuilt: {total} patients counted")
@@ -0,0 +1,19 @@
+import hmac
+from functools import wraps
+from flask import request, jsonify
+from config import ADMIN_API_TOKEN
+
+
+def require_admin_token(view):
+    """
+    Allow a state-changing admin endpoint only with X-Admin-Token equal to
+    ADMIN_API_TOKEN. With no token configured the endpoint is disabled.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_API_TOKEN:
+            return jsonify({'error': 'Admin API is disabled; set ADMIN_API_TOKEN to enable it'}), 403
+        if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_API_TOKEN):
+            return jsonify({'error': 'Invalid or missing admin token'}), 401
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,152 @@
+import logging
+import psycopg2
+from utils.query_builder import PATIENT_TABLES
+
+logger = logging.getLogger(__name__)
+
+# Days of per-day counts returned as recent trends
+TREND_DAYS = 30
+
+# Both sources produce rows of (trial_type, eligibility, day, patients, by_day):
+# per-eligibility totals (by_day = 0) and per-day counts for the trend window
+# (by_day = 1), in one pass via GROUPING SETS.
+GROUPED_COUNTS = """
+    SELECT trial_type, eligibility, day, SUM(patients)::bigint AS patients,
+           1 - GROUPING(day) AS by_day
+    FROM ({source}) counts
+    GROUP BY GROUPING SETS ((trial_type, eligibility), (trial_type, eligibility, day))
+    HAVING GROUPING(day) = 1 OR day >= (NOW() AT TIME ZONE 'UTC')::date - %s
+"""
+
+# The rollup plus the deltas patient writes appended since the last fold
+ROLLUP_SOURCE = """
+    SELECT trial_type, eligibility, day, patients
+    FROM analytics_daily
+    WHERE trial_type = ANY(%s)
+    UNION ALL
+    SELECT trial_type, eligibility, day, patients
+    FROM analytics_daily_delta
+    WHERE trial_type = ANY(%s)
+"""
+
+PATIENT_TABLE_SOURCE = """
+    SELECT '{trial_type}' AS trial_type, eligibility,
+           (created_at AT TIME ZONE 'UTC')::date AS day, 1 AS patients
+    FROM {table_name}
+"""
+
+
+def _table_status(cursor):
+    """Which patient tables exist, and whether the analytics_daily rollup (and its delta table) does"""
+    cursor.execute(
+        """
+        SELECT trial_type, to_regclass(table_name) IS NOT NULL AS available,
+               to_regclass('analytics_daily') IS NOT NULL
+                   AND to_regclass('analytics_daily_delta') IS NOT NULL AS has_rollup
+        FROM unnest(%s::text[], %s::text[]) AS trials(trial_type, table_name)
+        """,
+        (list(PATIENT_TABLES), list(PATIENT_TABLES.values()))
+    )
+    rows = cursor.fetchall()
+    available = [row[0] for row in rows if row[1]]
+    has_rollup = bool(rows) and rows[0][2]
+    return available, has_rollup
+
+
+def fetch_analytics(cursor):
+    """
+    Summary and recent trends for every trial in two statements.
+
+    Counts come from the analytics_daily rollup and its unfolded deltas, or from a single UNION ALL
+    over the patient tables when the rollup does not exist. A trial whose
+    table is missing or whose query fails is reported with status 'error'
+    and the reason, instead of being dropped.
+
+    Args:
+        cursor: Plain (tuple) cursor
+
+    Returns:
+        tuple: (summary list in PATIENT_TABLES order, trend rows newest first per trial)
+    """
+    status = {trial_type: {'status': 'error', 'error': f"table {table_name} does not exist"}
+              for trial_type, table_name in PATIENT_TABLES.items()}
+    counts = {}
+    trends = []
+
+    available, has_rollup = _table_status(cursor)
+    if available:
+        if has_rollup:
+            query = GROUPED_COUNTS.format(source=ROLLUP_SOURCE)
+            params = (available, available, TREND_DAYS)
+        else:
+            source = " UNION ALL ".join(
+                PATIENT_TABLE_SOURCE.format(trial_type=t, table_name=PATIENT_TABLES[t]) for t in available
+            )
+            query = GROUPED_COUNTS.format(source=source)
+            params = (TREND_DAYS,)
+
+        try:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            for trial_type in available:
+                status[trial_type] = {'status': 'ok'}
+        except psycopg2.Error as e:
+            cursor.connection.rollback()
+            rows = []
+            for trial_type in available:
+                status[trial_type] = {'status': 'error', 'error': str(e).strip()}
+
+        for trial_type, eligibility, day, patients, by_day in rows:
+            if by_day:
+                trends.append({'trial_type': trial_type, 'count': patients, 'eligibility': eligibility, 'date': day})
+            else:
+                counts.setdefault(trial_type, {})[eligibility] = patients
+
+    summary = []
+    for trial_type in PATIENT_TABLES:
+        item = {'trial_type': trial_type, **status[trial_type]}
+        if item['status'] == 'ok':
+            by_eligibility = counts.get(trial_type, {})
+            item.update({
+                'total_applications': sum(by_eligibility.values()),
+                'eligible': by_eligibility.get('Eligible', 0),
+                'ineligible': by_eligibility.get('Ineligible', 0)
+            })
+        else:
+            item.update({'total_applications': None, 'eligible': None, 'ineligible': None})
+        summary.append(item)
+
+    trial_order = list(PATIENT_TABLES)
+    trends = [row for row in trends if row['count'] > 0]
+    trends.sort(key=lambda row: row['date'], reverse=True)
+    trends.sort(key=lambda row: trial_order.index(row['trial_type']))
+    return summary, trends
+
+
+def fold_rollup_deltas(conn):
+    """
+    Fold the rollup deltas appended by committed patient writes into
+    analytics_daily, in a short transaction of its own. Call after committing
+    patient rows; the writes themselves never touch analytics_daily, so
+    concurrent uploads for one trial do not wait on each other. Skipped when
+    another fold is running, and a failure is only logged: unfolded deltas
+    are still counted by fetch_analytics and picked up by the next fold.
+
+    Args:
+        conn: Open connection with no transaction in progress
+
+    Returns:
+        int: Rollup rows updated, or None if the fold was skipped or failed
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT fold_analytics_deltas()")
+        folded = cursor.fetchone()[0]
+        conn.commit()
+        return folded
+    except psycopg2.Error:
+        conn.rollback()
+        logger.warning("Analytics rollup fold failed", exc_info=True)
+        return None
+    finally:
+        cursor.close()
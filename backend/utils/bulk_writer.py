@@ -0,0 +1,62 @@
+import psycopg2
+import psycopg2.extras
+from config import BULK_INSERT_PAGE_SIZE
+from utils.query_builder import execute_query, bulk_insert_query
+
+
+def insert_patients(cursor, trial_type, records, eligibilities, source, page_size=BULK_INSERT_PAGE_SIZE):
+    """
+    Insert screened patient rows with one multi-row INSERT ... RETURNING id per page.
+
+    Args:
+        cursor: Open cursor; the caller owns the transaction and commits it
+        trial_type (str): Trial whose patient table receives the rows
+        records (list): Patient data dicts, one per input row
+        eligibilities (list): Predicted eligibility per record
+        source (str): 'Organization' or 'Patient'
+        page_size (int): Rows per INSERT statement
+
+    Returns:
+        tuple: (inserted, failed) where inserted is a list of (position, patient_id)
+        and failed is a list of (position, error message), positions indexing records
+    """
+    query = bulk_insert_query(trial_type)
+    if not query:
+        return [], [(position, f"Unsupported trial type: {trial_type}") for position in range(len(records))]
+
+    inserted, failed = [], []
+    pending = []
+    for position, (patient_data, eligibility) in enumerate(zip(records, eligibilities)):
+        try:
+            pending.append((position, execute_query(trial_type, patient_data, eligibility, source)['values']))
+        except Exception as e:
+            failed.append((position, str(e)))
+
+    for start in range(0, len(pending), page_size):
+        page = pending[start:start + page_size]
+        try:
+            ids = _insert_page(cursor, query, [values for _, values in page])
+            inserted.extend(zip([position for position, _ in page], ids))
+        except psycopg2.Error:
+            # One bad row rejects the whole statement; retry row by row to isolate it
+            for position, values in page:
+                try:
+                    inserted.append((position, _insert_page(cursor, query, [values])[0]))
+                except psycopg2.Error as e:
+                    failed.append((position, str(e).strip()))
+
+    failed.sort()
+    return inserted, failed
+
+
+def _insert_page(cursor, query, rows):
+    """Insert rows inside a savepoint so a failure leaves the transaction usable"""
+    cursor.execute("SAVEPOINT bulk_insert")
+    try:
+        # PostgreSQL returns ids for INSERT ... VALUES in VALUES order
+        result = psycopg2.extras.execute_values(cursor, query, rows, page_size=len(rows), fetch=True)
+    except psycopg2.Error:
+        cursor.execute("ROLLBACK TO SAVEPOINT bulk_insert")
+        raise
+    cursor.execute("RELEASE SAVEPOINT bulk_insert")
+    return [row[0] for row in result]
@@ -0,0 +1,81 @@
+import csv
+import io
+import psycopg2
+from flask import Response
+from config import EXPORT_FETCH_SIZE
+from utils.db import get_db_connection
+
+
+def csv_response(query, params, header, filename, fetch_size=EXPORT_FETCH_SIZE):
+    """
+    Stream a query's rows to the client as a CSV download.
+
+    Rows are read through a server-side (named) cursor fetch_size at a time
+    and written out as they arrive, so memory stays flat however many rows
+    the query returns. The pooled connection is held until the stream ends
+    or the response is closed, which the server also does when the client
+    disconnects before the body is read.
+
+    Args:
+        query (str): SELECT producing the rows, in header order
+        params (tuple): Query parameters
+        header (list): CSV header row
+        filename (str): Download file name
+        fetch_size (int): Rows fetched per round trip
+
+    Returns:
+        Response: Streaming text/csv response
+
+    Raises:
+        psycopg2.Error: If the connection fails or the query is rejected;
+            raised before any output is sent
+    """
+    conn = get_db_connection()
+    if conn is None:
+        raise psycopg2.OperationalError("Database connection failed")
+
+    try:
+        cursor = conn.cursor(name='csv_export')
+        cursor.itersize = fetch_size
+        cursor.execute(query, params)
+        # Fetch the first batch here so query errors surface as a normal error response
+        first = cursor.fetchmany(fetch_size)
+    except Exception:
+        conn.close()
+        raise
+
+    def release():
+        # Called when the stream ends and again when the response closes
+        if conn.closed:
+            return
+        try:
+            cursor.close()
+            conn.rollback()
+        except psycopg2.Error:
+            pass
+        conn.close()
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        try:
+            writer.writerow(header)
+            rows = first
+            while rows:
+                writer.writerows(rows)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                rows = cursor.fetchmany(fetch_size)
+        finally:
+            release()
+
+    response = Response(
+        generate(),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+    # A generator that never started has no finally to run; closing the
+    # response returns the connection without waiting for garbage collection
+    response.call_on_close(release)
+    return response
@@ -1,28 +1,231 @@
+import logging
 import psycopg2
+import psycopg2.pool
 import os
-from config import DB_CONFIG # <-- Import the local config
+import threading
+import time
+from contextlib import contextmanager
+from config import DB_CONFIG, DB_POOL_MIN, DB_POOL_MAX, DB_POOL_TIMEOUT, DB_POOL_CHECK_IDLE
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """Raised when no pooled connection frees up within DB_POOL_TIMEOUT seconds"""
+
+
+class ConnectionPool:
+    """
+    Blocking, thread-safe wrapper around psycopg2's ThreadedConnectionPool.
+    Callers wait for a free connection instead of failing when the pool is
+    exhausted, idle connections are health-checked on checkout, and usage
+    counters are kept for pool_stats().
+    """
+
+    def __init__(self, minconn, maxconn, timeout, check_idle, *args, **kwargs):
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.check_idle = check_idle
+        self._pool = psycopg2.pool.ThreadedConnectionPool(minconn, maxconn, *args, **kwargs)
+        # psycopg2 closes returned connections once minconn are idle; after the
+        # initial minconn connects, keep every returned connection instead
+        self._pool.minconn = maxconn
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._last_used = {}
+        self._stats = {
+            'in_use': 0,
+            'waiting': 0,
+            'checkouts': 0,
+            'timeouts': 0,
+            'discarded': 0,
+            'wait_seconds_total': 0.0,
+            'wait_seconds_max': 0.0,
+        }
+
+    def getconn(self):
+        """Check out a healthy connection, waiting up to timeout seconds for a free slot"""
+        started = time.monotonic()
+        with self._lock:
+            self._stats['waiting'] += 1
+        acquired = self._slots.acquire(timeout=self.timeout)
+        waited = time.monotonic() - started
+        with self._lock:
+            self._stats['waiting'] -= 1
+            self._stats['wait_seconds_total'] += waited
+            self._stats['wait_seconds_max'] = max(self._stats['wait_seconds_max'], waited)
+            if not acquired:
+                self._stats['timeouts'] += 1
+        if not acquired:
+            raise PoolTimeout(f"No database connection available after {self.timeout}s")
+
+        try:
+            conn = self._pool.getconn()
+            while not self._healthy(conn):
+                self._discard(conn)
+                conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats['in_use'] += 1
+            self._stats['checkouts'] += 1
+        return conn
+
+    def putconn(self, conn):
+        """Return a connection; psycopg2 rolls back any open transaction"""
+        self._last_used[id(conn)] = time.monotonic()
+        try:
+            self._pool.putconn(conn, close=bool(conn.closed))
+        finally:
+            with self._lock:
+                self._stats['in_use'] -= 1
+            self._slots.release()
+
+    def closeall(self):
+        self._pool.closeall()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['max'] = self.maxconn
+        stats['idle'] = len(self._pool._pool)
+        return stats
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is None or time.monotonic() - last_used < self.check_idle:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        self._last_used.pop(id(conn), None)
+        self._pool.putconn(conn, close=True)
+        with self._lock:
+            self._stats['discarded'] += 1
+
+
+class PooledConnection:
+    """
+    Proxy for a pooled psycopg2 connection. Behaves like the connection, except
+    close() hands it back to the pool instead of closing the socket.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    @property
+    def closed(self):
+        return self._conn is None or self._conn.closed
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.putconn(conn)
+
+    def __del__(self):
+        # Safety net for handlers that return early without closing
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+# Pools inherited across a fork. Their connections share sockets with the
+# parent, and closing one from the child terminates the parent's session, so
+# they are kept referenced here and never closed or collected in the child.
+_inherited_pools = []
+
+
+def get_pool():
+    """Return this process's connection pool, creating it on first use (and after a fork)"""
+    global _pool, _pool_pid
+    if _pool is not None and _pool_pid == os.getpid():
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            if _pool is not None:
+                _inherited_pools.append(_pool)
+            # Priority 1: Use DATABASE_URL from environment (for Render, Heroku, etc.)
+            db_url = os.environ.get('DATABASE_URL')
+            if db_url:
+                logger.info("Creating connection pool", extra={'source': 'DATABASE_URL'})
+                _pool = ConnectionPool(DB_POOL_MIN, DB_POOL_MAX, DB_POOL_TIMEOUT, DB_POOL_CHECK_IDLE, db_url)
+            else:
+                # Priority 2: Fallback to DB_CONFIG from config.py (for local development)
+                logger.info("Creating connection pool", extra={'source': 'DB_CONFIG'})
+                _pool = ConnectionPool(DB_POOL_MIN, DB_POOL_MAX, DB_POOL_TIMEOUT, DB_POOL_CHECK_IDLE, **DB_CONFIG)
+            _pool_pid = os.getpid()
+            logger.info("Database connection pool ready", extra={'max_connections': DB_POOL_MAX})
+    return _pool
+
+
+def close_pool():
+    """
+    Close this process's pool if it created one. The gunicorn master calls this
+    after loading the app and before forking, so workers start without
+    inherited connections and open their own pool on first use.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.closeall()
+            _pool, _pool_pid = None, None
+            logger.info("Database connection pool closed")
+
 
 def get_db_connection():
-    
-    conn = None
+    """
+    Check out a pooled connection. Call close() on it (or use db_connection())
+    to return it to the pool. Returns None if the database is unavailable.
+    """
     try:
-        # Priority 1: Use DATABASE_URL from environment (for Render, Heroku, etc.)
-        db_url = os.environ.get('DATABASE_URL')
-
-        if db_url:
-            print("▶️ Connecting via DATABASE_URL...")
-            conn = psycopg2.connect(db_url)
-        else:
-            # Priority 2: Fallback to DB_CONFIG from config.py (for local development)
-            print("▶️ DATABASE_URL not found. Connecting via local DB_CONFIG...")
-            conn = psycopg2.connect(**DB_CONFIG)
-        
-        print("✅ Database connection successful!")
-        return conn
+        pool = get_pool()
+        return PooledConnection(pool, pool.getconn())
 
     except psycopg2.OperationalError as err:
-        print(f"❌ Database connection error: {err}")
+        logger.error("Database connection error", extra={'error': str(err)})
         return None
     except Exception as err:
-        print(f"❌ An unexpected error occurred: {err}")
-        return None
\ No newline at end of file
+        logger.exception("Unexpected error getting a database connection")
+        return None
+
+
+@contextmanager
+def db_connection():
+    """
+    Context manager yielding a pooled connection and returning it to the pool on
+    exit; uncommitted work is rolled back. Raises psycopg2.OperationalError if
+    no connection can be obtained.
+    """
+    conn = get_db_connection()
+    if conn is None:
+        raise psycopg2.OperationalError("Database connection failed")
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def pool_stats():
+    """Current pool metrics: in-use, idle, waiting, checkouts and wait times"""
+    if _pool is None or _pool_pid != os.getpid():
+        return {'in_use': 0, 'idle': 0, 'waiting': 0, 'max': DB_POOL_MAX}
+    return _pool.stats()
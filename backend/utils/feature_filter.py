@@ -1,104 +1,195 @@
+import logging
 import pandas as pd
+from utils.log import Sampler
+
+logger = logging.getLogger(__name__)
+
+# Missing-feature warnings for single records: the first per model and feature, then one in 1000
+_missing_sampler = Sampler(every=1000)
+
+# Canonical features each trial model expects
+MODEL_FEATURES = {
+    'hypertension': [
+        'age', 'gender', 'bmi', 'glucose', 'lifestyle_risk', 'stress_level',
+        'systolic_bp', 'diastolic_bp', 'cholesterol_total', 'comorbidities', 'consent'
+    ],
+    'arthritis': [
+        'age', 'years_since_diagnosis', 'tender_joint_count', 'swollen_joint_count',
+        'crp_level', 'patient_pain_score', 'egfr', 'on_biologic_dmards', 'has_hepatitis'
+    ],
+    'migraine': [
+        'age', 'migraine_frequency', 'previous_medication_failures', 'liver_enzyme_level',
+        'has_aura', 'chronic_kidney_disease', 'on_anticoagulants', 'sleep_disorder',
+        'depression', 'caffeine_intake'
+    ],
+    'phase1': [
+        'age', 'sex', 'weight_kg', 'height_cm', 'bmi', 'cohort',
+        'alt', 'creatinine', 'sbp', 'dbp', 'hr', 'temp_c', 'adverse_event'
+    ]
+}
+
+# Accepted column aliases for each canonical feature, probed in order
+FEATURE_MAPPINGS = {
+    'age': ['age', 'Age', 'AGE', 'patient_age'],
+    'gender': ['gender', 'Gender', 'GENDER', 'sex', 'Sex', 'SEX'],
+    'bmi': ['bmi', 'BMI', 'body_mass_index', 'Body_Mass_Index'],
+    'glucose': ['glucose', 'Glucose', 'GLUCOSE', 'blood_glucose', 'Blood_Glucose'],
+    'lifestyle_risk': ['lifestyle_risk', 'Lifestyle_Risk', 'lifestyle_risk_level'],
+    'stress_level': ['stress_level', 'Stress_Level', 'stress'],
+    'systolic_bp': ['systolic_bp', 'Systolic_BP', 'sbp', 'SBP', 'systolic'],
+    'diastolic_bp': ['diastolic_bp', 'Diastolic_BP', 'dbp', 'DBP', 'diastolic'],
+    'cholesterol_total': ['cholesterol_total', 'Cholesterol_Total', 'total_cholesterol'],
+    'comorbidities': ['comorbidities', 'Comorbidities', 'comorbidity_count'],
+    'consent': ['consent', 'Consent', 'CONSENT'],
+
+    'years_since_diagnosis': ['years_since_diagnosis', 'Years_Since_Diagnosis'],
+    'tender_joint_count': ['tender_joint_count', 'Tender_Joint_Count'],
+    'swollen_joint_count': ['swollen_joint_count', 'Swollen_Joint_Count'],
+    'crp_level': ['crp_level', 'CRP_Level', 'crp', 'CRP'],
+    'patient_pain_score': ['patient_pain_score', 'Patient_Pain_Score', 'pain_score'],
+    'egfr': ['egfr', 'eGFR', 'EGFR'],
+    'on_biologic_dmards': ['on_biologic_dmards', 'On_Biologic_DMARDs', 'biologic_dmards'],
+    'has_hepatitis': ['has_hepatitis', 'Has_Hepatitis', 'hepatitis'],
+
+    'migraine_frequency': ['migraine_frequency', 'Migraine_Frequency'],
+    'previous_medication_failures': ['previous_medication_failures', 'Previous_Medication_Failures'],
+    'liver_enzyme_level': ['liver_enzyme_level', 'Liver_Enzyme_Level'],
+    'has_aura': ['has_aura', 'Has_Aura', 'aura'],
+    'chronic_kidney_disease': ['chronic_kidney_disease', 'Chronic_Kidney_Disease'],
+    'on_anticoagulants': ['on_anticoagulants', 'On_Anticoagulants'],
+    'sleep_disorder': ['sleep_disorder', 'Sleep_Disorder'],
+    'depression': ['depression', 'Depression'],
+    'caffeine_intake': ['caffeine_intake', 'Caffeine_Intake'],
+
+    'sex': ['sex', 'Sex', 'SEX', 'gender', 'Gender'],
+    'weight_kg': ['weight_kg', 'Weight_kg', 'weight', 'Weight'],
+    'height_cm': ['height_cm', 'Height_cm', 'height', 'Height'],
+    'cohort': ['cohort', 'Cohort'],
+    'alt': ['alt', 'ALT'],
+    'creatinine': ['creatinine', 'Creatinine'],
+    'hr': ['hr', 'HR', 'heart_rate', 'Heart_Rate'],
+    'temp_c': ['temp_c', 'Temp_C', 'temperature', 'Temperature'],
+    'adverse_event': ['adverse_event', 'Adverse_Event', 'AdverseEvent']
+}
+
+
+def _default_value(feature):
+    """Value substituted when a feature is missing or NaN."""
+    if feature in ['gender', 'consent']:
+        return 'Male' if feature == 'gender' else 'Yes'
+    return 0
+
+
+class FeaturePipeline:
+    """
+    Alias resolution for one model, compiled once. Every accepted alias maps to
+    (feature slot, priority), so resolving an incoming header is a single pass
+    over its columns; the resulting plan is cached per distinct header.
+    """
+
+    MAX_CACHED_PLANS = 256
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self.features = list(MODEL_FEATURES[model_name])
+        self.defaults = [_default_value(feature) for feature in self.features]
+        self._aliases = {}
+        for slot, feature in enumerate(self.features):
+            for priority, alias in enumerate(FEATURE_MAPPINGS.get(feature, [feature])):
+                self._aliases.setdefault(alias, []).append((slot, priority))
+        self._plans = {}
+
+    def plan(self, header):
+        """
+        Return, for each feature in order, the position in header of the column
+        to read it from (the highest-priority alias present), or None if absent.
+        """
+        header = tuple(header)
+        plan = self._plans.get(header)
+        if plan is not None:
+            return plan
+
+        best = [None] * len(self.features)
+        positions = [None] * len(self.features)
+        for position, column in enumerate(header):
+            for slot, priority in self._aliases.get(column, ()):
+                if best[slot] is None or priority < best[slot]:
+                    best[slot] = priority
+                    positions[slot] = position
+        plan = tuple(positions)
+
+        if len(self._plans) >= self.MAX_CACHED_PLANS:
+            self._plans.clear()
+        self._plans[header] = plan
+        return plan
+
+    def filter(self, input_data):
+        """Pick this model's features out of a dict, substituting defaults for missing values"""
+        keys = tuple(input_data)
+        filtered_data = {}
+        for feature, default, position in zip(self.features, self.defaults, self.plan(keys)):
+            value = input_data[keys[position]] if position is not None else None
+            if value is None or (isinstance(value, float) and pd.isna(value)):
+                value = default
+                occurrences = _missing_sampler((self.model_name, feature))
+                if occurrences:
+                    logger.warning("Missing feature, using default", extra={
+                        'model': self.model_name, 'feature': feature, 'default': default, 'occurrences': occurrences
+                    })
+            filtered_data[feature] = value
+        return filtered_data
+
+    def filter_frame(self, df):
+        """Column-wise filter of a DataFrame, one output column per feature"""
+        columns = {}
+        filled = {}
+        for feature, default, position in zip(self.features, self.defaults, self.plan(df.columns)):
+            if position is None:
+                columns[feature] = pd.Series(default, index=df.index)
+                filled[feature] = len(df)
+                continue
+
+            series = df.iloc[:, position]
+            missing = series.isna()
+            if missing.any():
+                series = series.where(~missing, default)
+                filled[feature] = int(missing.sum())
+            columns[feature] = series
+
+        # One summary per batch rather than a warning per row
+        if filled and len(df):
+            logger.warning("Missing features filled with defaults", extra={
+                'model': self.model_name, 'rows': len(df), 'filled': filled
+            })
+        return pd.DataFrame(columns, index=df.index)
+
+
+# Compiled once at import so request handlers only look up cached plans
+FEATURE_PIPELINES = {model_name: FeaturePipeline(model_name) for model_name in MODEL_FEATURES}
+
+
+def get_feature_pipeline(model_name):
+    """Return the compiled FeaturePipeline for a model"""
+    pipeline = FEATURE_PIPELINES.get(model_name)
+    if pipeline is None:
+        raise ValueError(f"Unknown model name: {model_name}")
+    return pipeline
+
 
 def filter_features_for_model(input_data, model_name):
     """
     Filter input data to only include features required by the specific ML model.
     Handles case variations, extra columns, and missing values.
     """
+    filtered_data = get_feature_pipeline(model_name).filter(input_data)
+    logger.debug("Filtered %d features for %s", len(filtered_data), model_name)
+    return filtered_data
 
-    model_features = {
-        'hypertension': [
-            'age', 'gender', 'bmi', 'glucose', 'lifestyle_risk', 'stress_level',
-            'systolic_bp', 'diastolic_bp', 'cholesterol_total', 'comorbidities', 'consent'
-        ],
-        'arthritis': [
-            'age', 'years_since_diagnosis', 'tender_joint_count', 'swollen_joint_count',
-            'crp_level', 'patient_pain_score', 'egfr', 'on_biologic_dmards', 'has_hepatitis'
-        ],
-        'migraine': [
-            'age', 'migraine_frequency', 'previous_medication_failures', 'liver_enzyme_level',
-            'has_aura', 'chronic_kidney_disease', 'on_anticoagulants', 'sleep_disorder',
-            'depression', 'caffeine_intake'
-        ],
-        'phase1': [
-            'age', 'sex', 'weight_kg', 'height_cm', 'bmi', 'cohort',
-            'alt', 'creatinine', 'sbp', 'dbp', 'hr', 'temp_c', 'adverse_event'
-        ]
-    }
-
-    required_features = model_features.get(model_name)
-    if not required_features:
-        raise ValueError(f"Unknown model name: {model_name}")
 
-    feature_mappings = {
-        'age': ['age', 'Age', 'AGE', 'patient_age'],
-        'gender': ['gender', 'Gender', 'GENDER', 'sex', 'Sex', 'SEX'],
-        'bmi': ['bmi', 'BMI', 'body_mass_index', 'Body_Mass_Index'],
-        'glucose': ['glucose', 'Glucose', 'GLUCOSE', 'blood_glucose', 'Blood_Glucose'],
-        'lifestyle_risk': ['lifestyle_risk', 'Lifestyle_Risk', 'lifestyle_risk_level'],
-        'stress_level': ['stress_level', 'Stress_Level', 'stress'],
-        'systolic_bp': ['systolic_bp', 'Systolic_BP', 'sbp', 'SBP', 'systolic'],
-        'diastolic_bp': ['diastolic_bp', 'Diastolic_BP', 'dbp', 'DBP', 'diastolic'],
-        'cholesterol_total': ['cholesterol_total', 'Cholesterol_Total', 'total_cholesterol'],
-        'comorbidities': ['comorbidities', 'Comorbidities', 'comorbidity_count'],
-        'consent': ['consent', 'Consent', 'CONSENT'],
-
-        'years_since_diagnosis': ['years_since_diagnosis', 'Years_Since_Diagnosis'],
-        'tender_joint_count': ['tender_joint_count', 'Tender_Joint_Count'],
-        'swollen_joint_count': ['swollen_joint_count', 'Swollen_Joint_Count'],
-        'crp_level': ['crp_level', 'CRP_Level', 'crp', 'CRP'],
-        'patient_pain_score': ['patient_pain_score', 'Patient_Pain_Score', 'pain_score'],
-        'egfr': ['egfr', 'eGFR', 'EGFR'],
-        'on_biologic_dmards': ['on_biologic_dmards', 'On_Biologic_DMARDs', 'biologic_dmards'],
-        'has_hepatitis': ['has_hepatitis', 'Has_Hepatitis', 'hepatitis'],
-
-        'migraine_frequency': ['migraine_frequency', 'Migraine_Frequency'],
-        'previous_medication_failures': ['previous_medication_failures', 'Previous_Medication_Failures'],
-        'liver_enzyme_level': ['liver_enzyme_level', 'Liver_Enzyme_Level'],
-        'has_aura': ['has_aura', 'Has_Aura', 'aura'],
-        'chronic_kidney_disease': ['chronic_kidney_disease', 'Chronic_Kidney_Disease'],
-        'on_anticoagulants': ['on_anticoagulants', 'On_Anticoagulants'],
-        'sleep_disorder': ['sleep_disorder', 'Sleep_Disorder'],
-        'depression': ['depression', 'Depression'],
-        'caffeine_intake': ['caffeine_intake', 'Caffeine_Intake'],
-
-        'sex': ['sex', 'Sex', 'SEX', 'gender', 'Gender'],
-        'weight_kg': ['weight_kg', 'Weight_kg', 'weight', 'Weight'],
-        'height_cm': ['height_cm', 'Height_cm', 'height', 'Height'],
-        'cohort': ['cohort', 'Cohort'],
-        'alt': ['alt', 'ALT'],
-        'creatinine': ['creatinine', 'Creatinine'],
-        'hr': ['hr', 'HR', 'heart_rate', 'Heart_Rate'],
-        'temp_c': ['temp_c', 'Temp_C', 'temperature', 'Temperature'],
-        'adverse_event': ['adverse_event', 'Adverse_Event', 'AdverseEvent']
-    }
-
-    filtered_data = {}
-
-    for feature in required_features:
-        value = None
-        possible_keys = feature_mappings.get(feature, [feature])
-
-        for possible_key in possible_keys:
-            if possible_key in input_data:
-                value = input_data[possible_key]
-                break
-
-        if value is None or (isinstance(value, float) and pd.isna(value)):
-            if feature in ['gender', 'consent']:
-                value = 'Male' if feature == 'gender' else 'Yes'
-            elif feature in ['sex']:
-                value = 0
-            elif feature in ['on_biologic_dmards', 'has_hepatitis', 'has_aura',
-                             'chronic_kidney_disease', 'on_anticoagulants',
-                             'sleep_disorder', 'depression', 'adverse_event']:
-                value = 0
-            else:
-                value = 0
-
-            print(f"⚠️ Missing feature '{feature}' for {model_name}, using default: {value}")
-
-        filtered_data[feature] = value
-
-    print(f"🔍 Filtered {len(filtered_data)} features for {model_name}: {list(filtered_data.keys())}")
-    return filtered_data
+def filter_feature_frame(df, model_name):
+    """
+    Column-wise counterpart of filter_features_for_model for a whole DataFrame.
+    Resolves aliases once against the header and fills missing values per column,
+    returning one column per required feature in the model's feature order.
+    """
+    return get_feature_pipeline(model_name).filter_frame(df)
@@ -0,0 +1,139 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from config import LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE
+
+# LogRecord attributes that are not user-supplied fields
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any extra= fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development, with extra= fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        fields = [f"{key}={value}" for key, value in vars(record).items() if key not in _RECORD_ATTRS]
+        return f"{line} {' '.join(fields)}" if fields else line
+
+
+class AsyncHandler(logging.Handler):
+    """
+    Hands records to a bounded queue drained by a background thread, so a log
+    call never waits on stdout. When the queue is full the record is dropped and
+    counted rather than blocking the request. The queue and thread are recreated
+    after a fork, since a forked gunicorn worker inherits neither thread.
+    """
+
+    def __init__(self, target, maxsize):
+        super().__init__()
+        self.target = target
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._queue = None
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            # Format here: args may reference objects that change after the call
+            record.msg = record.getMessage()
+            record.args = None
+            record.exc_text = self.target.formatter.formatException(record.exc_info) if record.exc_info else None
+            record.exc_info = None
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+        super().close()
+
+    def _start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(self.maxsize)
+            self._listener = logging.handlers.QueueListener(self._queue, self.target)
+            self._listener.start()
+            self._pid = os.getpid()
+
+
+class Sampler:
+    """
+    Decides whether to log a repeated per-row event: the first occurrence of
+    each key is let through, then one in every `every`. Counts are approximate
+    under concurrency, which is fine for diagnostics.
+    """
+
+    def __init__(self, every=1000):
+        self.every = every
+        self._counts = {}
+
+    def __call__(self, key):
+        """Return the number of occurrences so far if this one should be logged, else 0"""
+        count = self._counts.get(key, 0) + 1
+        self._counts[key] = count
+        return count if count == 1 or count % self.every == 0 else 0
+
+
+_handler = None
+
+
+def configure_logging(level=LOG_LEVEL, fmt=LOG_FORMAT):
+    """
+    Route the root logger through a non-blocking AsyncHandler writing to stdout.
+    Safe to call more than once; later calls only change the level.
+
+    Args:
+        level (str): Minimum level, e.g. 'INFO' or 'DEBUG'
+        fmt (str): 'json' for structured lines, 'text' for human-readable ones
+    """
+    global _handler
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    if _handler is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+    _handler = AsyncHandler(stream, LOG_QUEUE_SIZE)
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(_handler)
+
+
+def logging_stats():
+    """Records dropped because the log queue was full"""
+    return {'dropped': _handler.dropped if _handler is not None else 0}
@@ -0,0 +1,109 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import request, Response
+from prometheus_client import CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import multiprocess
+from config import MODEL_PATHS, SERVER_TIMING
+
+# Per-request stage durations in seconds, accumulated by name; None outside requests
+_timings = ContextVar('request_timings', default=None)
+
+# Sub-millisecond resolution for stages, request buckets up to a long upload
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float('inf'))
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, float('inf'))
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint and trial',
+    ['endpoint', 'method', 'status', 'trial'], buckets=REQUEST_BUCKETS
+)
+STAGE_LATENCY = Histogram(
+    'request_stage_duration_seconds', 'Time spent per request stage',
+    ['endpoint', 'stage'], buckets=STAGE_BUCKETS
+)
+DB_LATENCY = Histogram(
+    'db_operation_duration_seconds', 'Database connection checkout, insert and commit time',
+    ['operation'], buckets=STAGE_BUCKETS
+)
+INFERENCES = Counter('model_inferences_total', 'Rows scored by the eligibility models', ['trial', 'path'])
+
+
+@contextmanager
+def stage(name, db=False):
+    """
+    Time a block as one stage of the current request. Repeated stages (e.g. one
+    per upload chunk) add up. With db=True the time also counts towards the
+    database histogram, inside or outside a request.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        timings = _timings.get()
+        if timings is not None:
+            timings['stages'][name] = timings['stages'].get(name, 0.0) + elapsed
+        if db:
+            DB_LATENCY.labels(name).observe(elapsed)
+
+
+def timed_iter(iterable, name):
+    """Yield from iterable, timing each step as stage name (e.g. reading file chunks)"""
+    iterator = iter(iterable)
+    while True:
+        with stage(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def set_trial(trial_type):
+    """Label the current request's latency with its trial (unknown trials share one label)"""
+    timings = _timings.get()
+    if timings is not None:
+        timings['trial'] = trial_type if trial_type in MODEL_PATHS else 'other'
+
+
+def record_inference(trial_type, path, rows=1):
+    """Count rows scored by a model; path is 'single', 'fast' or 'batch'"""
+    INFERENCES.labels(trial_type, path).inc(rows)
+
+
+def metrics_response():
+    """Prometheus exposition of this process, or of every worker in multiprocess mode"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def register_metrics(app):
+    """Time every request, export the stages as Server-Timing and record the histograms"""
+
+    @app.before_request
+    def start_timing():
+        _timings.set({'started': time.perf_counter(), 'stages': {}, 'trial': 'none'})
+
+    @app.after_request
+    def finish_timing(response):
+        timings = _timings.get()
+        if timings is None:
+            return response
+        _timings.set(None)
+        total = time.perf_counter() - timings['started']
+        endpoint = request.endpoint or 'unmatched'
+
+        REQUEST_LATENCY.labels(endpoint, request.method, response.status_code, timings['trial']).observe(total)
+        for name, seconds in timings['stages'].items():
+            STAGE_LATENCY.labels(endpoint, name).observe(seconds)
+
+        if SERVER_TIMING:
+            entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings['stages'].items()]
+            entries.append(f"total;dur={total * 1000:.2f}")
+            response.headers['Server-Timing'] = ', '.join(entries)
+        return response
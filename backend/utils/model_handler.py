@@ -1,16 +1,16 @@
-import os
-import pickle
 import pandas as pd
-from pathlib import Path
 import logging
+from models.ml_models import REGISTRY, ModelRegistry, predict_eligibility_fast, predict_eligibility_batch
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ModelHandler:
     """
-    Handles loading and prediction for ML models used in virtual patient recruitment
+    Handles loading and prediction for ML models used in virtual patient recruitment.
+
+    A thin interface over the shared ModelRegistry in models.ml_models, so the
+    models are unpickled once per process and scored with the same feature
+    ordering as the routes.
     """
     
     def __init__(self, model_paths=None):
@@ -18,38 +18,23 @@ class ModelHandler:
         Initialize ModelHandler with model paths
         
         Args:
-            model_paths (dict): Dictionary mapping model names to file paths
+            model_paths (dict): Dictionary mapping model names to file paths.
+                Defaults to the shared registry built from config.MODEL_PATHS.
         """
-        self.model_paths = model_paths or {}
-        self.models = {}
-        self.feature_orders = {}
+        self.registry = ModelRegistry(model_paths) if model_paths else REGISTRY
+        self.model_paths = self.registry.model_paths
         
     def load_models(self):
         """Load all ML models from specified paths"""
-        loaded_count = 0
-        
-        for model_name, path in self.model_paths.items():
-            try:
-                if os.path.exists(path):
-                    with open(path, 'rb') as f:
-                        self.models[model_name] = pickle.load(f)
-                    logger.info(f"✓ Loaded {model_name} model successfully from {path}")
-                    loaded_count += 1
-                else:
-                    logger.warning(f"⚠ Warning: {model_name} model file not found at {path}")
-            except Exception as e:
-                logger.error(f"❌ Error loading {model_name} model: {e}")
-        
-        logger.info(f"📊 Loaded {loaded_count}/{len(self.model_paths)} models successfully")
-        return loaded_count
+        return self.registry.load_all()
     
     def get_loaded_models(self):
         """Return list of successfully loaded model names"""
-        return list(self.models.keys())
+        return self.registry.loaded()
     
     def is_model_loaded(self, model_name):
         """Check if a specific model is loaded"""
-        return model_name in self.models
+        return self.registry.get(model_name) is not None
     
     def predict_eligibility(self, model_name, features):
         """
@@ -62,29 +47,7 @@ class ModelHandler:
         Returns:
             str: 'Eligible' or 'Ineligible'
         """
-        if model_name not in self.models:
-            logger.error(f"Model {model_name} not found in loaded models")
-            return 'Ineligible'
-        
-        try:
-            model = self.models[model_name]
-            
-            # Convert features to the format expected by the model
-            # Features should be in the same order as training data
-            feature_array = [list(features.values())]
-            
-            # Make prediction
-            prediction = model.predict(feature_array)[0]
-            
-            # Convert prediction to eligibility status
-            eligibility = 'Eligible' if prediction == 1 else 'Ineligible'
-            
-            logger.info(f"Prediction for {model_name}: {eligibility}")
-            return eligibility
-            
-        except Exception as e:
-            logger.error(f"Prediction error for {model_name}: {e}")
-            return 'Ineligible'
+        return predict_eligibility_fast(model_name, features, registry=self.registry)
     
     def batch_predict(self, model_name, features_list):
         """
@@ -97,20 +60,9 @@ class ModelHandler:
         Returns:
             list: List of eligibility predictions
         """
-        if model_name not in self.models:
-            logger.error(f"Model {model_name} not found in loaded models")
-            return ['Ineligible'] * len(features_list)
-        
-        results = []
-        for i, features in enumerate(features_list):
-            try:
-                result = self.predict_eligibility(model_name, features)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Error predicting for patient {i+1}: {e}")
-                results.append('Ineligible')
-        
-        return results
+        if not features_list:
+            return []
+        return predict_eligibility_batch(model_name, pd.DataFrame(features_list), registry=self.registry)
     
     def get_model_info(self, model_name):
         """
@@ -122,16 +74,13 @@ class ModelHandler:
         Returns:
             dict: Model information
         """
-        if model_name not in self.models:
+        entry = self.registry.get(model_name)
+        if entry is None:
             return {"error": f"Model {model_name} not loaded"}
         
-        model = self.models[model_name]
-        
-        info = {
-            "model_name": model_name,
-            "model_type": type(model).__name__,
-            "is_loaded": True
-        }
+        model = entry.model
+        info = entry.info()
+        info["is_loaded"] = True
         
         # Try to get additional model information
         try:
@@ -177,7 +126,8 @@ class ModelHandler:
     
     def reload_model(self, model_name):
         """
-        Reload a specific model
+        Reload a specific model. The new version replaces the old one
+        atomically; requests already using the old model finish with it.
         
         Args:
             model_name (str): Name of the model to reload
@@ -185,24 +135,7 @@ class ModelHandler:
         Returns:
             bool: True if successful, False otherwise
         """
-        if model_name not in self.model_paths:
-            logger.error(f"No path configured for model {model_name}")
-            return False
-        
-        path = self.model_paths[model_name]
-        
-        try:
-            if os.path.exists(path):
-                with open(path, 'rb') as f:
-                    self.models[model_name] = pickle.load(f)
-                logger.info(f"✓ Reloaded {model_name} model successfully")
-                return True
-            else:
-                logger.error(f"Model file not found at {path}")
-                return False
-        except Exception as e:
-            logger.error(f"Error reloading {model_name} model: {e}")
-            return False
+        return self.registry.reload(model_name)
 
 # Global model handler instance
 _model_handler = None
@@ -216,9 +149,9 @@ def get_model_handler():
     """
     global _model_handler
     if _model_handler is None:
-        from config import MODEL_PATHS
-        _model_handler = ModelHandler(MODEL_PATHS)
-        _model_handler.load_models()
+        _model_handler = ModelHandler()
+        if not _model_handler.get_loaded_models():
+            _model_handler.load_models()
     return _model_handler
 
 def predict_eligibility(model_name, features):
@@ -249,9 +182,7 @@ def get_loaded_models():
 if __name__ == "__main__":
     # Test the model handler
     try:
-        from config import MODEL_PATHS
-        
-        handler = ModelHandler(MODEL_PATHS)
+        handler = ModelHandler()
         loaded = handler.load_models()
         
         print(f"Loaded {loaded} models")
@@ -0,0 +1,40 @@
+import base64
+from datetime import datetime
+
+# Keyset cursors for listings ordered by (created_at, id) DESC
+
+
+def encode_cursor(created_at, row_id):
+    """Opaque cursor pointing just after the row with this (created_at, id)"""
+    raw = f"{created_at}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor from encode_cursor.
+
+    Returns:
+        tuple: (created_at ISO string, id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit('|', 1)
+        datetime.fromisoformat(created_at)
+        return created_at, int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def estimated_count(cursor, query, params=()):
+    """
+    The planner's row estimate for a query, from EXPLAIN without running it.
+    Cheap at any table size; accuracy depends on up-to-date statistics.
+    """
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {query}", params)
+    plan = cursor.fetchone()
+    plan = plan[0] if isinstance(plan, tuple) else next(iter(plan.values()))
+    return int(plan[0]['Plan']['Plan Rows'])
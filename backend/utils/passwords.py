@@ -0,0 +1,195 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+from config import PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_TIMEOUT
+from utils.processes import pool_context
+
+
+class HashingOverloaded(Exception):
+    """Raised when too many hash operations are queued, or one does not finish in time"""
+
+
+def normalize_method(method):
+    """
+    Expand a Werkzeug hash method to the full prefix it writes into hashes,
+    e.g. 'scrypt' -> 'scrypt:32768:8:1', so stored hashes can be compared with it.
+    """
+    parts = method.split(':')
+    if parts[0] == 'scrypt':
+        defaults = ['scrypt', '32768', '8', '1']
+    elif parts[0] == 'pbkdf2':
+        defaults = ['pbkdf2', 'sha256', str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        return method
+    return ':'.join(parts + defaults[len(parts):])
+
+
+POLICY = normalize_method(PASSWORD_HASH_METHOD)
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(password_hash, password, method):
+    # Runs in a pool process: a stale hash is replaced in the same task, so a
+    # login costs one round trip whether or not it needs a rehash
+    if not check_password_hash(password_hash, password):
+        return False, None
+    if password_hash.split('$', 1)[0] == method:
+        return True, None
+    return True, generate_password_hash(password, method=method)
+
+
+class HashingPool:
+    """
+    Runs password hashing in worker processes so the CPU and memory cost of
+    scrypt/pbkdf2 is not paid while holding a web worker's GIL. At most
+    max_pending operations may be queued or running; beyond that callers get
+    HashingOverloaded straight away instead of piling up behind the pool. An
+    operation keeps its slot until its work has actually finished or been
+    cancelled, also when the caller stopped waiting for it. A pool broken by a
+    dead worker (OOM kill, SIGKILL) is replaced on the next operation.
+    """
+
+    def __init__(self, workers, max_pending, timeout):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._stats = {'pending': 0, 'completed': 0, 'rejected': 0, 'timeouts': 0, 'restarts': 0}
+
+    def run(self, fn, *args):
+        """Run fn(*args) in a pool process and return its result"""
+        with self._lock:
+            if self._stats['pending'] >= self.max_pending:
+                self._stats['rejected'] += 1
+                raise HashingOverloaded(f"{self._stats['pending']} password hash operations already pending")
+            self._stats['pending'] += 1
+
+        try:
+            executor, future = self._submit(fn, args)
+        except Exception:
+            self._release(None)
+            raise
+        # Also runs when the future is cancelled or its worker dies
+        future.add_done_callback(self._release)
+
+        try:
+            result = future.result(timeout=self.timeout)
+        except TimeoutError:
+            # Drop the work if it has not started; otherwise its slot stays
+            # taken until it finishes, so an overloaded pool keeps rejecting
+            future.cancel()
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise HashingOverloaded(f"Password hashing did not finish within {self.timeout}s")
+        except BrokenProcessPool:
+            # The worker died while running this operation (e.g. killed for
+            # memory); start a fresh pool next time rather than retrying
+            # something that may be what killed it
+            self._discard(executor)
+            raise HashingOverloaded("A password hashing worker died")
+        with self._lock:
+            self._stats['completed'] += 1
+        return result
+
+    def start(self):
+        """Start the worker processes now instead of on the first login"""
+        executor = self._get_executor()
+        for future in [executor.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['workers'] = self.workers
+        stats['max_pending'] = self.max_pending
+        stats['policy'] = POLICY
+        return stats
+
+    def _submit(self, fn, args):
+        """
+        Submit fn(*args), replacing the pool once if a worker died while it
+        was idle. A pool that breaks again straight away is reported as
+        HashingOverloaded rather than failing every later request.
+        """
+        for _ in range(2):
+            executor = self._get_executor()
+            try:
+                return executor, executor.submit(fn, *args)
+            except BrokenProcessPool:
+                self._discard(executor)
+        raise HashingOverloaded("Password hashing workers keep dying")
+
+    def _discard(self, executor):
+        """Drop a broken executor so the next operation starts a new one"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            self._stats['restarts'] += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, future):
+        with self._lock:
+            self._stats['pending'] -= 1
+
+    def _get_executor(self):
+        with self._lock:
+            # An executor inherited across a fork belongs to the parent
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=pool_context())
+                self._executor_pid = os.getpid()
+            return self._executor
+
+
+_pool = HashingPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_TIMEOUT)
+
+
+def hash_password(password):
+    """
+    Hash a password with the configured policy.
+
+    Args:
+        password (str): Plain-text password
+
+    Returns:
+        str: Werkzeug password hash
+
+    Raises:
+        HashingOverloaded: If the hashing pool is saturated
+    """
+    return _pool.run(_hash, password, POLICY)
+
+
+def verify_password(password_hash, password):
+    """
+    Check a password against its stored hash.
+
+    Args:
+        password_hash (str): Stored Werkzeug hash
+        password (str): Plain-text password to check
+
+    Returns:
+        tuple: (matches, new_hash); new_hash is set when the password matched but
+            the stored hash uses a different method or parameters than the policy
+
+    Raises:
+        HashingOverloaded: If the hashing pool is saturated
+    """
+    return _pool.run(_verify, password_hash, password, POLICY)
+
+
+def start_hashing_pool():
+    """Start this process's hashing workers (called from gunicorn post_fork)"""
+    _pool.start()
+
+
+def hashing_stats():
+    """Pending, completed, rejected and timed-out hash operations of this process"""
+    return _pool.stats()
@@ -0,0 +1,84 @@
+from datetime import datetime
+from utils.pagination import decode_cursor
+from utils.query_builder import PATIENT_TABLES, PATIENT_COLUMNS
+
+# Always returned: they form the pagination key
+KEY_COLUMNS = ['id', 'created_at']
+
+
+def patient_page_query(trial_type, fields=None, eligibility=None, source=None,
+                       created_from=None, created_to=None, after=None, limit=100):
+    """
+    Build a keyset-paginated SELECT over a trial's patients, newest first.
+
+    Pages are ordered by (created_at, id) DESC and continue strictly after the
+    cursor row, so each page is an index range scan of the requested size no
+    matter how deep it is. One extra row is fetched to tell whether another
+    page exists. With limit=None every matching row is returned (exports).
+
+    Args:
+        trial_type (str): Trial whose patient table is read
+        fields (list): Columns to return besides id and created_at (default: all)
+        eligibility (str): Only rows with this eligibility
+        source (str): Only rows from this source ('Patient', 'Organization')
+        created_from (str): ISO date/time, inclusive lower bound on created_at
+        created_to (str): ISO date/time, exclusive upper bound on created_at
+        after (str): Cursor returned with the previous page
+        limit (int): Page size, or None for no limit
+
+    Returns:
+        tuple: (query, params, output column names)
+
+    Raises:
+        ValueError: On an unknown trial, column, malformed date or cursor
+    """
+    if trial_type not in PATIENT_TABLES:
+        raise ValueError("Invalid trial type")
+
+    available = PATIENT_COLUMNS[trial_type]
+    if fields:
+        unknown = [f for f in fields if f not in available and f not in KEY_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        selected = [f for f in available if f in fields]
+    else:
+        selected = available
+
+    where = []
+    params = []
+    if eligibility:
+        where.append("p.eligibility = %s")
+        params.append(eligibility)
+    if source:
+        where.append("p.source = %s")
+        params.append(source)
+    for value, clause in ((created_from, "p.created_at >= %s"), (created_to, "p.created_at < %s")):
+        if value:
+            try:
+                datetime.fromisoformat(value)
+            except ValueError:
+                raise ValueError(f"Invalid date: {value}")
+            where.append(clause)
+            params.append(value)
+    if after:
+        created_at, patient_id = decode_cursor(after)
+        where.append("(p.created_at, p.id) < (%s::timestamptz, %s)")
+        params.extend([created_at, patient_id])
+
+    # to_json renders created_at as ISO 8601 in the database, ready for the
+    # response and exact enough to round-trip through the cursor. That output
+    # column shadows the table column in ORDER BY, where a bare created_at
+    # would sort by the text and could not use the (created_at, id) index, so
+    # every table column is referenced through the alias p.
+    columns = ', '.join(['p.id', "to_json(p.created_at) #>> '{}' AS created_at"] + [f'p.{c}' for c in selected])
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    query = f"""
+        SELECT {columns}
+        FROM {PATIENT_TABLES[trial_type]} p
+        {where_sql}
+        ORDER BY p.created_at DESC, p.id DESC
+    """
+    if limit is not None:
+        query += "LIMIT %s\n"
+        params.append(limit + 1)
+    return query, tuple(params), KEY_COLUMNS + selected
@@ -0,0 +1,23 @@
+import multiprocessing
+
+# Modules the forkserver imports once, so pool processes start with them loaded.
+# One forkserver serves every pool in a process, hence one list for all pools.
+FORKSERVER_PRELOAD = ['models.ml_models', 'utils.passwords']
+
+
+def pool_context():
+    """
+    Multiprocessing context for process pools started from a web worker.
+
+    forkserver rather than fork: a gthread worker already runs other threads
+    (DB pool, log writer, upload jobs), and a forked child can deadlock on a
+    lock one of them held. The forkserver is started from a clean process and
+    children are forked from it.
+
+    Pool children still re-import the main script as __mp_main__ (app.py under
+    `python app.py`, gunicorn's script otherwise), so module-level startup work
+    in a main script must be guarded.
+    """
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(FORKSERVER_PRELOAD)
+    return context
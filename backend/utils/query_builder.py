@@ -1,3 +1,32 @@
+# Patient table and insert column order for each trial type
+PATIENT_TABLES = {
+    'hypertension': 'hypertension_patients',
+    'arthritis': 'arthritis_patients',
+    'migraine': 'migraine_patients',
+    'phase1': 'phase1_patients'
+}
+
+PATIENT_COLUMNS = {
+    'hypertension': [
+        'age', 'gender', 'bmi', 'glucose', 'lifestyle_risk', 'stress_level', 'systolic_bp',
+        'diastolic_bp', 'cholesterol_total', 'comorbidities', 'consent', 'eligibility', 'source'
+    ],
+    'arthritis': [
+        'age', 'years_since_diagnosis', 'tender_joint_count', 'swollen_joint_count', 'crp_level',
+        'patient_pain_score', 'egfr', 'on_biologic_dmards', 'has_hepatitis', 'eligibility', 'source'
+    ],
+    'migraine': [
+        'age', 'migraine_frequency', 'previous_medication_failures', 'liver_enzyme_level',
+        'has_aura', 'chronic_kidney_disease', 'on_anticoagulants', 'sleep_disorder',
+        'depression', 'caffeine_intake', 'eligibility', 'source'
+    ],
+    'phase1': [
+        'age', 'sex', 'weight_kg', 'height_cm', 'bmi', 'cohort', 'alt', 'creatinine',
+        'sbp', 'dbp', 'hr', 'temp_c', 'adverse_event', 'eligibility', 'source'
+    ]
+}
+
+
 def execute_query(trial_type, patient_data, eligibility, source):
     """Execute database query for different trial types"""
     table_queries = {
@@ -69,3 +98,11 @@ def execute_query(trial_type, patient_data, eligibility, source):
     }
 
     return table_queries.get(trial_type)
+
+
+def bulk_insert_query(trial_type):
+    """Multi-row INSERT for psycopg2.extras.execute_values, same columns and order as execute_query"""
+    if trial_type not in PATIENT_TABLES:
+        return None
+    columns = ', '.join(PATIENT_COLUMNS[trial_type])
+    return f"INSERT INTO {PATIENT_TABLES[trial_type]} ({columns}) VALUES %s RETURNING id"
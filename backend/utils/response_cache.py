@@ -0,0 +1,103 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import Response, make_response, request
+from config import RESPONSE_CACHE_SIZE
+
+# Least recently used first; at most RESPONSE_CACHE_SIZE entries per process
+_entries = OrderedDict()
+_generations = {}
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'invalidations': 0, 'evictions': 0, 'expirations': 0}
+
+
+class CachedResponse:
+    """Body and validator of a cached 200 response"""
+
+    def __init__(self, body, mimetype, expires):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()
+        self.expires = expires
+
+
+def cached_response(namespace, ttl, vary_args=()):
+    """
+    Cache a GET view's successful responses in this process for ttl seconds.
+
+    Responses carry a strong ETag (SHA-256 of the body) and Cache-Control:
+    no-cache, so clients revalidate with If-None-Match and get a bodiless 304
+    while the content is unchanged. Entries are keyed by namespace, request
+    path and the values of vary_args only, so junk query strings share one
+    entry instead of each adding another. The cache is a bounded LRU;
+    invalidate(namespace) drops entries early.
+
+    Args:
+        namespace (str): Group name used for invalidation, e.g. 'analytics'
+        ttl (float): Seconds a response is served from the cache
+        vary_args (tuple): Query arguments the view reads; all others are ignored
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (namespace, request.path, tuple(request.args.get(arg) for arg in vary_args))
+            now = time.monotonic()
+            with _lock:
+                entry = _entries.get(key)
+                if entry is not None and entry.expires <= now:
+                    del _entries[key]
+                    _stats['expirations'] += 1
+                    entry = None
+                elif entry is not None:
+                    _entries.move_to_end(key)
+                generation = _generations.get(namespace, 0)
+            hit = entry is not None
+
+            if not hit:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                entry = CachedResponse(response.get_data(), response.mimetype, now + ttl)
+                with _lock:
+                    # Skip storing if an invalidation ran while the view was computing
+                    if _generations.get(namespace, 0) == generation:
+                        _entries[key] = entry
+                        _entries.move_to_end(key)
+                        while len(_entries) > RESPONSE_CACHE_SIZE:
+                            _entries.popitem(last=False)
+                            _stats['evictions'] += 1
+
+            response = Response(entry.body, mimetype=entry.mimetype)
+            response.set_etag(entry.etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+            response = response.make_conditional(request)
+            with _lock:
+                _stats['hits' if hit else 'misses'] += 1
+                if response.status_code == 304:
+                    _stats['not_modified'] += 1
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidate(namespace):
+    """
+    Drop this process's cached responses for a namespace. Other worker
+    processes refresh within their ttl.
+    """
+    with _lock:
+        _generations[namespace] = _generations.get(namespace, 0) + 1
+        stale = [key for key in _entries if key[0] == namespace]
+        for key in stale:
+            del _entries[key]
+        _stats['invalidations'] += 1
+
+
+def response_cache_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats['entries'] = len(_entries)
+    return stats
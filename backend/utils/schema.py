@@ -0,0 +1,34 @@
+import threading
+import psycopg2
+from database.migrate import LATEST_VERSION
+from utils.db import db_connection
+
+_lock = threading.Lock()
+_current = False
+
+
+def schema_status():
+    """
+    Compare the database's applied migration version with the latest one
+    shipped with the code. Once the schema is found current the answer is
+    cached for the life of the process, so callers can check it freely.
+    """
+    global _current
+    if _current:
+        return {"current": True, "version": LATEST_VERSION, "latest": LATEST_VERSION}
+
+    try:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+            version = 0
+            if cursor.fetchone()[0]:
+                cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+                version = cursor.fetchone()[0]
+            cursor.close()
+    except psycopg2.Error as e:
+        return {"current": False, "version": None, "latest": LATEST_VERSION, "error": str(e).strip()}
+
+    with _lock:
+        _current = version >= LATEST_VERSION
+    return {"current": _current, "version": version, "latest": LATEST_VERSION}
@@ -0,0 +1,57 @@
+import numpy as np
+from models.ml_models import predict_eligibility_batch
+from utils.bulk_writer import insert_patients
+from utils.metrics import stage
+
+
+def normalize_upload(df):
+    """
+    Prepare an uploaded DataFrame so each row holds the values the per-row
+    upload loop has always seen: rows share one dtype when every column is
+    numeric (as iterrows does) and missing values become 0, or '' for gender/consent.
+    """
+    dtypes = list(df.dtypes)
+    if dtypes and all(isinstance(d, np.dtype) and d.kind in 'iuf' for d in dtypes):
+        row_dtype = np.result_type(*dtypes)
+        if any(d != row_dtype for d in dtypes):
+            df = df.astype(row_dtype)
+
+    for column in df.columns:
+        missing = df[column].isna()
+        if missing.any():
+            df[column] = df[column].where(~missing, 0 if column not in ['gender', 'consent'] else '')
+    return df
+
+
+def screen_chunk(cursor, trial_type, df, source='Organization'):
+    """
+    Normalize, score and insert one chunk of uploaded rows.
+
+    Returns:
+        list: One result dict per row in input order, either
+        {"row", "patient_id", "eligibility", "data"} or {"row", "error", "eligibility": "Error"}
+    """
+    with stage('normalize'):
+        df = normalize_upload(df)
+    eligibilities = predict_eligibility_batch(trial_type, df)
+    records = df.to_dict('records')
+    row_numbers = [index + 1 for index in df.index]
+
+    with stage('insert', db=True):
+        inserted, failed = insert_patients(cursor, trial_type, records, eligibilities, source)
+
+    results = [None] * len(records)
+    for position, patient_id in inserted:
+        results[position] = {
+            "row": row_numbers[position],
+            "patient_id": patient_id,
+            "eligibility": eligibilities[position],
+            "data": records[position]
+        }
+    for position, error in failed:
+        results[position] = {
+            "row": row_numbers[position],
+            "error": error,
+            "eligibility": "Error"
+        }
+    return results
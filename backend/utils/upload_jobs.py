@@ -0,0 +1,313 @@
+import io
+import logging
+import os
+import threading
+from contextlib import contextmanager
+import psycopg2
+import psycopg2.extras
+from config import JOB_WORKERS, JOB_POLL_INTERVAL, JOB_STALE_SECONDS, JOB_MAX_ATTEMPTS
+from utils.db import db_connection
+from utils.analytics import fold_rollup_deltas
+from utils.response_cache import invalidate
+from utils.screening import screen_chunk
+from utils.upload_reader import iter_upload_chunks, count_upload_rows
+
+JOB_COLUMNS = """
+    id, trial_type, filename, status, total_rows, processed_rows, eligible, ineligible,
+    errors, error, attempts, created_at, started_at, heartbeat_at, finished_at
+"""
+
+# Fails abandoned jobs (running, no recent heartbeat) that already used every
+# attempt, e.g. a file that kills or hangs its worker, so they are not
+# reclaimed forever. Params: (JOB_STALE_SECONDS, JOB_MAX_ATTEMPTS)
+FAIL_ABANDONED_SQL = """
+    UPDATE upload_jobs
+    SET status = 'failed', finished_at = NOW(), file_data = NULL,
+        error = 'Abandoned after ' || attempts || ' attempts without completing'
+    WHERE status = 'running' AND heartbeat_at < NOW() - %s * INTERVAL '1 second'
+      AND attempts >= %s
+"""
+
+# Claims the oldest queued job, or an abandoned one, that has attempts left.
+# Params: (JOB_STALE_SECONDS, JOB_MAX_ATTEMPTS)
+CLAIM_JOB_SQL = """
+    UPDATE upload_jobs
+    SET status = 'running', attempts = attempts + 1,
+        started_at = COALESCE(started_at, NOW()), heartbeat_at = NOW()
+    WHERE id = (
+        SELECT id FROM upload_jobs
+        WHERE (status = 'queued'
+               OR (status = 'running' AND heartbeat_at < NOW() - %s * INTERVAL '1 second'))
+          AND attempts < %s
+        ORDER BY created_at
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, trial_type, filename, file_data, processed_rows, attempts
+"""
+
+logger = logging.getLogger(__name__)
+
+_wake = threading.Event()
+_workers = []
+_workers_pid = None
+_workers_lock = threading.Lock()
+
+
+class JobLost(Exception):
+    """Another worker reclaimed the job this worker was running"""
+
+
+def enqueue_job(conn, trial_type, filename, data):
+    """
+    Queue an uploaded file for background screening.
+
+    Args:
+        conn: Open connection; the job row is committed here
+        trial_type (str): Trial to screen the file against
+        filename (str): Original file name, used to pick the reader
+        data (bytes): Raw file contents
+
+    Returns:
+        int: The new job id
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "INSERT INTO upload_jobs (trial_type, filename, file_data, total_rows) VALUES (%s, %s, %s, %s) RETURNING id",
+            (trial_type, filename, psycopg2.Binary(data), count_upload_rows(data, filename))
+        )
+        job_id = cursor.fetchone()[0]
+        conn.commit()
+    finally:
+        cursor.close()
+
+    ensure_workers()
+    _wake.set()
+    return job_id
+
+
+def get_job(cursor, job_id):
+    """Return a job's status row as a dict, or None if it does not exist"""
+    cursor.execute(f"SELECT {JOB_COLUMNS} FROM upload_jobs WHERE id = %s", (job_id,))
+    job = cursor.fetchone()
+    if not job:
+        return None
+
+    job = dict(job)
+    for key in ('created_at', 'started_at', 'heartbeat_at', 'finished_at'):
+        if job[key] is not None:
+            job[key] = job[key].isoformat()
+    job['progress'] = (
+        round(job['processed_rows'] / job['total_rows'], 4) if job['total_rows'] else
+        (1.0 if job['status'] == 'completed' else None)
+    )
+    return job
+
+
+def get_job_results(cursor, job_id, after_row=0, limit=100, eligibility=None):
+    """Return up to limit result rows of a job with row_number > after_row"""
+    where = ["job_id = %s", "row_number > %s"]
+    params = [job_id, after_row]
+    if eligibility:
+        where.append("eligibility = %s")
+        params.append(eligibility)
+    cursor.execute(
+        f"""
+        SELECT row_number AS row, patient_id, eligibility, error
+        FROM upload_job_results
+        WHERE {' AND '.join(where)}
+        ORDER BY row_number
+        LIMIT %s
+        """,
+        tuple(params + [limit])
+    )
+    return cursor.fetchall()
+
+
+def ensure_workers():
+    """Start this process's worker threads if they are not running (e.g. after a fork)"""
+    global _workers_pid
+    with _workers_lock:
+        if _workers_pid == os.getpid() and all(worker.is_alive() for worker in _workers):
+            return
+        _workers.clear()
+        for i in range(JOB_WORKERS):
+            worker = threading.Thread(target=_worker_loop, name=f"upload-job-worker-{i}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+        _workers_pid = os.getpid()
+
+
+def _worker_loop():
+    while True:
+        _wake.clear()
+        try:
+            while _run_next_job():
+                pass
+        except Exception:
+            logger.exception("Upload job worker error")
+        _wake.wait(JOB_POLL_INTERVAL)
+
+
+def _run_next_job():
+    """
+    Claim and run one queued (or abandoned) job. Returns False if the queue is
+    empty, and also after a failed attempt, so this worker waits a poll
+    interval before the job (now queued again) is retried.
+    """
+    with db_connection() as conn:
+        cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.execute(FAIL_ABANDONED_SQL, (JOB_STALE_SECONDS, JOB_MAX_ATTEMPTS))
+        cursor.execute(CLAIM_JOB_SQL, (JOB_STALE_SECONDS, JOB_MAX_ATTEMPTS))
+        job = cursor.fetchone()
+        conn.commit()
+        # Closing the cursor frees the claim's result, which holds the file too
+        cursor.close()
+        if not job:
+            return False
+
+        try:
+            with _heartbeat(job['id'], job['attempts']):
+                _process_job(conn, job)
+        except JobLost:
+            conn.rollback()
+            logger.warning("Upload job reclaimed by another worker; stopping", extra={'job_id': job['id']})
+        except Exception as e:
+            conn.rollback()
+            _fail_attempt(conn, job, e)
+            return False
+        return True
+
+
+def _fail_attempt(conn, job, error):
+    """
+    Requeue a job whose attempt raised, keeping the error, or fail it (and
+    drop its file) once it has used JOB_MAX_ATTEMPTS. Chunks committed by the
+    attempt stay, so a retry resumes after them.
+    """
+    retry = job['attempts'] < JOB_MAX_ATTEMPTS
+    logger.error("Upload job attempt failed" + ("; retrying" if retry else ""), exc_info=error, extra={
+        'job_id': job['id'], 'attempt': job['attempts'], 'max_attempts': JOB_MAX_ATTEMPTS
+    })
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            """
+            UPDATE upload_jobs
+            SET status = CASE WHEN %(retry)s THEN 'queued' ELSE 'failed' END,
+                error = %(error)s,
+                finished_at = CASE WHEN %(retry)s THEN NULL ELSE NOW() END,
+                file_data = CASE WHEN %(retry)s THEN file_data END
+            WHERE id = %(id)s AND attempts = %(attempt)s AND status = 'running'
+            """,
+            {'retry': retry, 'error': str(error), 'id': job['id'], 'attempt': job['attempts']}
+        )
+        conn.commit()
+    except psycopg2.Error:
+        # The connection itself may be what failed; the job then looks
+        # abandoned once its heartbeat stops and is reclaimed or failed later
+        conn.rollback()
+        logger.warning("Could not record upload job failure", extra={'job_id': job['id']}, exc_info=True)
+    finally:
+        cursor.close()
+
+
+@contextmanager
+def _heartbeat(job_id, attempt):
+    """
+    Refresh a running job's heartbeat_at from a separate thread and connection
+    while the block runs, so a chunk that takes longer than JOB_STALE_SECONDS
+    (slow Excel parsing, scoring, row-by-row insert retries) does not make the
+    job look abandoned. Only the claim identified by attempt is refreshed.
+    """
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(JOB_STALE_SECONDS / 3):
+            try:
+                with db_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(
+                        """
+                        UPDATE upload_jobs SET heartbeat_at = NOW()
+                        WHERE id = %s AND attempts = %s AND status = 'running'
+                        """,
+                        (job_id, attempt)
+                    )
+                    conn.commit()
+                    cursor.close()
+            except Exception:
+                logger.warning("Upload job heartbeat failed", extra={'job_id': job_id}, exc_info=True)
+
+    thread = threading.Thread(target=beat, name=f"upload-job-heartbeat-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _process_job(conn, job):
+    """
+    Screen a job's file chunk by chunk. Patient rows, job results and progress
+    for a chunk commit together, so a restarted job resumes after the last
+    committed row without duplicating patients. Each commit also checks that
+    this claim (job['attempts']) still owns the job, raising JobLost if it
+    was reclaimed, so two workers never both write a chunk.
+    """
+    job_id = job['id']
+    done = job['processed_rows']
+    cursor = conn.cursor()
+    # One in-memory copy of the file while the job runs: the buffer fetched
+    # with the claim is released as soon as the reader has its own
+    upload = io.BytesIO(job.pop('file_data'))
+
+    for chunk in iter_upload_chunks(upload, job['filename']):
+        if len(chunk) == 0 or chunk.index[-1] < done:
+            continue
+        chunk = chunk[chunk.index >= done]
+
+        results = screen_chunk(cursor, job['trial_type'], chunk, 'Organization')
+        psycopg2.extras.execute_values(
+            cursor,
+            "INSERT INTO upload_job_results (job_id, row_number, patient_id, eligibility, error) VALUES %s",
+            [(job_id, r['row'], r.get('patient_id'), r['eligibility'], r.get('error')) for r in results],
+            page_size=max(len(results), 1)
+        )
+        cursor.execute(
+            """
+            UPDATE upload_jobs
+            SET processed_rows = processed_rows + %s, eligible = eligible + %s,
+                ineligible = ineligible + %s, errors = errors + %s, heartbeat_at = NOW()
+            WHERE id = %s AND attempts = %s AND status = 'running'
+            """,
+            (
+                len(results),
+                sum(1 for r in results if r['eligibility'] == 'Eligible'),
+                sum(1 for r in results if r['eligibility'] == 'Ineligible'),
+                sum(1 for r in results if r['eligibility'] == 'Error'),
+                job_id, job['attempts']
+            )
+        )
+        if cursor.rowcount == 0:
+            raise JobLost(job_id)
+        conn.commit()
+        fold_rollup_deltas(conn)
+        invalidate('analytics')
+        done = chunk.index[-1] + 1
+
+    cursor.execute(
+        """
+        UPDATE upload_jobs
+        SET status = 'completed', finished_at = NOW(), file_data = NULL, error = NULL,
+            total_rows = processed_rows
+        WHERE id = %s AND attempts = %s AND status = 'running'
+        """,
+        (job_id, job['attempts'])
+    )
+    if cursor.rowcount == 0:
+        raise JobLost(job_id)
+    conn.commit()
+    cursor.close()
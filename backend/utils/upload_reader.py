@@ -0,0 +1,77 @@
+import csv
+import io
+import pandas as pd
+from config import UPLOAD_CHUNK_ROWS
+
+
+def iter_upload_chunks(file, filename, chunk_rows=UPLOAD_CHUNK_ROWS):
+    """
+    Yield an uploaded CSV/Excel file as DataFrames of at most chunk_rows rows.
+    Row index continues across chunks so it still numbers rows within the file.
+
+    Raises:
+        ValueError: If the file extension is not CSV or Excel
+    """
+    if filename.endswith('.csv'):
+        yield from pd.read_csv(file, chunksize=chunk_rows)
+    elif filename.endswith('.xlsx'):
+        yield from _iter_xlsx_chunks(file, chunk_rows)
+    elif filename.endswith('.xls'):
+        # Legacy .xls has no streaming reader; slice the loaded sheet instead
+        df = pd.read_excel(file)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+    else:
+        raise ValueError("Unsupported file format. Use CSV or Excel.")
+
+
+def count_upload_rows(data, filename):
+    """Count data rows in an uploaded file's bytes without parsing values; None if unknown"""
+    try:
+        if filename.endswith('.csv'):
+            reader = csv.reader(io.TextIOWrapper(io.BytesIO(data), encoding='utf-8', newline=''))
+            return max(sum(1 for row in reader if row) - 1, 0)
+        if filename.endswith('.xlsx'):
+            from openpyxl import load_workbook
+            workbook = load_workbook(io.BytesIO(data), read_only=True)
+            try:
+                max_row = workbook.worksheets[0].max_row
+            finally:
+                workbook.close()
+            return max(max_row - 1, 0) if max_row else None
+    except Exception:
+        return None
+    return None
+
+
+def _iter_xlsx_chunks(file, chunk_rows):
+    """Stream the first worksheet of an .xlsx file through openpyxl's read-only mode"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(name) if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+
+        batch, start = [], 0
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            batch.append(row)
+            if len(batch) == chunk_rows:
+                yield _xlsx_frame(batch, columns, start)
+                start += len(batch)
+                batch = []
+        if batch:
+            yield _xlsx_frame(batch, columns, start)
+    finally:
+        workbook.close()
+
+
+def _xlsx_frame(batch, columns, start):
+    df = pd.DataFrame.from_records(batch, columns=columns)
+    df.index = pd.RangeIndex(start, start + len(df))
+    return df.infer_objects()
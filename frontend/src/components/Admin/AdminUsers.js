@@ -20,20 +20,23 @@ const AdminUsers = () => {
   const [loading, setLoading] = useState(true);
   const [users, setUsers] = useState([]);
   const [total, setTotal] = useState(0);
-  const [page, setPage] = useState(1);
+  // cursors[i] fetches page i + 1; the first page has no cursor
+  const [cursors, setCursors] = useState([null]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [pageSize, setPageSize] = useState(20);
   const [role, setRole] = useState('patient');
   const [search, setSearch] = useState('');
 
-  const fetchData = async (opts = {}) => {
+  const page = cursors.length;
+
+  const fetchData = async () => {
     setLoading(true);
     try {
-      const params = { role, search, page, pageSize, ...opts };
+      const params = { role, search, cursor: cursors[cursors.length - 1], pageSize };
       const res = await apiService.getAdminUsers(params);
       setUsers(res.data.users || []);
       setTotal(res.data.total || 0);
-      if (res.data.page) setPage(res.data.page);
-      if (res.data.page_size) setPageSize(res.data.page_size);
+      setNextCursor(res.data.next_cursor || null);
     } catch (e) {
       toast.error('Failed to fetch users');
     } finally {
@@ -44,12 +47,14 @@ const AdminUsers = () => {
   useEffect(() => {
     fetchData();
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [role, page, pageSize]);
+  }, [role, cursors, pageSize]);
+
+  // Back to the first page; a new array refetches even when already there
+  const resetPages = () => setCursors([null]);
 
   const onSearchSubmit = (e) => {
     e.preventDefault();
-    setPage(1);
-    fetchData({ page: 1 });
+    resetPages();
   };
 
   const onExportCsv = async () => {
@@ -78,7 +83,7 @@ const AdminUsers = () => {
 
       {/* Controls */}
       <form onSubmit={onSearchSubmit} style={{ display: 'flex', gap: 8, marginBottom: 12 }}>
-        <select value={role} onChange={(e) => { setRole(e.target.value); setPage(1); }} className="analytics form-select">
+        <select value={role} onChange={(e) => { setRole(e.target.value); resetPages(); }} className="analytics form-select">
           <option value="patient">Patient</option>
           <option value="admin">Admin</option>
           <option value="all">All</option>
@@ -126,10 +131,10 @@ const AdminUsers = () => {
         <div className="table-footer" style={{ display: 'flex', alignItems: 'center', gap: 8, justifyContent: 'space-between' }}>
           <div>Showing {(users.length ? (page - 1) * pageSize + 1 : 0)}–{(page - 1) * pageSize + users.length} of {total}</div>
           <div style={{ display: 'flex', alignItems: 'center', gap: 8 }}>
-            <button className="btn ghost" disabled={page <= 1} onClick={() => setPage((p) => Math.max(1, p - 1))}>Prev</button>
-            <span>Page {page} / {totalPages}</span>
-            <button className="btn ghost" disabled={page >= totalPages} onClick={() => setPage((p) => Math.min(totalPages, p + 1))}>Next</button>
-            <select value={pageSize} onChange={(e) => { setPageSize(parseInt(e.target.value, 10)); setPage(1); }} className="analytics form-select">
+            <button className="btn ghost" disabled={loading || page <= 1} onClick={() => setCursors((c) => c.slice(0, -1))}>Prev</button>
+            <span>Page {page} / {Math.max(page, totalPages)}</span>
+            <button className="btn ghost" disabled={loading || !nextCursor} onClick={() => setCursors((c) => [...c, nextCursor])}>Next</button>
+            <select value={pageSize} onChange={(e) => { setPageSize(parseInt(e.target.value, 10)); resetPages(); }} className="analytics form-select">
               <option value={10}>10</option>
               <option value={20}>20</option>
               <option value={50}>50</option>
@@ -31,8 +31,10 @@ const Analytics = () => {
   const [analytics, setAnalytics] = useState(null);
   const [selectedTrial, setSelectedTrial] = useState('all');
   const [patients, setPatients] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [loadingPatients, setLoadingPatients] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchAnalytics();
@@ -43,6 +45,7 @@ const Analytics = () => {
       fetchPatients(selectedTrial);
     } else {
       setPatients([]); // Clear patients when "all" is selected
+      setNextCursor(null);
     }
   }, [selectedTrial]);
 
@@ -74,9 +77,12 @@ const Analytics = () => {
       setLoadingPatients(true);
       const response = await apiService.getPatients(trialType);
       setPatients(response.data);
+      // Absent on the last page
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error('Error fetching patients:', error);
       toast.error('Failed to load patient data');
+      setNextCursor(null);
       // Set mock patient data for development/testing
       setPatients([
         {
@@ -101,6 +107,20 @@ const Analytics = () => {
     }
   };
 
+  const loadMorePatients = async () => {
+    try {
+      setLoadingMore(true);
+      const response = await apiService.getPatients(selectedTrial, { cursor: nextCursor });
+      setPatients((loaded) => [...loaded, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      console.error('Error fetching more patients:', error);
+      toast.error('Failed to load more patients');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const getTrialIcon = (trialType) => {
     const icons = {
       hypertension: FaHeartbeat,
@@ -157,18 +177,22 @@ const Analytics = () => {
     ];
   };
 
-  const exportData = () => {
+  const exportData = async () => {
     if (!patients.length) {
       toast.error('No patient data to export');
       return;
     }
 
-    const csvContent = [
-      Object.keys(patients[0]).join(','),
-      ...patients.map(patient => Object.values(patient).join(','))
-    ].join('\n');
-
-    const blob = new Blob([csvContent], { type: 'text/csv' });
+    // The server streams every matching row, not just the pages loaded here
+    let blob;
+    try {
+      const response = await apiService.exportPatientsCsv(selectedTrial);
+      blob = new Blob([response.data], { type: 'text/csv' });
+    } catch (error) {
+      console.error('Error exporting patients:', error);
+      toast.error('CSV export failed');
+      return;
+    }
     const url = window.URL.createObjectURL(blob);
     const a = document.createElement('a');
     a.href = url;
@@ -385,7 +409,7 @@ const Analytics = () => {
                 </tr>
               </thead>
               <tbody>
-                {patients.slice(0, 100).map((patient, index) => (
+                {patients.map((patient, index) => (
                   <tr key={patient.id || index}>
                     {Object.entries(patient).map(([key, value], i) => (
                       <td key={i} className={key === 'eligibility' ?
@@ -405,10 +429,13 @@ const Analytics = () => {
                 ))}
               </tbody>
             </table>
-            {patients.length > 100 && (
-              <p className="table-footer">
-                Showing first 100 patients out of {patients.length} total
-              </p>
+            {nextCursor && (
+              <div className="table-footer">
+                <p>Showing the {patients.length} most recent patients</p>
+                <button className="btn ghost" onClick={loadMorePatients} disabled={loadingMore}>
+                  {loadingMore ? 'Loading...' : 'Load more'}
+                </button>
+              </div>
             )}
           </div>
         )}
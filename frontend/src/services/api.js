@@ -70,8 +70,13 @@ export const apiService = {
   // Get analytics data
   getAnalytics: () => api.get('/api/analytics'),
   
-  // Get patients by trial type
-  getPatients: (trialType) => api.get(`/api/patients/${trialType}`),
+  // Get one page of patients by trial type; pass the previous page's X-Next-Cursor header as cursor
+  getPatients: (trialType, { cursor } = {}) =>
+    api.get(`/api/patients/${trialType}`, { params: cursor ? { cursor } : {} }),
+
+  // Export every patient of a trial as CSV (streamed by the server, not paginated)
+  exportPatientsCsv: (trialType) =>
+    api.get(`/api/patients/${trialType}`, { params: { export: 'csv' }, responseType: 'blob' }),
 
   // Patient applications history
   getMyApplications: () => {
@@ -79,9 +84,9 @@ export const apiService = {
     return api.get('/api/applications/me', { headers: username ? { 'X-Username': username } : {} });
   },
 
-  // Admin - list users with filters/pagination
-  getAdminUsers: ({ role = 'patient', search = '', page = 1, pageSize = 20 } = {}) =>
-    api.get('/api/admin/users', { params: { role, search, page, page_size: pageSize } }),
+  // Admin - list users with filters; pass the previous page's next_cursor as cursor
+  getAdminUsers: ({ role = 'patient', search = '', cursor = null, pageSize = 20 } = {}) =>
+    api.get('/api/admin/users', { params: { role, search, page_size: pageSize, ...(cursor ? { cursor } : {}) } }),
 
   // Admin - export CSV (using same filters, no pagination)
   exportAdminUsersCsv: ({ role = 'patient', search = '' } = {}) =>